@@ -0,0 +1,82 @@
+# Unit tests of the scalar and the vectorized bounding box generation.
+import sys
+import unittest
+from os import path
+from random import Random
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+@unittest.skipIf(wt.np is None, "requires numpy")
+class BoxArrayTest(unittest.TestCase):
+    """Tests that BoxArray follows the rules of the scalar box generation."""
+    EXTENT = wt.Box(-180.0, -90.0, 180.0, 90.0)
+
+    def assertBoxes(self, boxes, minwidth, minheight, maxfractionaldigits):
+        """Asserts that all boxes are inside the extent, have the minimum size and at most maxfractionaldigits fractional digits."""
+        for box in boxes:
+            self.assertTrue(self.EXTENT.contains(box), box)
+            self.assertGreaterEqual(box.getWidth(), minwidth - 1e-9, box)
+            self.assertGreaterEqual(box.getHeight(), minheight - 1e-9, box)
+            for c in [box.lowerx, box.lowery, box.upperx, box.uppery]:
+                self.assertAlmostEqual(c, round(c, maxfractionaldigits), places=9)
+
+    def testScalarSubboxes(self):
+        """Box.generateRandomSubbox follows the extent, minimum size and digit rules."""
+        rng = Random(3)
+        self.assertBoxes([self.EXTENT.generateRandomSubbox(1.0, 1.0, 3, rng) for i in range(2000)], 1.0, 1.0, 3)
+
+    def testRandomSubboxes(self):
+        """BoxArray.randomSubboxes follows the rules of the scalar path and draws from the same distribution."""
+        boxes = list(wt.BoxArray.randomSubboxes(self.EXTENT, 20000, 1.0, 1.0, 3, 4))
+        self.assertBoxes(boxes, 1.0, 1.0, 3)
+        rng = Random(4)
+        scalar = [self.EXTENT.generateRandomSubbox(1.0, 1.0, 3, rng) for i in range(20000)]
+        for lower in [-18.0, 0.0, 90.0]:
+            share = sum(b.lowerx < lower for b in boxes) / boxes.__len__()
+            self.assertAlmostEqual(share, sum(b.lowerx < lower for b in scalar) / scalar.__len__(), delta=0.02)
+
+    def testSeed(self):
+        """The same seed yields the same boxes."""
+        first = wt.BoxArray.randomSubboxes(self.EXTENT, 100, 1.0, 1.0, 3, 5)
+        self.assertTrue((first.coordinates == wt.BoxArray.randomSubboxes(self.EXTENT, 100, 1.0, 1.0, 3, 5).coordinates).all())
+
+    def testWalk(self):
+        """A vectorized walk stays inside the extent and keeps the size of its start box."""
+        start = wt.Box(-10.0, -5.0, 10.0, 5.0)
+        for box in wt.BoxArray.walk(self.EXTENT, start, 5000, 1.0, 12.0, 5):
+            self.assertTrue(self.EXTENT.contains(box), box)
+            self.assertAlmostEqual(box.getWidth(), 20.0)
+            self.assertAlmostEqual(box.getHeight(), 10.0)
+
+    def testZoomingChainsNeverStall(self):
+        """Every step of a vectorized zooming chain yields a new box inside the extent."""
+        for seed in range(100):
+            test = wt.ZoomingBoxWMSTest(wt.WMSServer(), "layer", 256, 256, rng=Random(seed))
+            boxes = list(test.generateBoundingBoxArray(50, seed))
+            self.assertEqual(set(b.__str__() for b in boxes).__len__(), 50)
+            self.assertBoxes(boxes, 1.0, 1.0, 3)
+
+    def testZoomDistribution(self):
+        """A vectorized zooming chain restarts and zooms out as often and to the same widths as the scalar chain."""
+        test = wt.ZoomingBoxWMSTest(wt.WMSServer(), "layer", 256, 256, rng=Random(6))
+        scalar = wt.np.array([[b.lowerx, b.upperx] for b in test.generateBoundingBoxes(20000)])
+        batch = wt.BoxArray.zoom(self.EXTENT, test.boundingbox, 20000, test.minboxwidth, test.maxboxwidth, 6, test.minwidth, test.minheight, test.maxfractionaldigits).coordinates[:, [0, 2]]
+        for boxes in [scalar, batch]:
+            widths = boxes[:, 1] - boxes[:, 0]
+            self.assertAlmostEqual((wt.np.diff(widths) < 0).mean(), 0.23, delta=0.02)
+            self.assertAlmostEqual(widths.mean(), 84.0, delta=3.0)
+
+    def testZoomBatches(self):
+        """A plan generating zooming chains in batches continues the chain of the previous batch."""
+        plan = wt.WMSTestPlan(wt.WMSServer(), [wt.ZoomingBoxWMSTest], ["a"], 256, 256, 1000, 7, 64)
+        boxes = list(plan.boxes(wt.ZoomingBoxWMSTest))
+        self.assertEqual(boxes.__len__(), 1000)
+        self.assertBoxes(boxes, 1.0, 1.0, 3)
+        zoomed = sum(1 for previous, box in zip(boxes, boxes[1:]) if box.getWidth() - previous.getWidth() >= 1.99 and abs(box.getCenter()[0] - previous.getCenter()[0]) < 1e-6)
+        self.assertGreater(zoomed, 600)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# Unit tests of the capacity search.
+import sys
+import unittest
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class CapacitySearchTest(unittest.TestCase):
+    """Tests the levels and the result of CapacitySearch."""
+
+    def createSearch(self, mode, openloop=False, plan=None, **parameters):
+        """Returns a search of the given mode for a plan of the layer a."""
+        plan = plan or wt.WMSTestPlan(wt.WMSServer(), [wt.RandomBoundingBoxWMSTest], ["a"], 256, 256, 1000, 1)
+        return wt.CapacitySearch(plan, "pool", mode, openloop, **parameters)
+
+    def testStepLevels(self):
+        """In the mode step, the levels are raised by step until a level fails or the maximum is exceeded."""
+        search = self.createSearch("step", start=2, step=3, maximum=10)
+        self.assertEqual(search.getNextLevel(2, None), 5)
+        self.assertEqual(search.getNextLevel(8, None), None)
+        self.assertEqual(search.getNextLevel(5, 8), None)
+        self.assertEqual(search.getNextLevel(None, 2), None)
+
+    def testBinaryLevels(self):
+        """In the mode binary, the levels are doubled until a level fails and then bisected down to step."""
+        search = self.createSearch("binary", True, start=1.0, step=1.0, maximum=64.0)
+        self.assertEqual(search.getNextLevel(8.0, None), 16.0)
+        self.assertEqual(search.getNextLevel(64.0, None), None)
+        self.assertEqual(search.getNextLevel(8.0, 16.0), 12.0)
+        self.assertEqual(search.getNextLevel(11.0, 12.0), None)
+        self.assertEqual(search.getNextLevel(None, 1.0), None)
+        self.assertEqual(self.createSearch("binary", start=1, step=1, maximum=64).getNextLevel(None, 5), 2)
+
+    def testInvalid(self):
+        """Unknown modes and levels that are not positive are rejected."""
+        with self.assertRaises(Exception):
+            self.createSearch("linear")
+        with self.assertRaises(Exception):
+            self.createSearch("step", start=0)
+
+    def testSearch(self):
+        """An open-loop search against a mock server with one connection finds a rate below the capacity of the connection."""
+        mock = wt.MockWMSServer(latency=0.05, imagesize=100)
+        server = mock.start()
+        try:
+            plan = wt.WMSTestPlan(server, [wt.RandomBoundingBoxWMSTest], ["a"], 256, 256, 1000, 1)
+            search = self.createSearch("binary", True, plan, start=8.0, step=8.0, maximum=64.0, hold=0.5, warmup=0.1, slo=0.1, concurrency=1)
+            best = search.run()
+        finally:
+            mock.stop()
+        self.assertIn(best["a"]["level"], [8.0, 16.0])
+        self.assertEqual([r["level"] for r in search.rows][:3], [8.0, 16.0, 32.0])
+        self.assertFalse(search.rows[2]["sustainable"])
+        self.assertGreater(search.rows[2]["p95"], 0.1)
+        self.assertAlmostEqual(search.rows[0]["throughput"], 8.0, delta=2.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
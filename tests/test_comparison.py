@@ -0,0 +1,84 @@
+# Unit tests of the paired layer comparison.
+import sys
+import tempfile
+import unittest
+from math import erfc, sqrt
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class SignificanceTest(unittest.TestCase):
+    """Tests Student's t-distribution and the Wilcoxon signed-rank test of LayerComparison against reference values."""
+
+    def testTPValue(self):
+        """Two-sided p-values of Student's t-distribution."""
+        self.assertAlmostEqual(wt.LayerComparison.tPValue(1.0, 1), 0.5, places=9)
+        self.assertAlmostEqual(wt.LayerComparison.tPValue(2.0, 10), 0.0733880347, places=8)
+        self.assertAlmostEqual(wt.LayerComparison.tPValue(0.0, 5), 1.0, places=9)
+        self.assertAlmostEqual(wt.LayerComparison.tPValue(1.959963985, 10 ** 7), 0.05, places=6)
+
+    def testTQuantile(self):
+        """Quantiles of Student's t-distribution for two-sided confidence intervals."""
+        self.assertAlmostEqual(wt.LayerComparison.tQuantile(0.95, 10), 2.2281388520, places=7)
+        self.assertAlmostEqual(wt.LayerComparison.tQuantile(0.99, 3), 5.8409093097, places=6)
+        self.assertAlmostEqual(wt.LayerComparison.tQuantile(0.95, 1), 12.7062047362, places=5)
+
+    def testMeanInterval(self):
+        """The confidence interval is symmetric around the mean and the p-value matches the t-test."""
+        mean, low, high, p = wt.LayerComparison.meanInterval([1.0, 2.0, 3.0, 4.0], 0.95)
+        self.assertEqual(mean, 2.5)
+        self.assertAlmostEqual(mean - low, high - mean)
+        self.assertAlmostEqual(high - mean, 3.1824463053 * sqrt(5.0 / 3.0) / 2.0, places=7)
+        self.assertAlmostEqual(p, wt.LayerComparison.tPValue(2.5 / (sqrt(5.0 / 3.0) / 2.0), 3))
+
+    def testWilcoxon(self):
+        """p-values of the Wilcoxon signed-rank test in the normal approximation."""
+        self.assertAlmostEqual(wt.LayerComparison.wilcoxonPValue([float(i) for i in range(1, 11)]), erfc(27.5 / sqrt(2.0 * 96.25)))
+        self.assertAlmostEqual(wt.LayerComparison.wilcoxonPValue([-2.0, -1.0, 1.0, 2.0]), 1.0)
+        self.assertIsNone(wt.LayerComparison.wilcoxonPValue([0.0, 0.0]))
+
+
+class LayerComparisonTest(unittest.TestCase):
+    """Tests the pairing of the requests of the compared layers."""
+
+    def testPairs(self):
+        """The k-th requests of a box are paired across the layers and pairs with a failed request are excluded."""
+        comparison = wt.LayerComparison(["a", "b"])
+        box = (0.0, 0.0, 1.0, 1.0)
+        for latency in [0.1, 0.2, 0.3]:
+            comparison.add("a", "RandomBbox", box, latency)
+        for latency in [0.2, None, 0.6]:
+            comparison.add("b", "RandomBbox", box, latency)
+        self.assertEqual(list(comparison.differences["b"]), [0.1, 0.3])
+        self.assertEqual(comparison.excluded, 1)
+        self.assertEqual(comparison.getRows()[0]["pairs"], 2)
+        self.assertAlmostEqual(comparison.getRows()[0]["ratio"], 2.0)
+
+    def testReadRunCase(self):
+        """The bbox parameter of a run stored as CSV is found regardless of its case."""
+        with tempfile.TemporaryDirectory() as directory:
+            outputfile = path.join(directory, "run.csv")
+            with open(outputfile, "w") as f:
+                f.write("RandomBbox;a;http://localhost/wms?SERVICE=WMS&BBOX=1,2,3,4;200;OK;0.1;0.2\n")
+                f.write("RandomBbox;b;http://localhost/wms?service=WMS&bbox=1,2,3,4;503;Busy;0.1;0.2\n")
+            self.assertEqual(list(wt.LayerComparison.readRun(outputfile)), [("RandomBbox", "a", (1.0, 2.0, 3.0, 4.0), 0.2), ("RandomBbox", "b", (1.0, 2.0, 3.0, 4.0), None)])
+
+    @unittest.skipIf(wt.np is None, "requires numpy")
+    def testReadRunNpz(self):
+        """A run stored as npz file yields the same tuples as the columns it was stored from."""
+        with tempfile.TemporaryDirectory() as directory:
+            outputfile = path.join(directory, "run.npz")
+            n = 1000
+            wt.np.savez(outputfile, test=wt.np.zeros(n, dtype=wt.np.int64), layer=wt.np.arange(n, dtype=wt.np.int64) % 2, status=(wt.np.arange(n, dtype=wt.np.int64) % 10 == 9).astype(wt.np.int64),
+                        lowerx=wt.np.arange(n, dtype=float), lowery=wt.np.zeros(n), upperx=wt.np.arange(n, dtype=float) + 1.0, uppery=wt.np.ones(n), latency=wt.np.full(n, 0.25),
+                        tests=wt.np.array(["RandomBbox"]), layers=wt.np.array(["a", "b"]), statuses=wt.np.array(["200", "503"]))
+            rows = list(wt.LayerComparison.readRun(outputfile))
+        self.assertEqual(rows.__len__(), n)
+        self.assertEqual(rows[8], ("RandomBbox", "a", (8.0, 0.0, 9.0, 1.0), 0.25))
+        self.assertEqual(rows[9], ("RandomBbox", "b", (9.0, 0.0, 10.0, 1.0), None))
+
+
+if __name__ == '__main__':
+    unittest.main()
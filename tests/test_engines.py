@@ -0,0 +1,116 @@
+# End-to-end tests of the engines against the mock WMS server.
+import sys
+import unittest
+from os import path
+from time import perf_counter
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class EngineTest(unittest.TestCase):
+    """Runs seeded plans with the engine ENGINE against a MockWMSServer. The subclasses run the same tests with the other engines."""
+    ENGINE = "pool"
+    LATENCY = 0.1
+    IMAGE_SIZE = 2000
+    mock = None
+    server = None
+
+    @classmethod
+    def setUpClass(cls):
+        """Starts the mock server, which answers a quarter of the requests as busy."""
+        cls.mock = wt.MockWMSServer(latency=cls.LATENCY, imagesize=cls.IMAGE_SIZE, busyrate=0.25, seed=1)
+        cls.server = cls.mock.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stops the mock server."""
+        cls.mock.stop()
+
+    def runPlan(self, count, concurrency, retrypolicy=None, schedule=None):
+        """Runs count random boxes for the layers a and b with the given concurrency, RetryPolicy retrypolicy and ArrivalSchedule schedule. Returns the list of completed tests and the wall-clock time in seconds."""
+        plan = wt.WMSTestPlan(self.server, [wt.RandomBoundingBoxWMSTest], ["a", "b"], 256, 256, count, 3)
+        completed = []
+        start = perf_counter()
+        wt.ENGINE_TYPES[self.ENGINE](concurrency, False, 0, retrypolicy).run(plan, completed.append, schedule)
+        return completed, perf_counter() - start
+
+    def testResults(self):
+        """Every test is completed once with its response, the latency of the mock server and the downloaded body, and the requests are sent simultaneously. Busy responses are sent at once."""
+        completed, seconds = self.runPlan(8, 4)
+        self.assertEqual(sorted((t.layers, t.boundingbox.__str__()) for t in completed), sorted((t.layers, t.boundingbox.__str__()) for t in wt.WMSTestPlan(self.server, [wt.RandomBoundingBoxWMSTest], ["a", "b"], 256, 256, 8, 3)))
+        self.assertEqual(set(t.result.response.status_code for t in completed), {200, 503})
+        for test in completed:
+            self.assertLessEqual(test.result.ttfb, test.result.totaltime)
+            if test.result.response.status_code == 200:
+                self.assertGreaterEqual(test.result.getLatency(), self.LATENCY - 0.01)
+                self.assertEqual(test.result.size, self.IMAGE_SIZE)
+        self.assertLess(seconds, 16 * self.LATENCY / 2)
+
+    def testRetries(self):
+        """Busy responses are repeated according to the retry policy until the request succeeds."""
+        completed, seconds = self.runPlan(8, 4, wt.RetryPolicy(20, 0.001, 0.005, seed=1))
+        self.assertEqual(completed.__len__(), 16)
+        self.assertEqual(set(t.result.response.status_code for t in completed), {200})
+        self.assertGreater(sum(t.result.retries for t in completed), 0)
+
+    def testTransfer(self):
+        """The whole body is downloaded and timed: the time to the first byte precedes the total time, which is the latency."""
+        mock = wt.MockWMSServer(imagesize=8000000)
+        server = mock.start()
+        try:
+            completed = []
+            tests = [wt.RandomBoundingBoxWMSTest(server, "a", 256, 256) for i in range(3)]
+            wt.ENGINE_TYPES[self.ENGINE](3).run(tests, completed.append)
+        finally:
+            mock.stop()
+        for test in completed:
+            result = test.result
+            self.assertEqual(result.size, 8000000)
+            self.assertLessEqual(result.response.elapsed.total_seconds(), result.ttfb + 0.001)
+            self.assertLess(result.ttfb, result.totaltime)
+            self.assertAlmostEqual(result.getLatency(), result.delay + result.totaltime)
+
+
+class ThreadEngineTest(EngineTest):
+    """Runs the tests of EngineTest with one thread per test."""
+    ENGINE = "thread"
+
+
+
+@unittest.skipIf(wt.aiohttp is None, "requires aiohttp")
+class AsyncEngineTest(EngineTest):
+    """Runs the tests of EngineTest on the asyncio event loop."""
+    ENGINE = "async"
+
+    def testConnectionWait(self):
+        """In an open-loop run, the time waiting for a free connection is part of the latency but not of the elapsed time."""
+        completed, seconds = self.runPlan(4, 1, wt.RetryPolicy(20, 0.001, 0.005, seed=1), wt.ArrivalSchedule(100.0))
+        latencies = sorted(t.result.getLatency() for t in completed)
+        self.assertGreater(latencies[-1], 4 * self.LATENCY)
+        for test in completed:
+            self.assertLess(test.result.response.elapsed.total_seconds(), 2 * self.LATENCY)
+
+
+class ProcessPoolTest(unittest.TestCase):
+    """Runs a seeded plan with a WMSProcessPool against a MockWMSServer."""
+
+    def testPartitions(self):
+        """The tests of all processes are passed to the consumer of the calling process and every process has its own connections."""
+        mock = wt.MockWMSServer(latency=0.1, imagesize=100)
+        server = mock.start()
+        try:
+            plan = wt.WMSTestPlan(server, [wt.RandomBoundingBoxWMSTest, wt.ZoomingBoxWMSTest], ["a", "b"], 256, 256, 6, 3)
+            completed = []
+            start = perf_counter()
+            wt.WMSProcessPool(3, wt.WMSWorkerPool(2)).run(plan, completed.append)
+            seconds = perf_counter() - start
+        finally:
+            mock.stop()
+        self.assertEqual(sorted((t.id, t.layers, t.boundingbox.__str__()) for t in completed), sorted((t.id, t.layers, t.boundingbox.__str__()) for i in range(3) for t in plan.partition(i, 3)))
+        self.assertEqual(set(t.result.response.status_code for t in completed), {200})
+        self.assertLess(seconds, 24 * 0.1 / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# Unit tests of the spatial latency heatmap.
+import json
+import sys
+import tempfile
+import unittest
+from datetime import timedelta
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+def createTest(layer, box, status, latency, size=100):
+    """Returns a completed test of the layer and the Box box as map of 256 x 256 pixels with a response of the given status code, latency in seconds and size in bytes."""
+    test = wt.RandomBoundingBoxWMSTest(wt.WMSServer(), layer, 256, 256, box)
+    request = test.createRequest()
+    test.result = wt.WMSTestResult(request, wt.WMSTestResult.createResponse(request, status, "", {}, timedelta(seconds=latency)))
+    test.result.size = size
+    return test
+
+
+class LatencyHeatmapTest(unittest.TestCase):
+    """Tests the cells, the scale bands and the output of LatencyHeatmap."""
+
+    def testCell(self):
+        """A box is counted in the cell of its center and in the scale band of its resolution."""
+        heatmap = wt.LatencyHeatmap()
+        self.assertEqual(heatmap.getCell(wt.Box(-180.0, -90.0, -178.0, -89.0), 256, 256), (-7, 0, 0))
+        self.assertEqual(heatmap.getCell(wt.Box(0.0, 0.0, 256.0, 1.0), 256, 256), (0, 30, 9))
+        self.assertEqual(heatmap.getCell(wt.Box(170.0, 85.0, 180.0, 90.0), 256, 256)[1:], (35, 17))
+        self.assertEqual(heatmap.getCell(wt.Box(-10.0, 40.0, 10.0, 50.0), 0, 0)[0], None)
+
+    def testRows(self):
+        """Every non-empty cell yields a row with the mean latency and size of the successful responses and the number of errors."""
+        heatmap = wt.LatencyHeatmap(wt.Box(0.0, 0.0, 100.0, 100.0), 10, 10)
+        box = wt.Box(12.0, 22.0, 14.0, 24.0)
+        heatmap.addTest(createTest("a", box, 200, 0.1, 100))
+        heatmap.addTest(createTest("a", box, 200, 0.3, 300))
+        heatmap.addTest(createTest("a", box, 503, 0.0))
+        heatmap.addTest(createTest("b", wt.Box(50.0, 50.0, 90.0, 90.0), 200, 0.2))
+        rows = heatmap.getRows()
+        self.assertEqual([(r["layer"], r["band"], r["column"], r["row"], r["count"], r["errors"]) for r in rows], [("a", -7, 1, 2, 3, 1), ("b", -3, 7, 7, 1, 0)])
+        self.assertAlmostEqual(rows[0]["mean"], 0.2, delta=0.002)
+        self.assertEqual(rows[0]["bytes"], 200.0)
+        self.assertEqual((rows[0]["lowerx"], rows[0]["lowery"], rows[0]["upperx"], rows[0]["uppery"]), (10.0, 20.0, 20.0, 30.0))
+        self.assertEqual((rows[0]["minresolution"], rows[0]["maxresolution"]), (2.0 ** -7, 2.0 ** -6))
+
+    def testWrite(self):
+        """The cells are written as CSV or as GeoJSON polygons."""
+        heatmap = wt.LatencyHeatmap(wt.Box(0.0, 0.0, 100.0, 100.0), 10, 10)
+        heatmap.addTest(createTest("a", wt.Box(12.0, 22.0, 14.0, 24.0), 200, 0.1))
+        with tempfile.TemporaryDirectory() as directory:
+            heatmap.write(path.join(directory, "heatmap.csv"))
+            heatmap.write(path.join(directory, "heatmap.geojson"))
+            with open(path.join(directory, "heatmap.csv")) as f:
+                lines = f.read().splitlines()
+            with open(path.join(directory, "heatmap.geojson")) as f:
+                collection = json.load(f)
+        self.assertEqual(lines[0], ";".join(wt.LatencyHeatmap.COLUMNS))
+        self.assertEqual(lines.__len__(), 2)
+        self.assertEqual(collection["type"], "FeatureCollection")
+        feature = collection["features"][0]
+        self.assertEqual(feature["geometry"]["coordinates"], [[[10.0, 20.0], [20.0, 20.0], [20.0, 30.0], [10.0, 30.0], [10.0, 20.0]]])
+        self.assertEqual((feature["properties"]["layer"], feature["properties"]["count"]), ("a", 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+# Unit tests of the File test class and the access log replay.
+import sys
+import unittest
+from os import path
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class FileWMSTestTest(unittest.TestCase):
+    """Tests the parsing of the lines of input files."""
+
+    def testParseLine(self):
+        """A line is a box in either notation or a query string, possibly as part of a URL."""
+        self.assertEqual(wt.FileWMSTest.parseLine("-10,40,10,50").__str__(), "-10.0,40.0,10.0,50.0")
+        self.assertEqual(wt.FileWMSTest.parseLine("[[-10,40],[10,50]]").__str__(), "-10.0,40.0,10.0,50.0")
+        self.assertEqual(wt.FileWMSTest.parseLine("http://host/wms?REQUEST=GetMap&BBOX=0,0,1,1"), "REQUEST=GetMap&BBOX=0,0,1,1")
+
+    def testLayersOfQuery(self):
+        """The layers of a query string are replaced by the layers of the test and added if the query has none."""
+        for query in ["SERVICE=WMS&REQUEST=GetMap&LAYERS=old&BBOX=0,0,1,1", "SERVICE=WMS&REQUEST=GetMap&BBOX=0,0,1,1"]:
+            test = wt.FileWMSTest(wt.WMSServer(), "new", 256, 256, query)
+            params = parse_qsl(urlsplit(test.createRequest().url).query)
+            self.assertEqual([v for k, v in params if k.lower() == "layers"], ["new"])
+            self.assertEqual(test.boundingbox.__str__(), "0.0,0.0,1.0,1.0")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+# Unit tests of the live rolling metrics.
+import sys
+import unittest
+from datetime import timedelta
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+def createTest(layer, status, latency, retries=0):
+    """Returns a completed test of the layer with a response of the given status code and latency in seconds."""
+    test = wt.RandomBoundingBoxWMSTest(wt.WMSServer(), layer, 256, 256, wt.Box(0.0, 0.0, 1.0, 1.0))
+    request = test.createRequest()
+    test.result = wt.WMSTestResult(request, wt.WMSTestResult.createResponse(request, status, "", {}, timedelta(seconds=latency)))
+    test.result.retries = retries
+    return test
+
+
+class RollingMetricsTest(unittest.TestCase):
+    """Tests the windows, the Prometheus text and the endpoint of RollingMetrics."""
+
+    def createMetrics(self):
+        """Returns metrics of 5 tests of the layer a in the second 1000 and 10 tests, 2 of them busy, in the second 1005."""
+        metrics = wt.RollingMetrics()
+        for i in range(5):
+            metrics.addTest(createTest("a", 200, 0.1), 1000.5)
+        for i in range(10):
+            metrics.addTest(createTest("a", 503 if i < 2 else 200, 0.2, 1 if i < 2 else 0), 1005.5)
+        return metrics
+
+    def testWindows(self):
+        """A window contains the tests of its last full seconds and the throughput refers to the seconds since the first test."""
+        metrics = self.createMetrics()
+        self.assertEqual(metrics.getWindow("a", 1, 1010)[:2], (0, 0))
+        count, errors, histogram = metrics.getWindow("a", 10, 1010)
+        self.assertEqual((count, errors, histogram.count), (15, 2, 15))
+        self.assertAlmostEqual(histogram.getPercentile(50), 0.2, delta=0.002)
+        self.assertEqual(metrics.getWindow("a", 5, 1006)[:2], (10, 2))
+        self.assertEqual((metrics.getSpan(10, 1010), metrics.getSpan(60, 1010), metrics.getSpan(60, 1000)), (10, 10, 1))
+        self.assertEqual(metrics.getWindow("b", 60, 1010)[0], 0)
+
+    def testExpiry(self):
+        """The bucket of a second is replaced by the bucket of the same second of the next minute."""
+        metrics = self.createMetrics()
+        metrics.addTest(createTest("a", 200, 0.3), 1060.5)
+        self.assertEqual(metrics.getWindow("a", 60, 1061)[0], 11)
+
+    def testPrometheusText(self):
+        """The Prometheus text contains the counters and the gauges of every layer and window."""
+        metrics = self.createMetrics()
+        metrics.addTest(createTest('x"y', 200, 0.1), 1009.5)
+        lines = metrics.getPrometheusText(1010).splitlines()
+        self.assertIn('wmstester_requests_total{layer="a",status="200"} 13', lines)
+        self.assertIn('wmstester_requests_total{layer="a",status="503"} 2', lines)
+        self.assertIn('wmstester_retries_total{layer="a"} 2', lines)
+        self.assertIn('wmstester_throughput{layer="a",window="10s"} 1.5', lines)
+        self.assertIn('wmstester_errors{layer="a",window="60s"} 2', lines)
+        self.assertIn('wmstester_latency_seconds{layer="a",window="1s",quantile="0.95"} NaN', lines)
+        self.assertIn('wmstester_requests_total{layer="x\\"y",status="200"} 1', lines)
+        self.assertIn("last 10 sec - a: 1.5 requests/sec, p95 0.1997 sec, 2 errors | ", metrics.getLogLine(10, 1010))
+
+    def testServer(self):
+        """The endpoint serves the metrics at /metrics."""
+        metrics = self.createMetrics()
+        metrics.startServer(0)
+        try:
+            session = wt.Session()
+            url = "http://localhost:" + str(metrics.httpserver.server_address[1])
+            response = session.get(url + "/metrics")
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('wmstester_requests_total{layer="a",status="503"} 2', response.text)
+            self.assertEqual(session.get(url + "/other").status_code, 404)
+            session.close()
+        finally:
+            metrics.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# End-to-end tests of the mock WMS server and the self-benchmark.
+import sys
+import unittest
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class MockWMSServerTest(unittest.TestCase):
+    """Sends requests to a MockWMSServer with errors and rejections."""
+    mock = None
+    server = None
+    session = None
+
+    @classmethod
+    def setUpClass(cls):
+        """Starts the mock server answering a tenth of the requests with an error and a fifth as busy."""
+        cls.mock = wt.MockWMSServer(latency=0.02, imagesize=1234, errorrate=0.1, busyrate=0.2, seed=1)
+        cls.server = cls.mock.start()
+        cls.session = wt.Session()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stops the mock server."""
+        cls.session.close()
+        cls.mock.stop()
+
+    def get(self, query):
+        """Returns the response to the given query string."""
+        return self.session.get("http://localhost:" + str(self.server.port) + "/wms?" + query)
+
+    def testInvalidRequest(self):
+        """Requests other than complete GetMap requests are answered with a service exception."""
+        for query in ["REQUEST=GetCapabilities", "REQUEST=GetMap&LAYERS=a&WIDTH=256&HEIGHT=256"]:
+            response = self.get(query)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(b"ServiceException", response.content)
+
+    def testResponses(self):
+        """GetMap requests are answered with the image after the latency, rejected as busy at once or fail with an error in the given shares."""
+        statuses = {}
+        for i in range(200):
+            response = self.get("SERVICE=WMS&REQUEST=GetMap&LAYERS=a&WIDTH=256&HEIGHT=256&BBOX=0,0,1,1")
+            statuses.setdefault(response.status_code, []).append(response)
+        self.assertEqual(set(statuses), {200, 500, 503})
+        self.assertAlmostEqual(statuses[500].__len__() / 200.0, 0.1, delta=0.05)
+        self.assertAlmostEqual(statuses[503].__len__() / 200.0, 0.2, delta=0.07)
+        for response in statuses[200]:
+            self.assertEqual((response.headers["Content-Type"], response.content.__len__()), ("image/png", 1234))
+            self.assertGreaterEqual(response.elapsed.total_seconds(), 0.02)
+        for response in statuses[503]:
+            self.assertEqual(response.headers["Retry-After"], "1")
+            self.assertLess(response.elapsed.total_seconds(), 0.02)
+
+    def testInvalidRates(self):
+        """The error rate and the busy rate must not exceed 1 together."""
+        with self.assertRaises(Exception):
+            wt.MockWMSServer(errorrate=0.6, busyrate=0.5)
+
+
+class SelfBenchmarkTest(unittest.TestCase):
+    """Runs a small self-benchmark."""
+
+    def testRun(self):
+        """Every combination of test class, engine and output format yields a row of completed requests without errors."""
+        rows = wt.SelfBenchmark([wt.RandomBoundingBoxWMSTest, wt.FileWMSTest], ["pool"], 2, 20, seed=1).run()
+        self.assertEqual([(r["test"], r["output"]) for r in rows], [(t, f) for t in ["RandomBbox", "File"] for f in wt.SelfBenchmark.outputformats if f != "npz" or wt.np is not None])
+        for row in rows:
+            self.assertEqual((row["requests"], row["errors"]), (20, 0))
+            self.assertGreater(row["rate"], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
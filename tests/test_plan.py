@@ -0,0 +1,144 @@
+# Unit tests of the lazy test generation by WMSTestPlan.
+import pickle
+import sys
+import tempfile
+import unittest
+from os import path
+from random import Random
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class WMSTestPlanTest(unittest.TestCase):
+    """Tests the determinism of WMSTestPlan."""
+    LAYERS = ["a", "b"]
+    CLASSES = [wt.RandomBoundingBoxWMSTest, wt.WalkingBoundingBoxWMSTest, wt.ZoomingBoxWMSTest, wt.TiledBoundingBoxWMSTest]
+
+    def createPlan(self, seed=11, interleave=False):
+        """Returns a plan of all generating test classes for the layers a and b."""
+        return wt.WMSTestPlan(wt.WMSServer(), self.CLASSES, self.LAYERS, 256, 256, 20, seed, interleave=interleave)
+
+    @staticmethod
+    def getKeys(tests):
+        """Returns the list of (test id, layer, box) of the given tests."""
+        return [(t.id, t.layers, t.boundingbox.__str__()) for t in tests]
+
+    def testSeed(self):
+        """The same seed yields the same tests and every layer gets the same boxes."""
+        keys = self.getKeys(self.createPlan())
+        self.assertEqual(keys, self.getKeys(self.createPlan()))
+        self.assertNotEqual(keys, self.getKeys(self.createPlan(12)))
+        for testclass in self.CLASSES:
+            boxes = {layer: [k[2] for k in keys if k[0] == testclass.id and k[1] == layer] for layer in self.LAYERS}
+            self.assertEqual(boxes["a"], boxes["b"])
+
+    def testInterleave(self):
+        """An interleaved plan contains the same tests as the plain plan."""
+        self.assertEqual(sorted(self.getKeys(self.createPlan())), sorted(self.getKeys(self.createPlan(interleave=True))))
+
+    def testPartition(self):
+        """The partitions together have the tests of the whole plan, each with its own reproducible boxes that every layer gets."""
+        plan = self.createPlan()
+        self.assertEqual(self.getKeys(plan.partition(0, 1)), self.getKeys(plan))
+        partitions = [self.getKeys(plan.partition(i, 3)) for i in range(3)]
+        self.assertEqual([p.__len__() for p in partitions], [plan.getPartition(i, 3).__len__() for i in range(3)])
+        self.assertEqual(sum(p.__len__() for p in partitions), plan.__len__())
+        self.assertEqual(partitions[1], self.getKeys(self.createPlan().partition(1, 3)))
+        for testclass in self.CLASSES:
+            self.assertEqual([sum(1 for k in p if k[0] == testclass.id and k[1] == "a") for p in partitions], [7, 7, 6])
+            boxes = [[k[2] for k in p if k[0] == testclass.id and k[1] == "a"] for p in partitions]
+            self.assertEqual(boxes[0], [k[2] for k in partitions[0] if k[0] == testclass.id and k[1] == "b"])
+            self.assertNotEqual(boxes[0], boxes[1])
+
+    def testPartitionInput(self):
+        """The partitions of a plan reading an input file divide its lines, also when partitioned again."""
+        with tempfile.TemporaryDirectory() as directory:
+            inputfile = path.join(directory, "boxes.txt")
+            with open(inputfile, "w") as f:
+                f.write("".join(str(i) + ",0," + str(i + 1) + ",1\n" + ("# comment\n" if i % 4 == 0 else "") for i in range(10)))
+            plan = wt.WMSTestPlan(wt.WMSServer(), [wt.FileWMSTest], ["a"], 256, 256, None, 11, inputfile=inputfile)
+            partitions = [plan.getPartition(1, 2).getPartition(i, 2) for i in range(2)] + [plan.getPartition(0, 2)]
+            self.assertEqual([self.getKeys(p) for p in partitions[:2]], [[("File", "a", str(float(i)) + ",0.0," + str(float(i + 1)) + ",1.0") for i in range(j, 10, 4)] for j in [1, 3]])
+            self.assertEqual(sorted(sum((self.getKeys(p) for p in partitions), [])), sorted(self.getKeys(plan)))
+            self.assertEqual([p.__len__() for p in partitions], [3, 2, 5])
+
+    def testInterleaveQueries(self):
+        """An interleaved plan of the test class File sends every query string of the input file to all layers."""
+        with tempfile.TemporaryDirectory() as directory:
+            inputfile = path.join(directory, "queries.txt")
+            with open(inputfile, "w") as f:
+                f.write("SERVICE=WMS&REQUEST=GetMap&BBOX=0,0,1,1\n-10,40,10,50\nhttp://host/wms?REQUEST=GetMap&LAYERS=x&BBOX=2,2,3,3\n")
+            plan = wt.WMSTestPlan(wt.WMSServer(), [wt.FileWMSTest], self.LAYERS, 256, 256, None, 11, inputfile=inputfile, interleave=True)
+            keys = self.getKeys(plan)
+        self.assertEqual(sorted(keys), sorted((wt.FileWMSTest.id, layer, box) for layer in self.LAYERS for box in ["0.0,0.0,1.0,1.0", "-10.0,40.0,10.0,50.0", "2.0,2.0,3.0,3.0"]))
+
+    def testFailingGeneration(self):
+        """An exception raised while generating the tests fails the run of every engine after the tests generated so far are completed."""
+        def tests():
+            """Generates two tests and fails."""
+            yield from self.createPlan().partition(0, 20)
+            raise ValueError("broken input")
+        for engine in wt.ENGINES:
+            if engine == "async" and wt.aiohttp is None:
+                continue
+            completed = []
+            with self.assertRaises(ValueError, msg=engine):
+                wt.ENGINE_TYPES[engine](3, True).run(tests(), completed.append)
+            if engine != "async":
+                self.assertEqual(completed.__len__(), 8, engine)
+
+    def testEngines(self):
+        """All engines execute the same tests of a seeded plan in a dry run."""
+        expected = sorted(self.getKeys(self.createPlan()))
+        for engine in wt.ENGINES:
+            if engine == "async" and wt.aiohttp is None:
+                continue
+            completed = []
+            wt.ENGINE_TYPES[engine](3, True).run(self.createPlan(), completed.append)
+            self.assertEqual(sorted(self.getKeys(completed)), expected, engine)
+
+    def testSettings(self):
+        """The settings of a plan configure its tests without changing the test classes and are kept when the plan is sent to other processes."""
+        settings = {"setTileMatrixSet": (0.0, 0.0, 90.0, 45.0, 2, 3), "setZipfExponent": (0.0,), "setMinwidth": (2.0,)}
+        plan = wt.WMSTestPlan(wt.WMSServer(), [wt.TiledBoundingBoxWMSTest, wt.RandomBoundingBoxWMSTest], ["a"], 256, 256, 50, 11, settings=settings)
+        tests = list(plan)
+        for test in tests[:50]:
+            self.assertIn(round(test.boundingbox.getWidth(), 6), [22.5, 11.25])
+            self.assertEqual((test.boundingbox.lowerx % 11.25, test.boundingbox.lowery % 5.625), (0.0, 0.0))
+            self.assertIn("tilesorigin=0.0%2C0.0", test.createRequest().url)
+        for test in tests[50:]:
+            self.assertGreaterEqual(test.boundingbox.getWidth(), 2.0)
+        self.assertEqual((wt.TiledBoundingBoxWMSTest.tilewidth, wt.TiledBoundingBoxWMSTest.zipfexponent, wt.RandomBoundingBoxWMSTest.minwidth), (180.0, 1.0, 1.0))
+        self.assertEqual(self.getKeys(pickle.loads(pickle.dumps(plan)).partition(1, 2)), self.getKeys(plan.partition(1, 2)))
+        completed = []
+        wt.WMSProcessPool(2, wt.WMSWorkerPool(2, True)).run(plan, completed.append)
+        self.assertEqual(sorted(self.getKeys(completed)), sorted(self.getKeys(plan.partition(0, 2)) + self.getKeys(plan.partition(1, 2))))
+        with self.assertRaises(Exception):
+            wt.WMSTestPlan(wt.WMSServer(), [wt.TiledBoundingBoxWMSTest], ["a"], 256, 256, settings={"setZipfExponent": (-1.0,)})
+
+
+class ZoomingChainTest(unittest.TestCase):
+    """Tests the step-by-step generation of zooming chains."""
+
+    def testChainsNeverStall(self):
+        """Every step of a zooming chain yields a new box inside the extent."""
+        extent = wt.Box(-180.0, -90.0, 180.0, 90.0)
+        for seed in range(100):
+            test = wt.ZoomingBoxWMSTest(wt.WMSServer(), "layer", 256, 256, rng=Random(seed))
+            boxes = [b.__str__() for b in test.generateBoundingBoxes(50)]
+            self.assertEqual(set(boxes).__len__(), 50)
+            self.assertTrue(extent.contains(test.boundingbox))
+
+    def testFractionalSizes(self):
+        """Fractional minimum sizes and step widths are rounded to integer bounds of the random numbers."""
+        for testclass in [wt.RandomBoundingBoxWMSTest, wt.WalkingBoundingBoxWMSTest, wt.ZoomingBoxWMSTest]:
+            test = testclass(wt.WMSServer(), "layer", 256, 256, rng=Random(1)).setMinwidth(0.5).setMinheight(2.5)
+            test.minstepwidth, test.maxstepwidth, test.minboxwidth = 0.5, 3.5, 2.5
+            for box in test.generateRandomBoundingBox().generateBoundingBoxes(200):
+                self.assertGreaterEqual(box.getWidth(), 0.5)
+                self.assertGreaterEqual(box.getHeight(), 2.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
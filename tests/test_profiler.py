@@ -0,0 +1,67 @@
+# Unit tests of the phase profiling.
+import pstats
+import sys
+import tempfile
+import unittest
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class PhaseProfilerTest(unittest.TestCase):
+    """Tests the measurement of the phases by PhaseProfiler."""
+
+    def testPhases(self):
+        """Every call of end counts one measurement of the phase and the rows follow the order of PHASES."""
+        profiler = wt.PhaseProfiler()
+        for phase in ["send", "custom", "generate", "send"]:
+            profiler.end(phase, profiler.begin())
+        rows = profiler.getRows()
+        self.assertEqual([(r["phase"], r["count"]) for r in rows], [("generate", 1), ("send", 2), ("custom", 1)])
+        for row in rows:
+            self.assertGreaterEqual(row["wall"], 0.0)
+            self.assertAlmostEqual(row["wallpercall"], row["wall"] / row["count"])
+        profiler.end("output", profiler.begin(), False)
+        self.assertEqual(profiler.phases["output"][2], 0.0)
+
+    def testTimeIterable(self):
+        """timeIterable generates the items of the iterable and measures getting each of them."""
+        profiler = wt.PhaseProfiler()
+        self.assertEqual(list(profiler.timeIterable(range(5), "generate")), list(range(5)))
+        self.assertEqual(profiler.getRows()[0]["count"], 5)
+
+    def testCProfile(self):
+        """In the mode cprofile, the profiles of the threads are collected and written to the profile file."""
+        self.assertIsNone(wt.PhaseProfiler().startThread())
+        profiler = wt.PhaseProfiler("cprofile")
+        profile = profiler.startThread()
+        sorted(range(1000), key=lambda i: -i)
+        profiler.stopThread(profile)
+        self.assertEqual(profiler.profiles, [profile])
+        with tempfile.TemporaryDirectory() as directory:
+            profilefile = path.join(directory, "run.prof")
+            profiler.outputReport(profilefile)
+            self.assertTrue(any("sorted" in f[2] for f in pstats.Stats(profilefile).stats))
+
+    def testRun(self):
+        """A profiled run against the mock server measures the phases of every test."""
+        mock = wt.MockWMSServer(latency=0.01, imagesize=100)
+        server = mock.start()
+        profiler, wt.PROFILER = wt.PROFILER, wt.PhaseProfiler()
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                sink = wt.TextResultSink(path.join(directory, "results.txt"), lambda test: test.layers)
+                plan = wt.WMSTestPlan(server, [wt.RandomBoundingBoxWMSTest], ["a"], 256, 256, 20, 1)
+                wt.WMSWorkerPool(2).run(wt.PROFILER.timeIterable(plan, "generate"), sink.write)
+                sink.close()
+            counts = {r["phase"]: r["count"] for r in wt.PROFILER.getRows()}
+        finally:
+            profiler, wt.PROFILER = wt.PROFILER, profiler
+            mock.stop()
+        self.assertEqual([counts[phase] for phase in ["generate", "createRequest", "send"]], [20, 20, 20])
+        self.assertGreaterEqual(counts["write"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# Unit tests of the adaptive retries.
+import sys
+import unittest
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class RetryPolicyTest(unittest.TestCase):
+    """Tests the backoff and the adaptive level of RetryPolicy."""
+
+    def testNoRetry(self):
+        """Successful responses and errors of other kinds are not repeated, and the number of retries is limited."""
+        policy = wt.RetryPolicy(2, seed=1)
+        self.assertIsNone(policy.getWait(0, 200))
+        self.assertIsNone(policy.getWait(0, 500))
+        self.assertIsNone(policy.getWait(0, error=ValueError()))
+        self.assertIsNone(policy.getWait(2, 503))
+
+    def testStaleConnection(self):
+        """A keep-alive connection closed by the server is retried at once, a refused connection after a backoff."""
+        policy = wt.RetryPolicy(2, seed=1)
+        self.assertEqual(policy.getWait(0, error=wt.RequestsConnectionError(wt.ProtocolError("Connection aborted."))), 0.0)
+        self.assertEqual(policy.level, 0)
+        self.assertEqual(wt.RetryPolicy.classify(wt.RequestsConnectionError("Connection refused")), "overload")
+
+    def testBackoff(self):
+        """The full-jitter backoff is bounded by the exponential delay and by maxdelay."""
+        policy = wt.RetryPolicy(10, 0.05, 1.0, seed=1)
+        for attempt in range(10):
+            policy.level = 0
+            wait = policy.getWait(attempt, 503)
+            self.assertGreaterEqual(wait, 0.0)
+            self.assertLessEqual(wait, min(1.0, 0.05 * 2 ** (attempt + 1)))
+
+    def testRetryAfter(self):
+        """Retry-After is honored in seconds and capped by maxdelay."""
+        policy = wt.RetryPolicy(3, 0.05, 10.0, seed=1)
+        self.assertEqual(policy.getWait(0, 503, {"Retry-After": "2"}), 2.0)
+        self.assertEqual(policy.getWait(0, 429, {"Retry-After": "60"}), 10.0)
+        self.assertIsNone(wt.RetryPolicy.getRetryAfter({"Retry-After": "soon"}))
+
+    def testAdaptiveLevel(self):
+        """Every overload signal raises the level up to MAX_LEVEL and every other response lowers it down to 0."""
+        policy = wt.RetryPolicy(3, seed=1)
+        for i in range(wt.RetryPolicy.MAX_LEVEL + 3):
+            policy.getWait(0, 503)
+        self.assertEqual(policy.level, wt.RetryPolicy.MAX_LEVEL)
+        policy.getWait(0, 200)
+        self.assertEqual(policy.level, wt.RetryPolicy.MAX_LEVEL - 1)
+        for i in range(wt.RetryPolicy.MAX_LEVEL + 3):
+            policy.getWait(0, 200)
+        self.assertEqual(policy.level, 0)
+
+    def testReproducible(self):
+        """The jitter is reproducible for a given seed."""
+        waits = [[wt.RetryPolicy(5, seed=7).getWait(a, 503) for a in range(5)] for i in range(2)]
+        self.assertEqual(waits[0], waits[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# Unit tests of the arrival schedules of open-loop runs.
+import sys
+import unittest
+from os import path
+from time import perf_counter
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class ArrivalScheduleTest(unittest.TestCase):
+    """Tests the scheduled times of ArrivalSchedule."""
+
+    def testClosedLoop(self):
+        """A closed-loop schedule passes all tests without scheduled times."""
+        schedule = wt.ArrivalSchedule()
+        self.assertFalse(schedule.isOpenLoop())
+        self.assertEqual([t for t, s in schedule.times(range(5))], list(range(5)))
+        self.assertEqual(set(s for t, s in schedule.times(range(5))), {None})
+
+    def testRate(self):
+        """The i-th test is scheduled i / rate seconds after the start and no test is scheduled after the duration."""
+        schedule = wt.ArrivalSchedule(50.0, 1.0)
+        times = [s - schedule.starttime for t, s in schedule.times(range(100))]
+        self.assertEqual(times.__len__(), 50)
+        for i, s in enumerate(times):
+            self.assertAlmostEqual(s, i / 50.0)
+
+    def testPartitions(self):
+        """The partitions share the start time and together follow the schedule of the whole run."""
+        schedule = wt.ArrivalSchedule(10.0, 3.0)
+        partitions = [schedule.partition(i, 3) for i in range(3)]
+        times = sorted(s - p.starttime for p in partitions for t, s in p.times(range(100)))
+        self.assertEqual(times.__len__(), 30)
+        for i, s in enumerate(times):
+            self.assertAlmostEqual(s, i / 10.0, places=6)
+        self.assertAlmostEqual(partitions[0].starttime, partitions[2].starttime, delta=0.01)
+
+    def testPace(self):
+        """The tests are passed at their scheduled times, which are stored with the tests."""
+        tests = [wt.RandomBoundingBoxWMSTest(wt.WMSServer(), "a", 256, 256) for i in range(5)]
+        schedule = wt.ArrivalSchedule(20.0)
+        for i, test in enumerate(schedule.pace(tests)):
+            self.assertGreaterEqual(perf_counter(), test.scheduledtime)
+            self.assertLess(perf_counter() - test.scheduledtime, 0.02)
+            self.assertAlmostEqual(test.scheduledtime - schedule.starttime, i / 20.0)
+
+    def testCoordinatedOmission(self):
+        """Tests waiting for a busy worker in an open-loop run are measured from their scheduled times."""
+        mock = wt.MockWMSServer(latency=0.1, imagesize=100)
+        server = mock.start()
+        try:
+            plan = wt.WMSTestPlan(server, [wt.RandomBoundingBoxWMSTest], ["a"], 256, 256, 10, 3)
+            completed = []
+            wt.WMSWorkerPool(1).run(plan, completed.append, wt.ArrivalSchedule(20.0))
+        finally:
+            mock.stop()
+        latencies = [t.result.getLatency() for t in completed]
+        self.assertGreater(latencies[-1], 10 * 0.1 - 9 / 20.0 - 0.05)
+        self.assertGreater(completed[-1].result.delay, 0.4)
+        self.assertLess(max(t.result.response.elapsed.total_seconds() for t in completed), 0.2)
+
+
+class ReplayScheduleTest(unittest.TestCase):
+    """Tests the scaled offsets of ReplaySchedule."""
+
+    def testSpeed(self):
+        """Every replayed request is scheduled at its offset in the log divided by the speed."""
+        tests = [wt.ReplayWMSTest(wt.WMSServer(), "REQUEST=GetMap&LAYERS=a&BBOX=0,0,1,1", offset) for offset in [0.0, 0.5, 2.0, 3.0]]
+        schedule = wt.ReplaySchedule(2.0, 1.2)
+        self.assertTrue(schedule.isOpenLoop())
+        times = [s - schedule.starttime for t, s in schedule.times(tests)]
+        self.assertEqual(times, [0.0, 0.25, 1.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
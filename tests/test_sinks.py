@@ -0,0 +1,86 @@
+# End-to-end tests of the result sinks against the mock WMS server.
+import sqlite3
+import sys
+import tempfile
+import unittest
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class ResultSinkTest(unittest.TestCase):
+    """Runs a seeded plan against a MockWMSServer and reads the stored results back."""
+    COUNT = 30
+    mock = None
+    server = None
+
+    @classmethod
+    def setUpClass(cls):
+        """Starts the mock server, which answers every tenth request as busy."""
+        cls.mock = wt.MockWMSServer(latency=0.01, imagesize=500, busyrate=0.1, seed=1)
+        cls.server = cls.mock.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stops the mock server."""
+        cls.mock.stop()
+
+    def runPlan(self, sink):
+        """Runs COUNT random boxes for the layers a and b with the pool engine, writes them to the sink and returns the list of (test id, layer, box, status) of the completed tests."""
+        plan = wt.WMSTestPlan(self.server, [wt.RandomBoundingBoxWMSTest], ["a", "b"], 256, 256, self.COUNT, 3)
+        completed = []
+        def consume(test):
+            """Remembers and writes the completed test."""
+            completed.append((test.id, test.layers, (test.boundingbox.lowerx, test.boundingbox.lowery, test.boundingbox.upperx, test.boundingbox.uppery), test.result.response.status_code))
+            test.result.release()
+            sink.write(test)
+        wt.WMSWorkerPool(4).run(plan, consume)
+        sink.close()
+        self.assertEqual(completed.__len__(), 2 * self.COUNT)
+        self.assertIn(503, [c[3] for c in completed])
+        return completed
+
+    def assertRun(self, outputfile, completed):
+        """Asserts that readRun yields the completed tests with a latency exactly for the successful requests."""
+        rows = list(wt.LayerComparison.readRun(outputfile))
+        self.assertEqual(sorted(r[:3] for r in rows), sorted(c[:3] for c in completed))
+        self.assertEqual(sorted(r[3] is not None for r in rows), sorted(c[3] == 200 for c in completed))
+        for row in rows:
+            if row[3] is not None:
+                self.assertGreater(row[3], 0.005)
+
+    def testCSV(self):
+        """The CSV sink writes one line per test."""
+        with tempfile.TemporaryDirectory() as directory:
+            outputfile = path.join(directory, "results.csv")
+            iot = wt.IOTools()
+            completed = self.runPlan(wt.TextResultSink(outputfile, lambda test: iot.formatTest(test, "csv")))
+            self.assertRun(outputfile, completed)
+
+    def testSQLite(self):
+        """The SQLite sink inserts one row per test."""
+        with tempfile.TemporaryDirectory() as directory:
+            outputfile = path.join(directory, "results.sqlite")
+            completed = self.runPlan(wt.SQLiteResultSink(outputfile))
+            connection = sqlite3.connect(outputfile)
+            self.assertEqual(connection.execute("SELECT COUNT(*), SUM(bytes) FROM results WHERE status = 200").fetchone(), (sum(1 for c in completed if c[3] == 200), 500 * sum(1 for c in completed if c[3] == 200)))
+            connection.close()
+            self.assertRun(outputfile, completed)
+
+    @unittest.skipIf(wt.np is None, "requires numpy")
+    def testNpz(self):
+        """The npz sink stores 64 bit indices into the names of the categories."""
+        with tempfile.TemporaryDirectory() as directory:
+            outputfile = path.join(directory, "results.npz")
+            completed = self.runPlan(wt.NpzResultSink(outputfile))
+            with wt.np.load(outputfile) as run:
+                for c, names in wt.NpzResultSink.CATEGORY_COLUMNS.items():
+                    self.assertEqual(run[c].dtype, wt.np.int64)
+                    self.assertEqual(run[c].max() + 1, run[names].__len__())
+                self.assertEqual(sorted(run["layers"].tolist()), ["a", "b"])
+            self.assertRun(outputfile, completed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+# Unit tests of the bounded memory and the warm-up of long runs.
+import sys
+import tempfile
+import unittest
+from itertools import islice
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class RecycleTest(unittest.TestCase):
+    """Tests the re-use of completed tests by WMSTestPlan."""
+
+    def createPlan(self, count=20):
+        """Returns a plan of random and walking boxes for the layers a and b."""
+        return wt.WMSTestPlan(wt.WMSServer(), [wt.RandomBoundingBoxWMSTest, wt.WalkingBoundingBoxWMSTest], ["a", "b"], 256, 256, count, 11)
+
+    def testRecycle(self):
+        """A recycled test is re-used for a later test of its class with the layer and the box of that test and without result."""
+        plan = self.createPlan()
+        keys = [(t.id, t.layers, t.boundingbox.__str__()) for t in plan]
+        tests = iter(plan)
+        first = next(tests)
+        first.result = wt.WMSTestResult(first.createRequest())
+        plan.recycle(first)
+        second = next(tests)
+        self.assertIs(second, first)
+        self.assertIsNone(second.result)
+        self.assertEqual([(t.id, t.layers, t.boundingbox.__str__()) for t in [second] + list(tests)], keys[1:])
+
+    def testLimit(self):
+        """At most RECYCLE_LIMIT tests per test class are kept and FileWMSTest is never recycled."""
+        plan = self.createPlan(wt.WMSTestPlan.RECYCLE_LIMIT)
+        for test in list(plan):
+            plan.recycle(test)
+        self.assertEqual(plan.free[wt.RandomBoundingBoxWMSTest].__len__(), plan.RECYCLE_LIMIT)
+        plan.recycle(wt.FileWMSTest(wt.WMSServer(), "a", 256, 256, wt.Box()))
+        self.assertNotIn(wt.FileWMSTest, plan.free)
+
+    def testSinkRecycler(self):
+        """A result sink hands the tests back after they have been written, so that an unlimited plan keeps a bounded number of tests."""
+        plan = wt.WMSTestPlan(wt.WMSServer(), [wt.RandomBoundingBoxWMSTest], ["a", "b"], 256, 256, sys.maxsize, 11, interleave=True)
+        with tempfile.TemporaryDirectory() as directory:
+            outputfile = path.join(directory, "results.csv")
+            iot = wt.IOTools()
+            sink = wt.TextResultSink(outputfile, lambda test: iot.formatTest(test, "csv"))
+            sink.recycler = plan.recycle
+            created = set()
+            def consume(test):
+                """Remembers and writes the completed test."""
+                created.add(id(test))
+                sink.write(test)
+            wt.WMSWorkerPool(2, True).run(islice(plan, 5000), consume)
+            sink.close()
+            with open(outputfile) as f:
+                self.assertEqual(sum(1 for line in f), 5000)
+        self.assertLess(created.__len__(), 5000)
+
+
+class ReleaseTest(unittest.TestCase):
+    """Tests the detached responses of released results."""
+
+    def testRelease(self):
+        """A released result keeps the metrics of its response without the connection."""
+        mock = wt.MockWMSServer(imagesize=100)
+        server = mock.start()
+        try:
+            test = wt.RandomBoundingBoxWMSTest(server, "a", 256, 256)
+            test.execute(False, 0, wt.Session())
+        finally:
+            mock.stop()
+        status, elapsed, latency = test.result.response.status_code, test.result.response.elapsed, test.result.getLatency()
+        test.result.release()
+        self.assertIsNone(test.result.response.raw)
+        self.assertEqual((test.result.response.status_code, test.result.response.elapsed, test.result.getLatency()), (status, elapsed, latency))
+        self.assertEqual(test.result.response.headers["Content-Type"], "image/png")
+
+
+class WarmupTest(unittest.TestCase):
+    """Tests the exclusion of the warm-up."""
+
+    def testViews(self):
+        """Views due within the warm-up are not recorded."""
+        engine = wt.TiledViewEngine(2, 2, 4, 1, True, warmup=0.25)
+        completed = []
+        plan = wt.WMSTestPlan(wt.WMSServer(), [wt.RandomBoundingBoxWMSTest], ["a"], 256, 256, 10, 11)
+        engine.run(plan, completed.append, wt.ArrivalSchedule(20.0))
+        self.assertEqual(completed.__len__(), 40)
+        self.assertIn(engine.getRows()[0]["views"], [4, 5, 6])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# Unit tests of the streaming latency statistics.
+import sys
+import unittest
+from os import path
+from random import Random
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    """Tests the bucket precision, percentiles and merging of LatencyHistogram."""
+
+    def testBucketPrecision(self):
+        """Every bucket value lies within the relative precision 2^-precisionbits of the recorded value."""
+        histogram = wt.LatencyHistogram()
+        for microseconds in list(range(1, 5000)) + [int(1.37 ** k) for k in range(20, 60)]:
+            value = histogram.bucketValue(histogram.bucket(microseconds)) * 1e6
+            self.assertLessEqual(abs(value - microseconds), microseconds * 2.0 ** -histogram.precisionbits + 0.5)
+
+    def testPercentiles(self):
+        """Percentiles match the exact percentiles of the recorded values up to the bucket precision and stay within min and max."""
+        rng = Random(1)
+        values = [rng.lognormvariate(-4.0, 1.0) for i in range(10000)]
+        histogram = wt.LatencyHistogram()
+        for v in values:
+            histogram.record(v)
+        values.sort()
+        for p in [1, 50, 90, 95, 99, 100]:
+            exact = values[max(1, -(-p * values.__len__() // 100)) - 1]
+            self.assertAlmostEqual(histogram.getPercentile(p), exact, delta=exact * 2.0 ** -6 + 1e-6)
+        self.assertEqual(histogram.min, values[0])
+        self.assertEqual(histogram.max, values[-1])
+        self.assertAlmostEqual(histogram.getMean(), sum(values) / values.__len__())
+
+    def testEmpty(self):
+        """An empty histogram has neither mean nor percentiles."""
+        histogram = wt.LatencyHistogram()
+        self.assertIsNone(histogram.getMean())
+        self.assertIsNone(histogram.getPercentile(50))
+
+    def testMerge(self):
+        """Merging two histograms equals recording all values in one."""
+        rng = Random(2)
+        values = [rng.random() for i in range(1000)]
+        whole, first, second = wt.LatencyHistogram(), wt.LatencyHistogram(), wt.LatencyHistogram()
+        for i, v in enumerate(values):
+            whole.record(v)
+            (first if i % 2 else second).record(v)
+        first.merge(second)
+        self.assertEqual(first.buckets, whole.buckets)
+        self.assertEqual((first.count, first.min, first.max), (whole.count, whole.min, whole.max))
+
+
+class StatisticsCollectorTest(unittest.TestCase):
+    """Tests the summary rows of StatisticsCollector."""
+
+    def testRows(self):
+        """Every test class and layer gets a row of all results followed by one row per status."""
+        statistics = wt.StatisticsCollector()
+        for i in range(8):
+            statistics.add("RandomBbox", "a", 200 if i < 6 else 503, 0.1 * (i + 1), 0.05, 0.1, 1000, "hit" if i % 2 else "miss", 1 if i >= 6 else 0, 100.0, 101.0)
+        rows = statistics.getRows()
+        self.assertEqual([(r["status"], r["count"]) for r in rows], [("all", 8), (200, 6), (503, 2)])
+        self.assertEqual(rows[0]["errorrate"], 0.25)
+        self.assertEqual(rows[0]["retries"], 2)
+        self.assertEqual(rows[0]["hitratio"], 0.5)
+        self.assertEqual(rows[0]["bytes"], 1000)
+        self.assertAlmostEqual(rows[1]["max"], 0.6, delta=0.01)
+
+    def testThroughputPerGroup(self):
+        """The throughput of a test class and layer refers to the span of its own requests, not to the whole run."""
+        statistics = wt.StatisticsCollector()
+        for i in range(100):
+            statistics.add("RandomBbox", "a", 200, 0.1, sent=1000.0 + i * 0.1, completed=1000.1 + i * 0.1)
+            statistics.add("RandomBbox", "b", 200, 0.1, sent=1010.0 + i * 0.02, completed=1010.1 + i * 0.02)
+        statistics.starttime, statistics.endtime = 1000.0, 1012.08
+        throughputs = {r["layer"]: r["throughput"] for r in statistics.getRows() if r["status"] == "all"}
+        self.assertAlmostEqual(throughputs["a"], 100 / 10.0)
+        self.assertAlmostEqual(throughputs["b"], 100 / 2.08)
+
+
+if __name__ == '__main__':
+    unittest.main()
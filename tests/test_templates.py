@@ -0,0 +1,44 @@
+# Unit tests of the pre-encoded GetMap requests.
+import sys
+import unittest
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class RequestTemplateTest(unittest.TestCase):
+    """Tests that RequestTemplate creates the same URLs as requests and is shared by the tests."""
+    SERVER = wt.WMSServer("http://localhost:8080/geoserver/wms")
+
+    def getURL(self, test, params=None):
+        """Returns the URL that requests prepares for the parameters of the test."""
+        parameters = list(test.basicparameters.items()) + list((params or {}).items()) + [("layers", test.layers), ("width", test.width), ("height", test.height), ("bbox", test.boundingbox.__str__())]
+        return wt.Request('GET', self.SERVER, params=parameters).prepare().url
+
+    def testURL(self):
+        """The URL of a request created from a template equals the URL prepared by requests, also for parameters with special characters."""
+        test = wt.RandomBoundingBoxWMSTest(self.SERVER, "topp:states,ne:roads & rivers", 256, 128).setSRS("EPSG:4326").setBasicParameter("cql_filter", "name='Ä/ö+ü%'")
+        test.setBoundingBox(wt.Box(-10.5, -2.25, 3.0, 4.125))
+        request = test.createRequest()
+        self.assertEqual(request.url, self.getURL(test))
+        self.assertEqual(request.method, "GET")
+        self.assertEqual(wt.RequestTemplate(self.SERVER, []).createRequest("1,2,3,4").url, wt.Request('GET', self.SERVER, params=[("bbox", "1,2,3,4")]).prepare().url)
+
+    def testShared(self):
+        """Tests with the same parameters share their template and tests with other parameters get another one."""
+        first, second = [wt.RandomBoundingBoxWMSTest(self.SERVER, "a", 256, 256) for i in range(2)]
+        self.assertIs(first.getTemplate(), second.getTemplate())
+        self.assertIs(first.getTemplate(), wt.RequestTemplate.get(self.SERVER, tuple(first.basicparameters.items()) + (("layers", "a"), ("width", 256), ("height", 256))))
+        self.assertIsNot(first.getTemplate(), second.setFormat("image/jpeg").getTemplate())
+        self.assertIsNot(first.getTemplate(), first.getTemplate({"tiled": "true"}))
+
+    def testTiled(self):
+        """Requests of tiled tests carry the parameters tiled and tilesorigin."""
+        test = wt.TiledBoundingBoxWMSTest(self.SERVER, "a", 256, 256).setTileMatrixSet(-180.0, -90.0, 90.0, 90.0, 0, 2)
+        test.generateRandomBoundingBox()
+        self.assertEqual(test.createRequest().url, self.getURL(test, {"tiled": "true", "tilesorigin": "-180.0,-90.0"}))
+
+
+if __name__ == '__main__':
+    unittest.main()
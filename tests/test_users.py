@@ -0,0 +1,87 @@
+# Unit tests of the simulation of virtual users.
+import sys
+import unittest
+from os import path
+from random import Random
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class VirtualUserSimulationTest(unittest.TestCase):
+    """Tests the walks of VirtualUser and the statistics of VirtualUserSimulation."""
+    EXTENT = wt.Box(-180.0, -90.0, 180.0, 90.0)
+
+    def createUser(self, seed=1, **parameters):
+        """Returns a user of a dry simulation of random boxes for the layer a, whose view is the box -10,-10,10,10."""
+        simulation = wt.VirtualUserSimulation(wt.WMSServer(), [wt.RandomBoundingBoxWMSTest], ["a"], 256, 256, dry=True, **parameters)
+        user = wt.VirtualUser(0, simulation, wt.RandomBoundingBoxWMSTest, wt.SimpleQueue(), Random(seed))
+        user.box = wt.Box(-10.0, -10.0, 10.0, 10.0)
+        return user
+
+    def testClamp(self):
+        """Boxes crossing the border are shifted into the extent and boxes larger than the extent are shrunk keeping their center."""
+        user = self.createUser()
+        self.assertEqual(user.clamp(wt.Box(170.0, 0.0, 190.0, 10.0)).__str__(), "160.0,0.0,180.0,10.0")
+        self.assertEqual(user.clamp(wt.Box(-300.0, -100.0, 100.0, 0.0)).__str__(), "-180.0,-90.0,180.0,10.0")
+        self.assertEqual(user.clamp(wt.Box(-400.0, -10.0, 400.0, 10.0)).__str__(), "-180.0,-10.0,180.0,10.0")
+
+    def testMoveView(self):
+        """Every action yields a view inside the extent, pans and jumps keep the size and zooms scale it by the zoom factor down to the minimum size."""
+        user = self.createUser()
+        for i in range(2000):
+            action = user.getNextAction(user.rng.choice(wt.VirtualUserSimulation.ACTIONS))
+            width, height = user.box.getWidth(), user.box.getHeight()
+            box = user.moveView(action)
+            self.assertTrue(self.EXTENT.contains(box), box)
+            if action == "zoomin":
+                self.assertAlmostEqual(box.getWidth(), width * max(0.5, 1.0 / width, 1.0 / height), delta=0.002)
+            elif action == "zoomout":
+                self.assertAlmostEqual(box.getWidth(), min(width * 2.0, 360.0), delta=0.002)
+            else:
+                self.assertAlmostEqual(box.getWidth(), width, delta=0.002)
+            user.box = box
+
+    def testTransitions(self):
+        """Replaced rows of the transitions determine the next action and invalid rows are rejected."""
+        user = self.createUser(transitions={"open": {"jump": 1.0}})
+        self.assertEqual(set(user.getNextAction("open") for i in range(20)), {"jump"})
+        with self.assertRaises(Exception):
+            self.createUser(transitions={"open": {"open": 1.0}})
+        with self.assertRaises(Exception):
+            wt.VirtualUserSimulation(wt.WMSServer(), [wt.FileWMSTest], ["a"], 256, 256)
+
+    def testThinkTime(self):
+        """The think times of all distributions have the given mean."""
+        for distribution in wt.VirtualUserSimulation.DISTRIBUTIONS:
+            simulation = wt.VirtualUserSimulation(wt.WMSServer(), [wt.RandomBoundingBoxWMSTest], ["a"], 256, 256, thinktime=2.0, distribution=distribution)
+            rng = Random(1)
+            self.assertAlmostEqual(sum(simulation.getThinkTime(rng) for i in range(20000)) / 20000, 2.0, delta=0.1, msg=distribution)
+
+    def testRun(self):
+        """Every user requests the view of every action for all layers and every action is recorded once."""
+        mock = wt.MockWMSServer(latency=0.01, imagesize=100)
+        server = mock.start()
+        try:
+            simulation = wt.VirtualUserSimulation(server, [wt.RandomBoundingBoxWMSTest, wt.ZoomingBoxWMSTest], ["a", "b"], 256, 256, users=3, count=5, thinktime=0.0, seed=1)
+            tests = []
+            simulation.run(tests.append)
+        finally:
+            mock.stop()
+        self.assertEqual(tests.__len__(), 3 * 5 * 2)
+        self.assertEqual(sorted(set(t.user for t in tests)), [0, 1, 2])
+        self.assertEqual(set(t.id for t in tests if t.user == 1), {wt.ZoomingBoxWMSTest.id})
+        self.assertEqual(set(t.result.response.status_code for t in tests), {200})
+        for user in range(3):
+            actions = [t.action for t in tests if t.user == user]
+            self.assertEqual(actions[:2], ["open", "open"])
+            self.assertEqual(actions[0::2], actions[1::2])
+        rows = simulation.getRows()
+        self.assertEqual((rows[0]["action"], rows[0]["count"], rows[0]["errorrate"]), ("all", 15, 0.0))
+        self.assertEqual(sum(r["count"] for r in rows[1:]), 15)
+        self.assertEqual(simulation.counts["open"], 3)
+        self.assertGreater(rows[0]["min"], 0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# End-to-end tests of the tiled map views against the mock WMS server.
+import sys
+import unittest
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import wms_tester as wt
+
+
+class TiledViewEngineTest(unittest.TestCase):
+    """Tests the splitting of views into tiles and the connections per view of TiledViewEngine."""
+    LATENCY = 0.2
+    mock = None
+    server = None
+
+    @classmethod
+    def setUpClass(cls):
+        """Starts the mock server answering every request after LATENCY seconds."""
+        cls.mock = wt.MockWMSServer(latency=cls.LATENCY, imagesize=100)
+        cls.server = cls.mock.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stops the mock server."""
+        cls.mock.stop()
+
+    def createPlan(self, count):
+        """Returns a plan of count random views of the layer a."""
+        return wt.WMSTestPlan(self.server, [wt.RandomBoundingBoxWMSTest], ["a"], 512, 256, count, 5)
+
+    def testSplitView(self):
+        """The tiles of a view cover the view row by row from the upper left tile and have the map size of a tile."""
+        engine = wt.TiledViewEngine(2, 4)
+        view = wt.RandomBoundingBoxWMSTest(wt.WMSServer(), "a", 512, 256, wt.Box(-10.0, 40.0, 10.0, 50.0))
+        tiles = engine.splitView(view, 7)
+        self.assertEqual([t.tile for t in tiles], [(r, c) for r in range(2) for c in range(4)])
+        self.assertEqual(set((t.view, t.width, t.height) for t in tiles), {(7, 128, 128)})
+        self.assertEqual((tiles[0].boundingbox.lowerx, tiles[0].boundingbox.uppery, tiles[-1].boundingbox.upperx, tiles[-1].boundingbox.lowery), (-10.0, 50.0, 10.0, 40.0))
+        self.assertAlmostEqual(sum(t.boundingbox.getWidth() * t.boundingbox.getHeight() for t in tiles), 200.0)
+
+    def assertViews(self, engine, count):
+        """Asserts that every view of the engine was completed over a single connection, i.e., after all of its tiles were sent one after the other."""
+        rows = engine.getRows()
+        self.assertEqual(rows[0]["views"], count)
+        self.assertEqual(rows[0]["errorrate"], 0.0)
+        self.assertGreater(rows[0]["min"], 4 * self.LATENCY - 0.05)
+        self.assertLess(rows[0]["max"], 4 * self.LATENCY + 0.5)
+
+    def testConnectionsPerView(self):
+        """Views in flight at the same time do not share their connections."""
+        engine = wt.TiledViewEngine(2, 2, 1, 3)
+        completed = []
+        engine.run(self.createPlan(3), completed.append)
+        self.assertEqual(completed.__len__(), 12)
+        self.assertViews(engine, 3)
+
+    def testConnectionsPerViewOpenLoop(self):
+        """Views of an open-loop run get connections of their own when they are sent."""
+        engine = wt.TiledViewEngine(2, 2, 1)
+        completed = []
+        engine.run(self.createPlan(3), completed.append, wt.ArrivalSchedule(20.0))
+        self.assertEqual(completed.__len__(), 12)
+        self.assertViews(engine, 3)
+
+    def testFailingGeneration(self):
+        """An exception raised while generating the views fails the run after the views sent so far are completed."""
+        def views():
+            """Generates two views and fails."""
+            yield from self.createPlan(2)
+            raise ValueError("broken input")
+        completed = []
+        with self.assertRaises(ValueError):
+            wt.TiledViewEngine(2, 2, 4, 2, True).run(views(), completed.append)
+        self.assertEqual(completed.__len__(), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
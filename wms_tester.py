@@ -3,17 +3,49 @@
 # By Ulrich Loup (2020-05-14)
 import sys
 import argparse
+import json
+import multiprocessing
+import sqlite3
+from array import array
+import re
+import gzip
+import tempfile
+import tracemalloc
+import cProfile
+import pstats
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlsplit, quote
+from itertools import islice
+from collections import deque
 from requests import Response, Session, Request, PreparedRequest
-from random import randint
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from urllib3.exceptions import ProtocolError
+from email.utils import parsedate_to_datetime
+import random
+from random import Random
+from math import gcd, lgamma, log, log2, exp, sqrt, erfc, floor, ceil, cos, sin, pi
 from abc import ABC, abstractmethod
 from os import path
-from copy import deepcopy
-from time import sleep, time
-from threading import active_count, Thread, Semaphore
+from copy import copy, deepcopy
+from time import sleep, time, perf_counter, process_time, thread_time
+from threading import Thread, Semaphore, Lock, Event
+from requests.structures import CaseInsensitiveDict
 try:
-   from queue import SimpleQueue
+   from queue import SimpleQueue, Queue, Empty
 except ImportError:
-   from Queue import SimpleQueue
+   from Queue import SimpleQueue, Queue, Empty
+import asyncio
+try:
+    import aiohttp
+    from yarl import URL
+except ImportError:
+    aiohttp = None
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 #
 # Class definitions
@@ -24,45 +56,77 @@ class IOTools:
     progresstotal = 0
     progresscount = 0
     outputfile = None
+    sink = None
     CSVseparator = ';'
 
     def setCSVSeparator(self, CSVseparator):
         """Set another separator for the CSV output than ";"."""
         self.CSVseparator = CSVseparator
 
+    @staticmethod
+    def checkOutputDirectory(outputfile):
+        """Raises an exception if the directory of the given output file does not exist."""
+        outputdir = path.dirname(outputfile)
+        if outputdir.strip() and not path.exists(outputdir):
+            raise Exception("The output directory " + outputdir + " does not exist.")
+
     def setOutputFile(self, outputfile):
         """Opens an output file at the given path if the directory exists. The file is then used in the output method as target and the console output is supressed."""
         if outputfile:
-            outputdir = path.dirname(outputfile)
-            if outputdir.strip() and not path.exists(path.dirname(outputfile)):
-                raise Exception("The output directory " + path.dirname(outputfile) + " does not exist.")
-            else:
-                self.outputfile = open(outputfile, "w+")
+            self.checkOutputDirectory(outputfile)
+            self.outputfile = open(outputfile, "w+", buffering=1 << 20)
+
+    def setResultSink(self, sink):
+        """Sets the ResultSink to which outputTest hands over the completed tests instead of writing them itself."""
+        self.sink = sink
 
     def outputLine(self, text):
-        """Output the given text in one line."""
+        """Output the given text in one line. Lines written to the output file are buffered until the file is closed."""
         if self.outputfile:
             self.outputfile.write(text + '\n')
-            self.outputfile.flush()
         else:
             print(text)
+
+    def formatTest(self, test, outputformat):
+        """Returns the line representing the given test in the given outputformat being one of OUTPUT_FORMATS."""
+        if outputformat == "csv":
+            return self.CSVseparator.join([test.id, test.layers, (test.result.getCSV() if test.result else test.boundingbox).__str__()])
+        return test.id + "(" + test.layers + " + " + test.boundingbox.__str__() + ")" + (": " + str(test.result.getLatency()) + " sec" if test.result and test.result.response is not None else "")
     
     def outputTest(self, test, outputformat):
-        """Output the given test with the given outputformat being one of OUTPUT_FORMATS."""
-        if outputformat == "csv":
-            self.outputCSVLine([test.id, test.layers, test.result.getCSV()])
-        else:
-            self.outputLine(test.id + "(" + test.layers + " + " + test.boundingbox.__str__() + ")" + (": " + str(test.result.response.elapsed.total_seconds()) + " sec" if test.result else ""))
-        test.result.close()
+        """Output the given test with the given outputformat being one of OUTPUT_FORMATS. If a ResultSink is set, the response is released and the test is handed over to it."""
+        if self.sink:
+            if test.result: test.result.release()
+            self.sink.write(test)
+            return
+        self.outputLine(self.formatTest(test, outputformat))
+        if test.result: test.result.close()
     
+    @staticmethod
+    def outputTable(title, columns, rows, textcolumns=3):
+        """Prints the title and the list of dictionaries rows as table with the given columns to the console. Floats are printed with 4 decimal places, None as "-". The first textcolumns columns are aligned left, all others right."""
+        table = [columns] + [[("%.4f" % row[c]) if isinstance(row[c], float) else ("-" if row[c] is None else str(row[c])) for c in columns] for row in rows]
+        widths = [max(len(line[i]) for line in table) for i in range(len(columns))]
+        print(title)
+        for line in table:
+            print("  ".join(line[i].rjust(widths[i]) if i >= textcolumns else line[i].ljust(widths[i]) for i in range(len(columns))))
+
+    @staticmethod
+    def writeRows(outputfile, rows, CSVseparator=';', header={}):
+        """Writes the list of dictionaries rows to the file at the given path. If the path ends with ".json", the rows are stored as JSON together with the entries of the dictionary header, otherwise as CSV with the given separator (default: ";")."""
+        with open(outputfile, "w") as f:
+            if outputfile.lower().endswith(".json"):
+                json.dump(dict(header, rows=rows), f, indent=1)
+            elif rows:
+                f.write(CSVseparator.join(rows[0]) + "\n")
+                for row in rows:
+                    f.write(CSVseparator.join("" if v is None else str(v) for v in row.values()) + "\n")
+
     def outputCSVLine(self, blocks):
         """Output the given list of text blocks in one CSV line."""
         if not isinstance(blocks, list):
             raise Exception("The text blocks must be provided as list: " + blocks)
-        csvoutput = ""
-        for b in blocks:
-            csvoutput += b.__str__() + self.CSVseparator
-        self.outputLine(csvoutput[:-(self.CSVseparator.__len__())])
+        self.outputLine(self.CSVseparator.join(b.__str__() for b in blocks))
         
     def initProgress(self, total):
         """Initializes the total number of steps for the progress bar."""
@@ -80,10 +144,157 @@ class IOTools:
         self.progresscount += increment
     
     def close(self):
-        """Closes all files and streams of this IOTools object."""
+        """Closes all files, streams and the result sink of this IOTools object."""
+        if self.sink: self.sink.close()
         if(self.outputfile): self.outputfile.close()
 
 
+class ResultSink(ABC):
+    """Writes completed tests in batches on a background thread, so that writing the results does not slow down the dispatching of tests. The rows of a test consist of the values of COLUMNS. Subclasses implement writeBatch and finish."""
+    BATCH_SIZE = 1000
+    COLUMNS = ["timestamp", "test", "layer", "lowerx", "lowery", "upperx", "uppery", "status", "elapsed", "latency", "ttfb", "totaltime", "bytes", "cache", "retries", "url"]
+    outputfile = None
+    pending = None
+    thread = None
+    recycler = None
+    """the callable receiving every test after it has been written, e.g., WMSTestPlan.recycle"""
+
+    def __init__(self, outputfile):
+        """Initializes the sink writing to the file at the path outputfile and starts its background thread."""
+        IOTools.checkOutputDirectory(outputfile)
+        self.outputfile = outputfile
+        self.pending = Queue(100 * self.BATCH_SIZE)
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, test):
+        """Hands over the completed test to the background thread. This blocks only if the background thread is far behind."""
+        self.pending.put(test)
+
+    def run(self):
+        """Takes the tests from the queue in batches of up to BATCH_SIZE tests and writes them until None is taken."""
+        done = False
+        while not done:
+            batch = [self.pending.get()]
+            try:
+                while batch.__len__() < self.BATCH_SIZE and batch[-1] is not None:
+                    batch.append(self.pending.get_nowait())
+            except Empty:
+                pass
+            if batch[-1] is None:
+                done = True
+                batch.pop()
+            try:
+                if PROFILER: start = PROFILER.begin()
+                if batch:
+                    self.writeBatch(batch)
+                if PROFILER: PROFILER.end("write", start)
+            except Exception as e:
+                print("Error while writing the results: {0}".format(e))
+            for test in batch:
+                if test.result: test.result.close()
+                if self.recycler: self.recycler(test)
+        self.finish()
+
+    def close(self):
+        """Writes all remaining tests and closes the file."""
+        self.pending.put(None)
+        self.thread.join()
+
+    @staticmethod
+    def getRow(test):
+        """Returns the values of COLUMNS for the given test as tuple. Values that are not available are None."""
+        box = test.boundingbox
+        result = test.result
+        if result is None or result.response is None:
+            return (result.timestamp if result else None, test.id, test.layers, box.lowerx, box.lowery, box.upperx, box.uppery, None if result else "error", None, None, None, None, None, None, None, result.request.url if result else None)
+        return (result.timestamp, test.id, test.layers, box.lowerx, box.lowery, box.upperx, box.uppery, result.response.status_code, result.response.elapsed.total_seconds(), result.getLatency(), result.ttfb, result.totaltime, result.size, result.getCacheStatus(), result.retries, result.request.url)
+
+    @abstractmethod
+    def writeBatch(self, tests):
+        """Writes the given list of tests."""
+
+    @abstractmethod
+    def finish(self):
+        """Closes the file after the last batch."""
+
+
+class TextResultSink(ResultSink):
+    """Writes one line per test to a text file using the callable formatter, e.g., the CSV format of IOTools.formatTest."""
+    formatter = None
+    file = None
+
+    def __init__(self, outputfile, formatter):
+        """Initializes the sink writing the lines created by the callable formatter from the tests to the file at the path outputfile."""
+        self.formatter = formatter
+        self.file = open(outputfile, "w", buffering=1 << 20)
+        super(TextResultSink, self).__init__(outputfile)
+
+    def writeBatch(self, tests):
+        """Writes the lines of the given list of tests at once."""
+        self.file.write("".join(self.formatter(test) + "\n" for test in tests))
+
+    def finish(self):
+        """Closes the file."""
+        self.file.close()
+
+
+class SQLiteResultSink(ResultSink):
+    """Inserts the rows of the tests into the table results of an SQLite database in bulk, one transaction per batch."""
+    connection = None
+
+    def __init__(self, outputfile):
+        """Initializes the sink writing to the SQLite database at the path outputfile, which is created if necessary."""
+        IOTools.checkOutputDirectory(outputfile)
+        self.connection = sqlite3.connect(outputfile, check_same_thread=False)
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS results (timestamp REAL, test TEXT, layer TEXT, lowerx REAL, lowery REAL, upperx REAL, uppery REAL, status, elapsed REAL, latency REAL, ttfb REAL, totaltime REAL, bytes INTEGER, cache TEXT, retries INTEGER, url TEXT)")
+        self.connection.commit()
+        super(SQLiteResultSink, self).__init__(outputfile)
+
+    def writeBatch(self, tests):
+        """Inserts the rows of the given list of tests in one transaction."""
+        with self.connection:
+            self.connection.executemany("INSERT INTO results VALUES (" + ",".join("?" * self.COLUMNS.__len__()) + ")", [self.getRow(test) for test in tests])
+
+    def finish(self):
+        """Closes the database."""
+        self.connection.close()
+
+
+class NpzResultSink(ResultSink):
+    """Collects the rows of the tests in compact typed columns and stores them as NumPy arrays in an .npz file when closed (requires numpy). Test classes, layers, status codes and cache states are stored as indices into the arrays of names tests, layers, statuses and caches. Unknown numbers are NaN, the URLs are not stored."""
+    NUMERIC_COLUMNS = ["timestamp", "lowerx", "lowery", "upperx", "uppery", "elapsed", "latency", "ttfb", "totaltime", "bytes", "retries"]
+    CATEGORY_COLUMNS = {"test": "tests", "layer": "layers", "status": "statuses", "cache": "caches"}
+    columns = {}
+    categories = {}
+
+    def __init__(self, outputfile):
+        """Initializes the sink writing to the .npz file at the path outputfile."""
+        if np is None:
+            raise Exception("The output format npz requires the package numpy.")
+        self.columns = {c: array("d") for c in self.NUMERIC_COLUMNS}
+        self.columns.update({c: array("q") for c in self.CATEGORY_COLUMNS})
+        self.categories = {c: {} for c in self.CATEGORY_COLUMNS}
+        super(NpzResultSink, self).__init__(outputfile)
+
+    def writeBatch(self, tests):
+        """Appends the rows of the given list of tests to the columns."""
+        for row in map(self.getRow, tests):
+            for c, value in zip(self.COLUMNS, row):
+                if c in self.categories:
+                    self.columns[c].append(self.categories[c].setdefault(str(value), self.categories[c].__len__()))
+                elif c in self.columns:
+                    self.columns[c].append(float("nan") if value is None else value)
+
+    def finish(self):
+        """Stores the columns and the names of the categories in the .npz file."""
+        arrays = {c: np.frombuffer(self.columns[c], dtype=np.float64 if self.columns[c].typecode == "d" else np.int64) for c in self.columns}
+        for c, names in self.CATEGORY_COLUMNS.items():
+            arrays[names] = np.array(list(self.categories[c]), dtype=str)
+        np.savez(self.outputfile, **arrays)
+
+
 class Box:
     """Represents a two-dimensional box."""
     lowerx = 0
@@ -106,34 +317,59 @@ class Box:
         """Returns True if and only if the given box is within the borders of this box."""
         return box.lowerx >= self.lowerx and box.lowery >= self.lowery and box.upperx <= self.upperx and box.uppery <= self.uppery
 
-    def generateRandomSubbox(self, minwidth=1.0, minheight= 1.0, maxfractionaldigits=0):
-        """Returns a new random box inside this box. Optinally, minwidth (default: 1.0), minheight (default: 1.0), maxfractionaldigits (default: 0) can be given."""
+    def getWidth(self):
+        """Returns the extent of the box in x direction."""
+        return self.upperx - self.lowerx
+
+    def getHeight(self):
+        """Returns the extent of the box in y direction."""
+        return self.uppery - self.lowery
+
+    def getCenter(self):
+        """Returns the center of the box as tuple (x, y)."""
+        return (self.lowerx + self.upperx) / 2.0, (self.lowery + self.uppery) / 2.0
+
+    def copy(self):
+        """Returns a new box with the same corners."""
+        return Box(self.lowerx, self.lowery, self.upperx, self.uppery)
+
+    @staticmethod
+    def fromString(text):
+        """Returns the box given by the first four numbers of the text in the order lower x, lower y, upper x, upper y, e.g., "-10,40,10,50" or "[[-10,40],[10,50]]"."""
+        numbers = re.findall(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?", text)
+        if numbers.__len__() < 4:
+            raise Exception("The text does not define a box: " + text)
+        return Box(*[float(n) for n in numbers[:4]])
+
+    def generateRandomSubbox(self, minwidth=1.0, minheight= 1.0, maxfractionaldigits=0, rng=None):
+        """Returns a new random box inside this box. Optinally, minwidth (default: 1.0), minheight (default: 1.0), maxfractionaldigits (default: 0) can be given. The random numbers are drawn from the random.Random object rng if given."""
+        randint = (rng or random).randint
         digitsx = randint(0, maxfractionaldigits)
         if digitsx:
-            randx = randint(self.lowerx, (self.upperx-minwidth) * pow(10, digitsx))
-            randwidth = randint(minwidth * pow(10, digitsx), self.upperx* pow(10, digitsx) - randx)
+            randx = randint(ceil(self.lowerx), floor((self.upperx-minwidth) * pow(10, digitsx)))
+            randwidth = randint(ceil(minwidth * pow(10, digitsx)), floor(self.upperx* pow(10, digitsx) - randx))
             randx /=  pow(10, digitsx)
             if randx > self.upperx-minwidth:
                 randx -= 1
                 randx -= minwidth
             randwidth /=  pow(10, digitsx)
         else:
-            randx = randint(self.lowerx, (self.upperx-minwidth))
-            randwidth = randint(minwidth, self.upperx - randx)
+            randx = randint(ceil(self.lowerx), floor(self.upperx-minwidth))
+            randwidth = randint(ceil(minwidth), floor(self.upperx - randx))
 
         digitsy = randint(0, maxfractionaldigits)
         if digitsy:
-            randy = randint(self.lowery, (self.uppery-minheight) * pow(10, digitsy))
-            randheight = randint(minheight * pow(10, digitsy), self.uppery * pow(10, digitsy) - randy)
+            randy = randint(ceil(self.lowery), floor((self.uppery-minheight) * pow(10, digitsy)))
+            randheight = randint(ceil(minheight * pow(10, digitsy)), floor(self.uppery * pow(10, digitsy) - randy))
             randy /= pow(10, digitsy)
             if randy > self.uppery-minheight:
                 randy -= 1
                 randy -= minheight
             randheight /=  pow(10, digitsy)
         else:
-            randy = randint(self.lowery, (self.uppery-minheight))
-            randheight = randint(minheight, self.uppery - randy)
-        return Box(randx, randy, randx+randwidth, randy+randheight)
+            randy = randint(ceil(self.lowery), floor(self.uppery-minheight))
+            randheight = randint(ceil(minheight), floor(self.uppery - randy))
+        return Box(randx, randy, round(randx + randwidth, digitsx) if digitsx else randx + randwidth, round(randy + randheight, digitsy) if digitsy else randy + randheight)
 
     def shiftX(self, step):
         """Shifts the box by step on the x axis."""
@@ -153,6 +389,137 @@ class Box:
         self.uppery += step
         
 
+class BoxArray:
+    """Compact storage of many two-dimensional boxes in one NumPy array of shape (n, 4) whose columns are lowerx, lowery, upperx and uppery. The static methods generate whole batches of random, walking or zooming boxes at once following the rules of Box, WalkingBoundingBoxWMSTest and ZoomingBoxWMSTest. Requires numpy."""
+    __slots__ = ["coordinates"]
+
+    def __init__(self, coordinates):
+        """Initializes the array by the given array-like coordinates of shape (n, 4)."""
+        if np is None:
+            raise Exception("The class BoxArray requires the package numpy.")
+        self.coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 4)
+
+    def __len__(self):
+        """Returns the number of boxes."""
+        return self.coordinates.shape[0]
+
+    def __getitem__(self, index):
+        """Returns the box at the given index as Box object or, if index is a slice, the selected boxes as BoxArray."""
+        if isinstance(index, slice):
+            return BoxArray(self.coordinates[index])
+        return Box(*self.coordinates[index].tolist())
+
+    def __iter__(self):
+        """Generates the boxes as Box objects."""
+        for c in self.coordinates.tolist():
+            yield Box(*c)
+
+    @staticmethod
+    def generator(seed=None):
+        """Returns a numpy.random.Generator for the given seed. A given Generator is returned unchanged."""
+        if np is None:
+            raise Exception("The class BoxArray requires the package numpy.")
+        return seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+    @staticmethod
+    def randomSubboxes(extent, n, minwidth=1.0, minheight=1.0, maxfractionaldigits=0, seed=None):
+        """Returns n random boxes inside the Box extent following the rule of Box.generateRandomSubbox: every coordinate has at most maxfractionaldigits fractional digits and every box is at least minwidth wide and minheight high. The scaled lower coordinate is drawn from the unscaled lower limit of the extent as in Box.generateRandomSubbox. The seed is an integer or a numpy.random.Generator."""
+        rng = BoxArray.generator(seed)
+        coordinates = np.empty((n, 4))
+        for axis, lower, upper, minsize in [(0, extent.lowerx, extent.upperx, minwidth), (1, extent.lowery, extent.uppery, minheight)]:
+            scale = 10.0 ** rng.integers(0, maxfractionaldigits, size=n, endpoint=True)
+            low = rng.integers(int(np.ceil(lower)), np.floor((upper - minsize) * scale).astype(np.int64), endpoint=True)
+            size = rng.integers(np.ceil(minsize * scale).astype(np.int64), np.floor(upper * scale).astype(np.int64) - low, endpoint=True)
+            coordinates[:, axis] = low / scale
+            coordinates[:, axis + 2] = (low + size) / scale
+        return BoxArray(coordinates)
+
+    @staticmethod
+    def walk(extent, start, n, minstepwidth=1.0, maxstepwidth=12.0, seed=None):
+        """Returns n boxes inside the Box extent forming a walk that starts with the Box start. Each box is moved by a random integer step into a random direction on both axes like WalkingBoundingBoxWMSTest.moveBoundingBox does. The random numbers are drawn in one batch."""
+        rng = BoxArray.generator(seed)
+        coordinates = np.empty((n, 4))
+        for axis, lower, upper, lowerlimit, upperlimit in [(0, start.lowerx, start.upperx, extent.lowerx, extent.upperx), (1, start.lowery, start.uppery, extent.lowery, extent.uppery)]:
+            upwards = rng.integers(0, 1, size=n, endpoint=True) == 1
+            fractions = rng.random(n)
+            shifts = BoxArray.walkAxis(upperlimit - upper, lower - lowerlimit, upwards, fractions, minstepwidth, maxstepwidth)
+            coordinates[:, axis] = lower + shifts
+            coordinates[:, axis + 2] = upper + shifts
+        return BoxArray(coordinates)
+
+    @staticmethod
+    def walkAxis(upperdistance, lowerdistance, upwards, fractions, minstepwidth, maxstepwidth, blocksize=512):
+        """Returns the cumulated shifts of a walk on one axis as array. The walk starts with the distances upperdistance and lowerdistance to the limits of the extent, and the c-th step is determined by the boolean upwards[c] and the random number fractions[c] in [0, 1). The first step is skipped. Steps far from the limits are cumulated blockwise, the steps limited by the extent are taken one by one."""
+        n = upwards.shape[0]
+        freesteps = np.where(upwards, 1.0, -1.0) * np.floor(minstepwidth + fractions * (maxstepwidth - minstepwidth + 1))
+        shifts = np.zeros(n)
+        shift = 0.0
+        c = 1
+        while c < n:
+            end = min(c + blocksize, n)
+            cumulated = shift + np.cumsum(freesteps[c:end])
+            before = np.concatenate(([shift], cumulated[:-1]))
+            limited = np.floor(np.where(upwards[c:end], upperdistance - before, lowerdistance + before)) < maxstepwidth
+            k = int(limited.argmax()) if limited.any() else end - c
+            shifts[c:c + k] = cumulated[:k]
+            if k:
+                shift = cumulated[k - 1]
+            c += k
+            if c < end:
+                stop = min(c + 32, n)
+                limitedshifts = []
+                for up, fraction in zip(upwards[c:stop].tolist(), fractions[c:stop].tolist()):
+                    maxstep = int(upperdistance - shift) if up else int(lowerdistance + shift)
+                    low, high = min(minstepwidth, maxstep), min(maxstepwidth, maxstep)
+                    step = int(low + fraction * (high - low + 1))
+                    shift = shift + step if up else shift - step
+                    limitedshifts.append(shift)
+                shifts[c:stop] = limitedshifts
+                c = stop
+        return shifts
+
+    @staticmethod
+    def zoom(extent, start, n, minboxwidth=5.0, maxboxwidth=180.0, seed=None, minwidth=1.0, minheight=1.0, maxfractionaldigits=0):
+        """Returns n boxes inside the Box extent that are zoomed step by step from the center of the Box start like ZoomingBoxWMSTest.zoomBoundingBox does. As soon as the box cannot be zoomed out any further, the zooming restarts from a random box drawn by randomSubboxes with minwidth, minheight and maxfractionaldigits. The chains between two restarts are independent, so their restart boxes are drawn in batches and the chains are zoomed side by side by zoomChains."""
+        rng = BoxArray.generator(seed)
+        starts = np.array([[start.lowerx, start.lowery, start.upperx, start.uppery]])
+        parts = []
+        total = 0
+        chains = 0
+        while True:
+            parts.append(BoxArray.zoomChains(extent, starts, minboxwidth, maxboxwidth, rng))
+            total += parts[-1].shape[0]
+            chains += starts.shape[0]
+            if total >= n:
+                break
+            batch = min(max(int((n - total) * chains / total * 1.1) + 1, 16), 1 << 16)
+            starts = BoxArray.randomSubboxes(extent, batch, minwidth, minheight, maxfractionaldigits, rng).coordinates
+        return BoxArray(np.concatenate(parts)[:n])
+
+    @staticmethod
+    def zoomChains(extent, starts, minboxwidth, maxboxwidth, rng):
+        """Returns the coordinates of the zooming chains of the boxes starts of shape (m, 4) inside the Box extent, chain by chain. Every chain consists of its start box and the boxes zoomed out of it until the next step would leave the extent. All chains still zooming take their step at once, drawn from the numpy.random.Generator rng."""
+        m = starts.shape[0]
+        margins = np.min(np.stack([starts[:, 0] - extent.lowerx, starts[:, 1] - extent.lowery, extent.upperx - starts[:, 2], extent.uppery - starts[:, 3]]), axis=0)
+        shifts = np.zeros(m)
+        lengths = np.ones(m, dtype=np.int64)
+        steps = []
+        zooming = np.arange(m)
+        while zooming.size:
+            maxstep = np.floor(np.minimum(maxboxwidth, margins[zooming] - shifts[zooming]))
+            zooming, maxstep = zooming[maxstep >= 1], maxstep[maxstep >= 1]
+            low = np.ceil(np.minimum(minboxwidth, maxstep))
+            shifts[zooming] += np.floor(low + rng.random(zooming.size) * (maxstep - low + 1))
+            lengths[zooming] += 1
+            steps.append((zooming, shifts[zooming]))
+        offsets = np.cumsum(lengths) - lengths
+        coordinates = np.empty((int(lengths.sum()), 4))
+        coordinates[offsets] = starts
+        for step, (chains, chainshifts) in enumerate(steps):
+            coordinates[offsets[chains] + step + 1] = starts[chains] + chainshifts[:, None] * np.array([-1.0, -1.0, 1.0, 1.0])
+        return coordinates
+
+
 class WMSServer:
     """Represents a web map service (WMS) server and provides methods to connect to it."""
     host = "localhost"
@@ -179,6 +546,78 @@ class WMSServer:
         """Returns the default URL."""
         return self.generateURL()
 
+    @staticmethod
+    def createSession(poolsize=1):
+        """Returns a new Session keeping up to poolsize (default = 1) connections per host alive for re-use. The pool size should match the number of threads sharing the session, otherwise surplus connections are closed after every request."""
+        session = Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, poolsize))
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+
+class RetryPolicy:
+    """Decides whether and after which wait a request is repeated. A keep-alive connection found closed by the server (stale) is retried at once. Overload signals, i.e., refused connections and the HTTP status codes RETRY_STATUSES, are retried after the time requested by a Retry-After header or otherwise after an exponential backoff with full jitter. The backoff adapts to the server: every overload signal raises the backoff level shared by all tests using this policy and every other response lowers it."""
+    RETRY_STATUSES = [429, 503]
+    MAX_LEVEL = 8
+    maxretries = 3
+    basedelay = 0.05
+    maxdelay = 10.0
+    level = 0
+    rng = None
+
+    def __init__(self, maxretries=3, basedelay=0.05, maxdelay=10.0, seed=None):
+        """Initializes the policy repeating a request at most maxretries (default = 3) times. The backoff starts at basedelay seconds (default = 0.05) and does not exceed maxdelay seconds (default = 10.0), which also caps Retry-After. The integer seed makes the jitter reproducible."""
+        self.maxretries = maxretries
+        self.basedelay = basedelay
+        self.maxdelay = maxdelay
+        self.level = 0
+        self.rng = Random(seed)
+
+    @staticmethod
+    def classify(error):
+        """Returns "stale" if the given exception signals a keep-alive connection closed by the server, "overload" if it signals a refused or otherwise failed connection, and None for any other error."""
+        if aiohttp is not None and isinstance(error, aiohttp.ServerDisconnectedError):
+            return "stale"
+        if aiohttp is not None and isinstance(error, aiohttp.ClientConnectionError):
+            return "overload"
+        if isinstance(error, RequestsConnectionError):
+            return "stale" if error.args and isinstance(error.args[0], ProtocolError) else "overload"
+        return None
+
+    @staticmethod
+    def getRetryAfter(headers):
+        """Returns the number of seconds requested by the Retry-After header of the given headers or None if there is none. The header is given in seconds or as HTTP date."""
+        value = headers.get("Retry-After") if headers is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time())
+            except (TypeError, ValueError):
+                return None
+
+    def getWait(self, attempt, status=None, headers=None, error=None):
+        """Returns the time in seconds to wait before the next attempt or None if the request must not be repeated, given the number of attempts already repeated attempt and either the HTTP status code status with the response headers or the exception error raised while sending. Every call adapts the backoff level."""
+        if error is not None:
+            kind = self.classify(error)
+        else:
+            kind = "overload" if status in self.RETRY_STATUSES else None
+            if kind is None:
+                self.level = max(self.level - 1, 0)
+        if kind == "overload":
+            self.level = min(self.level + 1, self.MAX_LEVEL)
+        if kind is None or attempt >= self.maxretries:
+            return None
+        if kind == "stale":
+            return 0.0
+        retryafter = self.getRetryAfter(headers)
+        if retryafter is not None:
+            return min(retryafter, self.maxdelay)
+        return self.rng.uniform(0.0, min(self.maxdelay, self.basedelay * 2 ** (attempt + self.level)))
+
 
 class WMSTestResult:
     """Stores the result data of a WMSTest."""
@@ -186,29 +625,139 @@ class WMSTestResult:
     """The prepared request object."""
     response = None
     """The response object."""
+    delay = 0.0
+    """The time in seconds between the scheduled and the actual sending of the request."""
+    timestamp = None
+    """The time.time() value at which the request was sent, which is comparable across processes."""
+    ttfb = None
+    """The time in seconds from sending the request until the first byte of the body is received."""
+    totaltime = None
+    """The time in seconds from sending the request until the body is completely received."""
+    size = 0
+    """The number of bytes of the body."""
+    retries = 0
+    """The number of times the request was repeated before this result."""
+    CHUNK_SIZE = 65536
+    CACHE_HEADERS = ["geowebcache-cache-result", "X-Cache", "X-Cache-Status", "CF-Cache-Status"]
     
-    def __init__(self, request, response=None):
-        """Initializes a WMSTestResult with a request object and optinally with a response object."""
+    def __init__(self, request, response=None, delay=0.0):
+        """Initializes a WMSTestResult with a request object and optinally with a response object and the delay in seconds between the scheduled and the actual sending of the request."""
         if not isinstance(request, PreparedRequest):
             raise Exception("The parameter request must be a requests.Request object.")
         self.request = request
         if response and not isinstance(response, Response):
             raise Exception("The parameter response must be a requests.Response object.")
         self.response = response
+        self.delay = delay
+        self.timestamp = time()
     
     def getCSV(self):
         """Generates a CSV representation of the test result."""
         # if r.headers["Content-Type"] != "image/png":
         # raise Exception("Unexpected response format", r.text)
-        if self.response:
-            return self.request.url + ";" + str(self.response.status_code) + ";" + self.response.headers["Content-Type"] + ";" + str(self.response.elapsed.total_seconds())
+        if self.response is not None:
+            return self.request.url + ";" + str(self.response.status_code) + ";" + self.response.headers.get("Content-Type", "") + ";" + str(self.response.elapsed.total_seconds()) + ";" + str(self.getLatency()) + ";" + ("" if self.ttfb is None else str(self.ttfb)) + ";" + ("" if self.totaltime is None else str(self.totaltime)) + ";" + str(self.size) + ";" + ("" if self.getTransferRate() is None else str(self.getTransferRate())) + ";" + (self.getCacheStatus() or "") + ";" + str(self.retries)
         return self.request.url
+
+    def download(self, starttime):
+        """Reads the body of the streamed response chunk by chunk and discards it, so that the memory consumption does not depend on the size of the body. The time to the first byte and the total time are measured from the given time.perf_counter() value starttime."""
+        ttfb = None
+        size = 0
+        for chunk in self.response.iter_content(self.CHUNK_SIZE):
+            if ttfb is None:
+                ttfb = perf_counter() - starttime
+            size += len(chunk)
+        totaltime = perf_counter() - starttime
+        self.setTransfer(totaltime if ttfb is None else ttfb, totaltime, size)
+        return self
+
+    def setTransfer(self, ttfb, totaltime, size):
+        """Sets the time to the first byte ttfb and the total time totaltime in seconds as well as the size of the body in bytes."""
+        self.ttfb = ttfb
+        self.totaltime = totaltime
+        self.size = size
+        return self
+
+    def getTransferRate(self):
+        """Returns the download rate of the body in MB/s including the time to the first byte or None if the body was not downloaded."""
+        return self.size / self.totaltime / 1e6 if self.totaltime else None
+
+    def getCacheStatus(self):
+        """Returns "hit" or "miss" as reported by the response headers of a tile cache (GeoWebCache, Varnish, nginx or a CDN) or None if the response does not tell."""
+        if self.response is None:
+            return None
+        for header in self.CACHE_HEADERS:
+            value = self.response.headers.get(header, "").lower()
+            if "hit" in value:
+                return "hit"
+            if "miss" in value:
+                return "miss"
+        return None
+
+    def getStatus(self):
+        """Returns the HTTP status code of the response or "error" if no response was received."""
+        return self.response.status_code if self.response is not None else "error"
+
+    def getLatency(self):
+        """Returns the latency of the response in seconds measured from the scheduled sending time until the body is completely received or, if the body was not downloaded, until the headers were received. None is returned if no response was received. Without schedule, the latency starts at the actual sending time."""
+        if self.response is None:
+            return None
+        return self.delay + (self.totaltime if self.totaltime is not None else self.response.elapsed.total_seconds())
         
     def close(self):
         """Closes the response."""
-        self.response.close()
+        if self.response is not None:
+            self.response.close()
+
+    def release(self):
+        """Closes the response and replaces it by a detached copy of its status, reason, headers and elapsed time, so that the connection objects and buffers of the response are freed as soon as its metrics are recorded, while the result can still be output."""
+        if self.response is not None and self.response.raw is not None:
+            self.response.close()
+            self.response = self.createResponse(self.request, self.response.status_code, self.response.reason, self.response.headers, self.response.elapsed)
+
+    @staticmethod
+    def createResponse(request, status, reason, headers, elapsed):
+        """Returns a requests.Response object without connection and body for the PreparedRequest request with the given status code, reason, headers and elapsed time as timedelta."""
+        response = Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = elapsed
+        response._content = False
+        response._content_consumed = True
+        return response
         
 
+class RequestTemplate:
+    """Pre-encoded GetMap request for fixed parameters, i.e., server, layers, size, srs, format and any further parameters, which only lacks the bbox. The URL prefix is encoded once by requests, so that creating a request only appends the encoded bbox. Templates are immutable and shared by all tests with the same parameters via get."""
+    prefix = ""
+    templates = {}
+    """the templates created by get, keyed by their parameters"""
+
+    def __init__(self, server, parameters):
+        """Initializes the template for the WMSServer server and the list of (key, value) pairs parameters without bbox."""
+        self.prefix = Request('GET', server, params=parameters).prepare().url + ("&" if parameters else "?") + "bbox="
+
+    @staticmethod
+    def get(server, parameters):
+        """Returns the template for the WMSServer server and the tuple of (key, value) pairs parameters, which is created on first use."""
+        key = (server.__str__(), parameters)
+        template = RequestTemplate.templates.get(key)
+        if template is None:
+            template = RequestTemplate.templates.setdefault(key, RequestTemplate(server, list(parameters)))
+        return template
+
+    def createRequest(self, bbox):
+        """Returns the PreparedRequest for the string bbox."""
+        request = PreparedRequest()
+        request.method = "GET"
+        request.url = self.prefix + quote(bbox, safe="")
+        request.headers = CaseInsensitiveDict()
+        return request
+
+
 class WMSTest(ABC):
     """A WMS test fixes the basic parameters for a call to a WMS: WMSServer, request, version. Aditional parameters can be added."""
     server = None
@@ -216,8 +765,13 @@ class WMSTest(ABC):
     width = 0
     height = 0
     boundingbox = Box(-180.0, -90.0, 180.0, 90.0)
-    basicparameters = {}
+    basicparameters = None
+    """the dictionary of the parameters of every request of this test except for layers, width, height and bbox"""
     result = None
+    scheduledtime = None
+    """the time.perf_counter() value at which the test is scheduled to be sent in an open-loop run"""
+    rng = None
+    """the random.Random object used for generating boxes (default: the module random)"""
     id = "WMSTest"
     """a short string uniquely identifying the test"""
     spatialextent = Box(-180.0, -90.0, 180.0, 90.0)
@@ -228,9 +782,7 @@ class WMSTest(ABC):
             raise Exception("The server must be an instance of WMSServer.")
         self.server = server
         self.result = None
-        self.basicparameters["service"] = "WMS"
-        self.basicparameters["version"] = "1.1.0"
-        self.basicparameters["request"] = "GetMap"
+        self.basicparameters = {"service": "WMS", "version": "1.1.0", "request": "GetMap"}
         self.setSRS("EPSG:4326")
         self.setFormat("image/png")
         self.layers = layers
@@ -241,8 +793,16 @@ class WMSTest(ABC):
         """Returns a copy of this class object while setting the given parameters differently."""
         return deepcopy(self)
 
+    def configure(self, settings):
+        """Calls the setters of this test given by the dictionary settings, which maps the names of the setters to the tuples of their arguments, e.g., {"setZipfExponent": (1.2,)}. Setters that this test does not have are skipped, so that the same settings can be applied to the tests of all classes."""
+        for name, arguments in (settings or {}).items():
+            setter = getattr(self, name, None)
+            if setter:
+                setter(*arguments)
+        return self
+
     def setBasicParameter(self, key, value):
-        """Set a basic parameter of the WMS test, which is shared between all copys of this WMS test. The parameter is added if it does not exist. The parameter will be used in every request."""
+        """Set a basic parameter of the WMS test, which is copied by clone. The parameter is added if it does not exist. The parameter will be used in every request."""
         self.basicparameters[key] = value
         return self
     
@@ -287,39 +847,101 @@ class WMSTest(ABC):
         self.basicparameters["format"] = requestformat
         return self
 
-    def createRequest(self, params = {}):
-        """Sends a request to the WMS server using the basic and optinally the given parameters in params."""
-        params.update(self.basicparameters)
-        params["layers"] = self.layers
-        params["width"] = self.width
-        params["height"] = self.height
-        params["bbox"] = self.boundingbox.__str__()
-        return Request('GET', self.server, params=params).prepare()
+    def createRequest(self, params=None):
+        """Creates the request to the WMS server using the basic and optinally the given parameters in params from the RequestTemplate of these parameters."""
+        return self.getTemplate(params).createRequest(self.boundingbox.__str__())
+
+    def getTemplate(self, params=None):
+        """Returns the RequestTemplate of the basic and optionally the given parameters in params as well as layers, width and height."""
+        return RequestTemplate.get(self.server, tuple(self.basicparameters.items()) + (tuple(params.items()) if params else ()) + (("layers", self.layers), ("width", self.width), ("height", self.height)))
         
-    def execute(self, dry = False, verbosity=0, session=None):
-        """This method executes the test and stores its WMSTestResult object which is available by the property result. If the optional second parameter dry is True, the test does not send requests. Additionally, the third parameter verbosity can be set to a non-negative integer representing the verbosity level (default: 0). The fourth parameter s can be used to provide a Session for re-use. Otherwise each request opens and closes its own session."""
+    def execute(self, dry = False, verbosity=0, session=None, retrypolicy=None):
+        """This method executes the test and stores its WMSTestResult object which is available by the property result. If the optional second parameter dry is True, the test does not send requests. Additionally, the third parameter verbosity can be set to a non-negative integer representing the verbosity level (default: 0). The fourth parameter s can be used to provide a Session for re-use. Otherwise each request opens and closes its own session. The RetryPolicy retrypolicy decides whether a request is repeated (default: never)."""
+        if PROFILER: start = PROFILER.begin()
         r = self.createRequest()
+        if PROFILER: PROFILER.end("createRequest", start)
         if dry:
             self.result = WMSTestResult(r)
-        else:
+            return
+        ownsession = not (session and isinstance(session, Session))
+        if ownsession:
+            session = WMSServer.createSession()
+        policy = retrypolicy or RetryPolicy(0)
+        starttime = perf_counter()
+        attempt = 0
+        try:
+            while True:
+                result, error = None, None
+                try:
+                    result = self.send(session, r, self.getDelay(starttime))
+                except Exception as e:
+                    error = e
+                wait = policy.getWait(attempt, result.response.status_code if result else None, result.response.headers if result else None, error)
+                if wait is None:
+                    break
+                if result: result.close()
+                if verbosity and verbosity > 1: print("Repeating the request after " + "%.3f" % wait + " sec: " + (str(error) if error else str(result.response.status_code)))
+                sleep(wait)
+                attempt += 1
+        finally:
+            if ownsession: session.close()
+        if result is None:
+            raise Exception("Error while sending http request: {0}".format(error))
+        result.retries = attempt
+        self.result = result
+
+    def send(self, session, request, delay=0.0):
+        """Sends the prepared request using the Session session, downloads the body and returns the WMSTestResult with the given delay in seconds."""
+        if PROFILER: start = PROFILER.begin()
+        timestamp = time()
+        starttime = perf_counter()
+        try:
+            result = WMSTestResult(request, session.send(request, verify=False, stream=True), delay).download(starttime)
+        finally:
+            if PROFILER: PROFILER.end("send", start)
+        result.timestamp = timestamp
+        return result
+
+    async def executeAsync(self, dry = False, verbosity=0, session=None, retrypolicy=None):
+        """Asynchronous counterpart of execute. The test is sent using the given aiohttp.ClientSession session and its WMSTestResult object is available by the property result afterwards. The parameters dry, verbosity and retrypolicy behave like in execute."""
+        if PROFILER: start = PROFILER.begin()
+        r = self.createRequest()
+        if PROFILER: PROFILER.end("createRequest", start)
+        if dry:
+            self.result = WMSTestResult(r)
+            return
+        policy = retrypolicy or RetryPolicy(0)
+        starttime = perf_counter()
+        attempt = 0
+        while True:
+            result, error = None, None
             try:
-                if not session or not isinstance(session, Session):
-                    self.result = WMSTestResult(r, session.send(r, verify=False))
-                else:
-                    session = Session()
-                    self.result = WMSTestResult(r, session.send(r, verify=False))
-                    session.close()
+                if PROFILER: start = PROFILER.begin()
+                try:
+                    result = await AsyncWMSEngine.send(session, r, self.getDelay(starttime))
+                finally:
+                    if PROFILER: PROFILER.end("send", start, False)
             except Exception as e:
-                if e.__str__().__contains__("busy"):
-                    if verbosity: print("Pausing the request sending for 5 sec due to a connection overflow.")
-                    sleep(5)
-                    self.result = WMSTestResult(r, session.send(r, verify=False))
-                else:
-                    raise Exception("Error while sending http request: {0}".format(e))
+                error = e
+            wait = policy.getWait(attempt, result.response.status_code if result else None, result.response.headers if result else None, error)
+            if wait is None:
+                break
+            if verbosity and verbosity > 1: print("Repeating the request after " + "%.3f" % wait + " sec: " + (str(error) if error else str(result.response.status_code)))
+            await asyncio.sleep(wait)
+            attempt += 1
+        if result is None:
+            raise Exception("Error while sending http request: {0}".format(error))
+        result.retries = attempt
+        self.result = result
+
+    def getDelay(self, since=None):
+        """Returns the time in seconds by which the sending of this test is behind its schedule right now. If the test is not scheduled, the time since the time.perf_counter() value since is returned, e.g., the first attempt of a repeated request, or 0.0. This function must be called immediately before sending."""
+        reference = self.scheduledtime if self.scheduledtime is not None else since
+        return perf_counter() - reference if reference is not None else 0.0
 
     def getCSV(self):
         """Generates a CSV representation of the test result."""
-        return self.basicparameters["bbox"]
+        return self.boundingbox.__str__()
 
     def __str__(self):
         """Generates a string representation of the WMSTest."""
@@ -334,10 +956,14 @@ class RandomBoundingBoxWMSTest(WMSTest):
     maxfractionaldigits = 3
     # Internally, a point is represented as a pair of doubles and a box as pair of the lower left and the upper right points.
 
-    def __init__(self, server, layers, width, height):
-        """Initiates a RandomBoundingBoxWMSTest by generating a random bounding box."""
+    def __init__(self, server, layers, width, height, boundingbox=None, rng=None):
+        """Initiates a RandomBoundingBoxWMSTest by generating a random bounding box unless the bounding box is given by boundingbox. Optionally, a random.Random object rng can be given from which all random numbers of this test are drawn."""
         super(RandomBoundingBoxWMSTest, self).__init__(server, layers, width, height)
-        self.generateRandomBoundingBox()
+        self.rng = rng
+        if boundingbox:
+            self.setBoundingBox(boundingbox)
+        else:
+            self.generateRandomBoundingBox()
     
     def setMaxFractionalDigits(self, maxfractionaldigits):
         """Sets the maximum number of fractional digits in any random number generated."""
@@ -356,7 +982,26 @@ class RandomBoundingBoxWMSTest(WMSTest):
 
     def generateRandomBoundingBox(self):
         """(Re-)generates a random box inside the spatial extent."""
-        self.setBoundingBox(super().spatialextent.generateRandomSubbox(self.minwidth, self.minheight, self.maxfractionaldigits))
+        self.setBoundingBox(super().spatialextent.generateRandomSubbox(self.minwidth, self.minheight, self.maxfractionaldigits, self.rng))
+        return self
+
+    def nextBoundingBox(self):
+        """Replaces the bounding box by the next one of this test. Here, a new random box is generated."""
+        return self.generateRandomBoundingBox()
+
+    def generateBoundingBoxes(self, count):
+        """Generates count bounding boxes one by one, starting with the current bounding box and advancing this test by nextBoundingBox. Every generated box is a copy, so this test can keep on advancing."""
+        for c in range(count):
+            if c:
+                self.nextBoundingBox()
+            yield self.boundingbox.copy()
+
+    def generateBoundingBoxArray(self, count, seed=None):
+        """Vectorized counterpart of generateBoundingBoxes returning a BoxArray of count boxes, starting with the current bounding box. Afterwards, the bounding box of this test is the last generated box. The seed is an integer or a numpy.random.Generator (requires numpy)."""
+        boxes = BoxArray.randomSubboxes(self.spatialextent, count - 1, self.minwidth, self.minheight, self.maxfractionaldigits, seed)
+        boxes = BoxArray(np.vstack([[[self.boundingbox.lowerx, self.boundingbox.lowery, self.boundingbox.upperx, self.boundingbox.uppery]], boxes.coordinates]))
+        self.boundingbox = boxes[-1]
+        return boxes
         
         
 class WalkingBoundingBoxWMSTest(RandomBoundingBoxWMSTest):
@@ -365,16 +1010,27 @@ class WalkingBoundingBoxWMSTest(RandomBoundingBoxWMSTest):
     minstepwidth = 1.0
     maxstepwidth = 12.0
     
-    def __init__(self, server, layers, width, height):
-        """Initiates a WalkingBoundingBoxWMSTest by generating a random bounding box."""
-        super(WalkingBoundingBoxWMSTest, self).__init__(server, layers, width, height)
+    def __init__(self, server, layers, width, height, boundingbox=None, rng=None):
+        """Initiates a WalkingBoundingBoxWMSTest by generating a random bounding box unless the bounding box is given by boundingbox. Optionally, a random.Random object rng can be given."""
+        super(WalkingBoundingBoxWMSTest, self).__init__(server, layers, width, height, boundingbox, rng)
+
+    def nextBoundingBox(self):
+        """Replaces the bounding box by the next one of this test. Here, the box is moved by one random step."""
+        return self.moveBoundingBox()
+
+    def generateBoundingBoxArray(self, count, seed=None):
+        """Vectorized counterpart of generateBoundingBoxes returning the walk of count boxes as BoxArray (requires numpy)."""
+        boxes = BoxArray.walk(self.spatialextent, self.boundingbox, count, self.minstepwidth, self.maxstepwidth, seed)
+        self.boundingbox = boxes[-1]
+        return boxes
     
     def moveBoundingBox(self, xstep = 0, ystep = 0):
         """Moves the bounding box by one step on the x and on the y axis. If the parameters xstep and ystep are not given, the steps are randomly chosen between minstepwidth and maxstepwidth."""
+        randint = (self.rng or random).randint
         direction = randint(0, 1)
         if xstep == 0:
             maxx = int((self.spatialextent.upperx - self.boundingbox.upperx) if direction else self.boundingbox.lowerx - self.spatialextent.lowerx)
-            xstep = randint(min(self.minstepwidth, maxx), min(self.maxstepwidth, maxx))
+            xstep = randint(ceil(min(self.minstepwidth, maxx)), floor(min(self.maxstepwidth, maxx)))
             xstep = xstep if direction else -xstep
             self.boundingbox.shiftX(xstep)
         else:
@@ -385,7 +1041,7 @@ class WalkingBoundingBoxWMSTest(RandomBoundingBoxWMSTest):
         direction = randint(0, 1)
         if ystep == 0:
             maxy = int((self.spatialextent.uppery - self.boundingbox.uppery) if direction else self.boundingbox.lowery - self.spatialextent.lowery)
-            ystep = randint(min(self.minstepwidth, maxy), min(self.maxstepwidth, maxy))
+            ystep = randint(ceil(min(self.minstepwidth, maxy)), floor(min(self.maxstepwidth, maxy)))
             ystep = ystep if direction else -ystep
             self.boundingbox.shiftY(ystep)
         else:
@@ -402,15 +1058,27 @@ class ZoomingBoxWMSTest(RandomBoundingBoxWMSTest):
     minboxwidth = 5.0
     maxboxwidth = 180.0
     
-    def __init__(self, server, layers, width, height):
-        """Initiates a ZoomingBoxWMSTest by generating a random bounding box."""
-        super(ZoomingBoxWMSTest, self).__init__(server, layers, width, height)
+    def __init__(self, server, layers, width, height, boundingbox=None, rng=None):
+        """Initiates a ZoomingBoxWMSTest by generating a random bounding box unless the bounding box is given by boundingbox. Optionally, a random.Random object rng can be given."""
+        super(ZoomingBoxWMSTest, self).__init__(server, layers, width, height, boundingbox, rng)
+
+    def nextBoundingBox(self):
+        """Replaces the bounding box by the next one of this test. Here, the box is zoomed by one random step."""
+        return self.zoomBoundingBox()
+
+    def generateBoundingBoxArray(self, count, seed=None):
+        """Vectorized counterpart of generateBoundingBoxes returning the zooming of count boxes as BoxArray (requires numpy)."""
+        boxes = BoxArray.zoom(self.spatialextent, self.boundingbox, count, self.minboxwidth, self.maxboxwidth, seed, self.minwidth, self.minheight, self.maxfractionaldigits)
+        self.boundingbox = boxes[-1]
+        return boxes
     
     def zoomBoundingBox(self, step = 0):
-        """Zooms the bounding box by one step starting from the center. If the parameter step is not given, the step is randomly chosen such that the zoomed box has a width between minboxwidth and the maximum box width."""
+        """Zooms the bounding box by one step starting from the center. If the parameter step is not given, the step is randomly chosen such that the zoomed box has a width between minboxwidth and the maximum box width. If the box cannot be zoomed out any further without leaving the spatial extent, the chain restarts from a new random box, so that every step yields a new box."""
         if step == 0:
             maxstep = int(min( self.maxboxwidth, (self.spatialextent.upperx - self.boundingbox.upperx), (self.spatialextent.uppery - self.boundingbox.uppery), (self.boundingbox.lowerx - self.spatialextent.lowerx), (self.boundingbox.lowery - self.spatialextent.lowery) ))
-            step = randint(min(self.minboxwidth, maxstep), max(self.minboxwidth, maxstep))
+            if maxstep < 1:
+                return self.generateRandomBoundingBox()
+            step = (self.rng or random).randint(ceil(min(self.minboxwidth, maxstep)), maxstep)
             self.boundingbox.zoom(step)
         else:
             self.boundingbox.zoom(step)
@@ -420,6 +1088,475 @@ class ZoomingBoxWMSTest(RandomBoundingBoxWMSTest):
         return self
 
 
+class TiledBoundingBoxWMSTest(RandomBoundingBoxWMSTest):
+    """Generates boxes aligned to the tiles of a tile matrix set, so that a tile cache like GeoWebCache can serve repeated tiles. At zoom level z, the tiles are tilewidth x tileheight / 2^z map units large, starting at the origin (lower left corner). The zoom level is chosen uniformly between minzoom and maxzoom, and the tiles of a level are ranked by a Zipf distribution with the exponent zipfexponent (0 = all tiles equally popular), whose ranks are scattered over the level by a fixed permutation."""
+    id = "TileBbox"
+    tileoriginx = -180.0
+    tileoriginy = -90.0
+    tilewidth = 180.0
+    tileheight = 180.0
+    minzoom = 0
+    maxzoom = 10
+    zipfexponent = 1.0
+
+    def setTileMatrixSet(self, originx=-180.0, originy=-90.0, tilewidth=180.0, tileheight=180.0, minzoom=0, maxzoom=10):
+        """Sets the tile matrix set by the origin, the tile size at zoom level 0 in map units and the range of zoom levels (default: the GeoWebCache grid set EPSG:4326 with 2 x 1 tiles at zoom level 0). The current bounding box is kept."""
+        if tilewidth <= 0 or tileheight <= 0 or minzoom < 0 or maxzoom < minzoom:
+            raise Exception("The tile matrix set is invalid.")
+        self.tileoriginx = originx
+        self.tileoriginy = originy
+        self.tilewidth = tilewidth
+        self.tileheight = tileheight
+        self.minzoom = minzoom
+        self.maxzoom = maxzoom
+        return self
+
+    def setZipfExponent(self, zipfexponent):
+        """Sets the non-negative exponent of the Zipf distribution of the tile popularity. The larger it is, the more requests hit the few most popular tiles."""
+        if zipfexponent < 0:
+            raise Exception("The Zipf exponent must not be negative: " + str(zipfexponent))
+        self.zipfexponent = zipfexponent
+        return self
+
+    def getMatrix(self, zoom):
+        """Returns the tile size and the numbers of tile columns and rows inside the spatial extent at the given zoom level as tuple (tile width, tile height, columns, rows)."""
+        width = self.tilewidth / (1 << zoom)
+        height = self.tileheight / (1 << zoom)
+        columns = int((self.spatialextent.upperx - max(self.tileoriginx, self.spatialextent.lowerx)) // width)
+        rows = int((self.spatialextent.uppery - max(self.tileoriginy, self.spatialextent.lowery)) // height)
+        if columns <= 0 or rows <= 0:
+            raise Exception("The tile matrix of zoom level " + str(zoom) + " has no tile inside the spatial extent.")
+        return width, height, columns, rows
+
+    @staticmethod
+    def getMultiplier(tiles):
+        """Returns the multiplier of the permutation of the tiles of a level, which is coprime to the number of tiles."""
+        multiplier = 40503
+        while gcd(multiplier, tiles) != 1:
+            multiplier += 2
+        return multiplier
+
+    def getZipfRank(self, fraction, tiles):
+        """Returns the rank between 0 and tiles - 1 drawn from the Zipf distribution for the random number fraction in [0, 1) by inverting the continuous approximation of its distribution function."""
+        s = self.zipfexponent
+        if s == 1:
+            rank = tiles ** fraction
+        else:
+            rank = ((tiles ** (1 - s) - 1) * fraction + 1) ** (1 / (1 - s))
+        return min(int(rank) - 1, tiles - 1)
+
+    def generateRandomBoundingBox(self):
+        """(Re-)generates the box of a random tile."""
+        rng = self.rng or random
+        zoom = rng.randint(self.minzoom, self.maxzoom)
+        width, height, columns, rows = self.getMatrix(zoom)
+        tiles = columns * rows
+        tile = (self.getZipfRank(rng.random(), tiles) * self.getMultiplier(tiles) + zoom) % tiles
+        lowerx = self.tileoriginx + (tile % columns) * width
+        lowery = self.tileoriginy + (tile // columns) * height
+        self.setBoundingBox(Box(lowerx, lowery, lowerx + width, lowery + height))
+        return self
+
+    def generateBoundingBoxArray(self, count, seed=None):
+        """Vectorized counterpart of generateBoundingBoxes returning count tile boxes as BoxArray, starting with the current bounding box (requires numpy)."""
+        rng = BoxArray.generator(seed)
+        coordinates = np.empty((count, 4))
+        coordinates[0] = [self.boundingbox.lowerx, self.boundingbox.lowery, self.boundingbox.upperx, self.boundingbox.uppery]
+        zooms = rng.integers(self.minzoom, self.maxzoom, size=count, endpoint=True)
+        fractions = rng.random(count)
+        for zoom in range(self.minzoom, self.maxzoom + 1):
+            selected = np.flatnonzero(zooms[1:] == zoom) + 1
+            width, height, columns, rows = self.getMatrix(zoom)
+            tiles = columns * rows
+            if self.zipfexponent == 1:
+                ranks = tiles ** fractions[selected]
+            else:
+                ranks = ((tiles ** (1 - self.zipfexponent) - 1) * fractions[selected] + 1) ** (1 / (1 - self.zipfexponent))
+            ranks = np.minimum(ranks.astype(np.int64) - 1, tiles - 1)
+            tile = (ranks * self.getMultiplier(tiles) + zoom) % tiles
+            coordinates[selected, 0] = self.tileoriginx + (tile % columns) * width
+            coordinates[selected, 1] = self.tileoriginy + (tile // columns) * height
+            coordinates[selected, 2] = coordinates[selected, 0] + width
+            coordinates[selected, 3] = coordinates[selected, 1] + height
+        boxes = BoxArray(coordinates)
+        self.boundingbox = boxes[-1]
+        return boxes
+
+    def createRequest(self, params=None):
+        """Creates the request with the additional parameters tiled=true and tilesorigin, which GeoServer requires to serve the tile from its integrated GeoWebCache."""
+        return super(TiledBoundingBoxWMSTest, self).createRequest({"tiled": "true", "tilesorigin": str(self.tileoriginx) + "," + str(self.tileoriginy)})
+
+
+class FileWMSTest(WMSTest):
+    """Tests a bounding box or a complete GetMap query string read from a file. Boxes from a file are not checked against the spatial extent, since they may use any spatial reference system."""
+    id = "File"
+    query = None
+    """the GetMap query string of the test if given instead of a bounding box"""
+
+    def __init__(self, server, layers, width, height, boundingbox=None, rng=None):
+        """Initiates a FileWMSTest with the given boundingbox, which is either a Box or a GetMap query string. The parameters of a query string are sent unchanged except for the layers. The parameter rng is not used."""
+        super(FileWMSTest, self).__init__(server, layers, width, height)
+        if isinstance(boundingbox, str):
+            self.query = boundingbox
+            bbox = self.getQueryParameter("bbox")
+            if bbox:
+                self.boundingbox = Box.fromString(bbox)
+        elif boundingbox:
+            self.boundingbox = boundingbox
+
+    def getQueryParameter(self, key):
+        """Returns the value of the parameter key (case-insensitive) in the query string or None."""
+        for k, v in parse_qsl(self.query or "", keep_blank_values=True):
+            if k.lower() == key.lower():
+                return v
+        return None
+
+    def createRequest(self, params=None):
+        """Creates the request from the query string if given, otherwise from the bounding box like any WMSTest. The layers of the query string are replaced by the layers of the test, which are added if the query string has none."""
+        if self.query is None:
+            return super(FileWMSTest, self).createRequest(params)
+        params = [(k, self.layers if k.lower() == "layers" else v) for k, v in parse_qsl(self.query, keep_blank_values=True)]
+        if self.layers and not any(k.lower() == "layers" for k, v in params):
+            params.append(("layers", self.layers))
+        return Request('GET', self.server, params=params).prepare()
+
+    @staticmethod
+    def openFile(inputfile):
+        """Opens the text file at the path inputfile for buffered reading. Files ending with ".gz" are decompressed on the fly."""
+        if not path.exists(inputfile):
+            raise Exception("The input file " + inputfile + " does not exist.")
+        if inputfile.endswith(".gz"):
+            return gzip.open(inputfile, "rt")
+        return open(inputfile, "r", buffering=1 << 20)
+
+    @staticmethod
+    def parseLine(line):
+        """Returns the GetMap query string of the given line if it contains one, e.g., as URL, otherwise the Box defined by the line."""
+        if "=" in line:
+            return line[line.find("?") + 1:]
+        return Box.fromString(line)
+
+    @staticmethod
+    def readBoundingBoxes(inputfile, count=None, index=0, stride=1):
+        """Generates the boxes or query strings of the lines of the file inputfile one by one, at most count if given. Empty lines and lines starting with "#" are skipped. The file is never loaded as a whole. Only every stride-th of these lines starting with the index-th one is parsed and generated."""
+        n = 0
+        with FileWMSTest.openFile(inputfile) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if count is not None and n >= count:
+                    break
+                if n % stride == index:
+                    yield FileWMSTest.parseLine(line)
+                n += 1
+
+
+class ReplayWMSTest(FileWMSTest):
+    """Replays a GetMap request of an access log. The property logoffset is the time in seconds of the request after the first request of the log."""
+    id = "Replay"
+    logoffset = 0.0
+    LOG_PATTERN = re.compile(r'\[(?P<time>[^\]]+)\]\s+"GET\s+(?P<url>\S+)')
+    LOG_TIME_FORMAT = "%d/%b/%Y:%H:%M:%S %z"
+
+    def __init__(self, server, query, logoffset=0.0):
+        """Initiates a ReplayWMSTest with the GetMap query string query of the logged request, which is sent unchanged, and its logoffset in seconds."""
+        parameters = {k.lower(): v for k, v in parse_qsl(query, keep_blank_values=True)}
+        super(ReplayWMSTest, self).__init__(server, parameters.get("layers", ""), parameters.get("width", ""), parameters.get("height", ""), query)
+        self.logoffset = logoffset
+
+    @staticmethod
+    def readLog(logfile):
+        """Generates the pairs (time.time() value, query string) of the GetMap requests in the access log logfile in the combined log format of nginx, Apache or GeoServer."""
+        with FileWMSTest.openFile(logfile) as f:
+            for line in f:
+                match = ReplayWMSTest.LOG_PATTERN.search(line)
+                if match and "getmap" in match.group("url").lower():
+                    url = urlsplit(match.group("url"))
+                    yield datetime.strptime(match.group("time"), ReplayWMSTest.LOG_TIME_FORMAT).timestamp(), url.query
+
+
+class WMSTestPlan:
+    """Lazily generates the tests of a run one by one. For every test class, count bounding boxes are generated following the rules of the class and every layer is tested with the same boxes. Instead of storing the boxes of the first layer, the random number generator of a test class is re-seeded for every layer, so that the memory consumption is constant regardless of count."""
+
+    server = None
+    testclasses = []
+    layers = []
+    width = 0
+    height = 0
+    count = 1
+    seed = None
+    seeds = []
+    batchsize = 0
+    inputfile = None
+    inputcount = None
+    inputindex = 0
+    inputstride = 1
+    interleave = False
+    orderseed = None
+    settings = {}
+    """the setters called for every new test, see WMSTest.configure"""
+    free = {}
+    """the completed tests per test class handed back by recycle for re-use"""
+    RECYCLE_LIMIT = 4096
+
+    def __init__(self, server, testclasses, layers, width, height, count=1, seed=None, batchsize=0, inputfile=None, interleave=False, settings=None):
+        """Initializes the plan for the given WMSServer server, the list of test classes testclasses, the list of layers and the map size width x height. Each test class generates count (default = 1) boxes per layer. If the integer seed is given, the generated boxes are reproducible. If batchsize is positive, the boxes are generated vectorized in batches of this size (requires numpy). The test class FileWMSTest reads the boxes from the file inputfile, at most count if given. If interleave is True, every box is sent to all layers in a random order before the next box, instead of sending all boxes to one layer after the other. Every test is configured by the dictionary settings of setters (see WMSTest.configure), which are stored with the plan, so that they reach the processes of a WMSProcessPool. Invalid settings raise an exception at once."""
+        if FileWMSTest in testclasses and not inputfile:
+            raise Exception("The test class " + FileWMSTest.id + " requires an input file.")
+        if batchsize > 0 and np is None:
+            raise Exception("The vectorized box generation requires the package numpy.")
+        if not isinstance(server, WMSServer):
+            raise Exception("The server must be an instance of WMSServer.")
+        self.server = server
+        self.testclasses = list(testclasses)
+        self.layers = list(layers)
+        self.width = width
+        self.height = height
+        self.count = count if count and count > 0 else 1
+        self.seed = seed
+        self.batchsize = batchsize
+        self.inputfile = inputfile
+        self.inputcount = count if count and count > 0 else None
+        rng = Random(seed)
+        self.seeds = [rng.getrandbits(64) for t in self.testclasses]
+        self.interleave = interleave
+        self.orderseed = rng.getrandbits(64)
+        self.settings = dict(settings or {})
+        for testclass in self.testclasses:
+            testclass(server, self.layers[0], width, height, Box()).configure(self.settings)
+        self.free = {t: deque(maxlen=self.RECYCLE_LIMIT) for t in self.testclasses if t is not FileWMSTest}
+
+    def boxes(self, testclass):
+        """Generates the count bounding boxes of the given test class. Every call generates the same boxes."""
+        if testclass is FileWMSTest:
+            return FileWMSTest.readBoundingBoxes(self.inputfile, self.inputcount, self.inputindex, self.inputstride)
+        i = self.testclasses.index(testclass)
+        generator = testclass(self.server, self.layers[0], self.width, self.height, Box(), Random(self.seeds[i])).configure(self.settings).generateRandomBoundingBox()
+        if self.batchsize > 0:
+            return self.generateBatches(generator, BoxArray.generator(self.seeds[i]))
+        return generator.generateBoundingBoxes(self.count)
+
+    def generateBatches(self, generator, seed):
+        """Generates the count bounding boxes of the test generator batch by batch by its method generateBoundingBoxArray. The first box of every following batch repeats the last box of the previous one and is skipped."""
+        remaining = self.count
+        while remaining > 0:
+            first = remaining == self.count
+            size = min(self.batchsize, remaining)
+            boxes = generator.generateBoundingBoxArray(size if first else size + 1, seed)
+            for box in (boxes if first else boxes[1:]):
+                yield box
+            remaining -= size
+
+    def items(self):
+        """Generates the tuples (test class, layer, bounding box) of all tests in the order test class, layer, box or, if interleaved, box, layer in random order with the test classes taking turns box by box. The random order is the same for every call."""
+        if not self.interleave:
+            for testclass in self.testclasses:
+                for layer in self.layers:
+                    for box in self.boxes(testclass):
+                        yield (testclass, layer, box)
+            return
+        generators = [self.interleaveLayers(i, testclass) for i, testclass in enumerate(self.testclasses)]
+        while generators:
+            for generator in list(generators):
+                try:
+                    yield from next(generator)
+                except StopIteration:
+                    generators.remove(generator)
+
+    def interleaveLayers(self, index, testclass):
+        """Generates for every box of the index-th test class testclass the list of the tuples (test class, layer, bounding box) of all layers in random order. Every layer gets its own copy of a Box, while query strings are shared."""
+        rng = Random(self.orderseed + index)
+        for box in self.boxes(testclass):
+            yield [(testclass, layer, box.copy() if isinstance(box, Box) else box) for layer in rng.sample(self.layers, self.layers.__len__())]
+
+    def createTest(self, testclass, layer, box):
+        """Returns the WMSTest of the test class testclass for the layer and the box. A test handed back by recycle is re-used if available."""
+        try:
+            test = self.free[testclass].pop()
+        except (KeyError, IndexError):
+            return testclass(self.server, layer, self.width, self.height, box).configure(self.settings)
+        test.setLayers(layer)
+        return test.setBoundingBox(box)
+
+    def recycle(self, test):
+        """Hands back the completed WMSTest test of this plan for re-use by createTest after its result has been recorded and output. The result is released. At most RECYCLE_LIMIT tests per test class are kept. This method is thread-safe."""
+        if test.__class__ in self.free:
+            test.result = None
+            test.scheduledtime = None
+            self.free[test.__class__].append(test)
+
+    def __iter__(self):
+        """Generates the WMSTest objects of all tests in the order given by items."""
+        for testclass, layer, box in self.items():
+            yield self.createTest(testclass, layer, box)
+
+    def getPartition(self, index, count):
+        """Returns the plan of the index-th of count partitions of this plan. Every test class of the partition generates its share of the count boxes with its own seed derived from the seed of the test class in this plan, so that a process running a partition generates only the boxes of its own tests. The lines of an input file are divided line by line. All partitions together have as many tests as this plan and follow the rules of the test classes, but their boxes differ from the boxes of this plan, which is its only partition if count is 1."""
+        if count <= 1:
+            return self
+        part = copy(self)
+        part.count = self.count // count + (1 if index < self.count % count else 0)
+        part.seeds = [Random("%d:%d:%d" % (seed, index, count)).getrandbits(64) for seed in self.seeds]
+        part.orderseed = Random("%d:%d:%d" % (self.orderseed, index, count)).getrandbits(64)
+        part.inputindex = self.inputindex + index * self.inputstride
+        part.inputstride = self.inputstride * count
+        part.free = {t: deque(maxlen=self.RECYCLE_LIMIT) for t in self.free}
+        return part
+
+    def partition(self, index, count):
+        """Generates the WMSTest objects of the index-th of count partitions given by getPartition."""
+        return iter(self.getPartition(index, count))
+
+    def __len__(self):
+        """Returns the total number of tests. The lines of an input file are counted once."""
+        if FileWMSTest in self.testclasses and self.inputcount is None:
+            self.inputcount = sum(1 for box in FileWMSTest.readBoundingBoxes(self.inputfile))
+        inputcount = max(0, (self.inputcount or 0) - self.inputindex + self.inputstride - 1) // self.inputstride
+        return sum(inputcount if t is FileWMSTest else self.count for t in self.testclasses) * self.layers.__len__()
+
+    def __str__(self):
+        """Generates a string representation of the plan."""
+        return str(self.__len__()) + " tests: " + ", ".join(t.id for t in self.testclasses) + " x " + ", ".join(self.layers) + " x " + str(self.count) + " boxes" + (" (interleaved)" if self.interleave else "")
+
+
+class AccessLogReplay:
+    """Lazily generates a ReplayWMSTest for every GetMap request of an access log, which can be used like a WMSTestPlan. The requests are sent to the given WMSServer instead of the logged one."""
+
+    server = None
+    logfile = None
+    count = None
+
+    def __init__(self, server, logfile, count=None):
+        """Initializes the replay of the access log logfile against the WMSServer server. If count is given, only the first count requests are replayed."""
+        if not isinstance(server, WMSServer):
+            raise Exception("The server must be an instance of WMSServer.")
+        FileWMSTest.openFile(logfile).close()
+        self.server = server
+        self.logfile = logfile
+        self.count = count if count and count > 0 else None
+
+    def requests(self):
+        """Generates the pairs (offset in seconds, query string) of the logged GetMap requests."""
+        first = None
+        for timestamp, query in islice(ReplayWMSTest.readLog(self.logfile), self.count):
+            if first is None:
+                first = timestamp
+            yield timestamp - first, query
+
+    def __iter__(self):
+        """Generates the ReplayWMSTest objects in the order of the log."""
+        for offset, query in self.requests():
+            yield ReplayWMSTest(self.server, query, offset)
+
+    def partition(self, index, count):
+        """Generates the ReplayWMSTest objects of every count-th request starting with the index-th one."""
+        for offset, query in islice(self.requests(), index, None, count):
+            yield ReplayWMSTest(self.server, query, offset)
+
+    def __len__(self):
+        """Returns the number of replayed requests, which are counted once."""
+        if self.count is None:
+            self.count = sum(1 for r in ReplayWMSTest.readLog(self.logfile))
+        return self.count
+
+    def __str__(self):
+        """Generates a string representation of the replay."""
+        return str(self.__len__()) + " requests replayed from " + self.logfile
+
+
+class ArrivalSchedule:
+    """Timetable of a run. In an open-loop run with a positive rate, the i-th test is scheduled at i / rate seconds after the start regardless of the number of tests in flight, and the latency of every test is measured from its scheduled time, so that queueing in the WMS or in the tester is not hidden (coordinated omission). Optionally, no test is scheduled after duration seconds."""
+
+    rate = None
+    duration = None
+    starttime = None
+    offset = 0
+    stride = 1
+    walltime = None
+    """the time.time() value at which a partitioned schedule starts"""
+
+    def __init__(self, rate=None, duration=None):
+        """Initializes the schedule with the rate in tests per second (None for a closed-loop run) and the duration in seconds (None for no time limit)."""
+        if rate is not None and rate <= 0:
+            raise Exception("The rate must be positive: " + str(rate))
+        self.rate = rate
+        self.duration = duration
+
+    def partition(self, index, count):
+        """Returns the schedule of the index-th of count partitions of the tests as used by WMSTestPlan.partition. All partitions share the start time, which is fixed now, and together they follow this schedule."""
+        schedule = ArrivalSchedule(self.rate, self.duration)
+        schedule.offset = index
+        schedule.stride = count
+        schedule.walltime = time()
+        return schedule
+
+    def isOpenLoop(self):
+        """Returns True if and only if the tests are sent at a fixed rate."""
+        return self.rate is not None
+
+    def times(self, tests):
+        """Generates the pairs (test, scheduled time) of the iterable tests until the duration is exceeded. The scheduled time is a time.perf_counter() value or None in a closed-loop run."""
+        self.starttime = perf_counter() - (time() - self.walltime if self.walltime is not None else 0.0)
+        for i, test in enumerate(tests):
+            scheduledtime = self.starttime + (i * self.stride + self.offset) / self.rate if self.rate else perf_counter()
+            if self.duration is not None and scheduledtime - self.starttime >= self.duration:
+                break
+            yield test, scheduledtime if self.rate else None
+
+    def pace(self, tests):
+        """Generates the tests of the iterable tests at their scheduled times, which are stored in their property scheduledtime. The generator sleeps until the next test is due."""
+        for test, scheduledtime in self.times(tests):
+            if scheduledtime is not None:
+                wait = scheduledtime - perf_counter()
+                if wait > 0:
+                    sleep(wait)
+                test.scheduledtime = scheduledtime
+            yield test
+
+    async def paceAsync(self, tests):
+        """Asynchronous counterpart of pace."""
+        for test, scheduledtime in self.times(tests):
+            if scheduledtime is not None:
+                wait = scheduledtime - perf_counter()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                test.scheduledtime = scheduledtime
+            yield test
+
+
+class ReplaySchedule(ArrivalSchedule):
+    """Timetable of an access log replay. Every ReplayWMSTest is scheduled at its offset in the log divided by speed, so that the original inter-arrival times are kept (speed = 1) or scaled. The latency is measured from the scheduled time as in any open-loop run."""
+
+    speed = 1.0
+
+    def __init__(self, speed=1.0, duration=None):
+        """Initializes the schedule with the positive speed factor (default = 1.0) and the duration in seconds (None for no time limit)."""
+        super(ReplaySchedule, self).__init__(None, duration)
+        if speed <= 0:
+            raise Exception("The speed must be positive: " + str(speed))
+        self.speed = speed
+
+    def isOpenLoop(self):
+        """Returns True since a replay is always open-loop."""
+        return True
+
+    def partition(self, index, count):
+        """Returns the schedule of the index-th of count partitions. All partitions share the start time, which is fixed now."""
+        schedule = ReplaySchedule(self.speed, self.duration)
+        schedule.walltime = time()
+        return schedule
+
+    def times(self, tests):
+        """Generates the pairs (test, scheduled time) of the iterable tests of ReplayWMSTest objects until the duration is exceeded."""
+        self.starttime = perf_counter() - (time() - self.walltime if self.walltime is not None else 0.0)
+        for test in tests:
+            offset = test.logoffset / self.speed
+            if self.duration is not None and offset >= self.duration:
+                break
+            yield test, self.starttime + offset
+
+
 class WMSTestThread(Thread):
     """Encapsulates a WMSTest in a separate Thread."""
     
@@ -429,10 +1566,10 @@ class WMSTestThread(Thread):
     dry = False
     verbosity = 0
     session = None
-    keepalive = True
+    retrypolicy = None
     
-    def __init__(self, test, threadpool, testscompleted, dry = False, verbosity=0, session=None, keepalive=True):
-        """Initializes the Thread with a WMSTest test and a Semaphore threadpool. The given test can be executed with the specified additional parameters dry (default = False), verbosity (default = 0) and session. Moreover, the parameter keepalive can be set to False (default = True) in order to close a given session after the test."""
+    def __init__(self, test, threadpool, testscompleted, dry = False, verbosity=0, session=None, retrypolicy=None):
+        """Initializes the Thread with a WMSTest test and a Semaphore threadpool. The given test can be executed with the specified additional parameters dry (default = False), verbosity (default = 0), session and retrypolicy."""
         Thread.__init__(self)
         if not isinstance(test, WMSTest):
             raise Exception("The given test must be an instance of WMSTest.")
@@ -446,26 +1583,1667 @@ class WMSTestThread(Thread):
         self.dry = dry
         self.verbosity = verbosity
         self.session = session
-        self.keepalive = keepalive
+        self.retrypolicy = retrypolicy
     
     def run(self):
         """Executes the test."""
+        profile = PROFILER.startThread() if PROFILER else None
         try:
-            self.test.execute(self.dry, self.verbosity, self.session)
+            self.test.execute(self.dry, self.verbosity, self.session, self.retrypolicy)
         except Exception as e:
             print(e.__str__())
-        if not self.keepalive:
-            self.session.close()
+        if PROFILER: PROFILER.stopThread(profile)
         self.testscompleted.put(self.test)
         self.threadpool.release()
 
+
+class WMSTestThreadEngine:
+    """Executes every WMSTest in its own WMSTestThread. The number of simultaneous threads is limited by a Semaphore. All threads share a Session whose connection pool keeps one connection per thread alive."""
+
+    concurrency = 1
+    dry = False
+    verbosity = 0
+    retrypolicy = None
+
+    def __init__(self, concurrency=1, dry = False, verbosity=0, retrypolicy=None):
+        """Initializes the engine with the maximum number of simultaneous tests concurrency (default = 1). The tests are executed with the additional parameters dry (default = False), verbosity (default = 0) and the RetryPolicy retrypolicy (default: no retries)."""
+        self.concurrency = concurrency if concurrency > 0 else 1
+        self.dry = dry
+        self.verbosity = verbosity
+        self.retrypolicy = retrypolicy
+
+    def run(self, tests, consumer, schedule=None):
+        """Executes every WMSTest of the iterable tests and passes each completed test to the callable consumer in the calling thread. The tests are dispatched according to the optional ArrivalSchedule schedule. This method blocks until all tests are completed."""
+        threadpool = Semaphore(self.concurrency)
+        startedcount = 0
+        session = WMSServer.createSession(self.concurrency)
+        testscompleted = SimpleQueue()
+        for t in (schedule or ArrivalSchedule()).pace(tests):
+            # start test in a thread
+            if threadpool.acquire():
+                startedcount += 1
+                WMSTestThread(t, threadpool, testscompleted, self.dry, self.verbosity, session, self.retrypolicy).start()
+            # evaluate intermediate results
+            while not testscompleted.empty():
+                consumer(testscompleted.get())
+                startedcount -= 1
+        # evaluate remaining results
+        while startedcount > 0:
+            consumer(testscompleted.get())
+            startedcount -= 1
+        session.close()
+
+
+class WMSWorker(Thread):
+    """Long-lived worker thread executing the WMSTests taken from a queue until it receives None. The worker keeps its own Session so that the TCP connection is kept alive across tests."""
+
+    pending = None
+    testscompleted = None
+    dry = False
+    verbosity = 0
+    retrypolicy = None
+
+    def __init__(self, pending, testscompleted, dry = False, verbosity=0, retrypolicy=None):
+        """Initializes the worker with the Queue pending providing the tests and the SimpleQueue testscompleted receiving them after execution. The tests are executed with the additional parameters dry (default = False), verbosity (default = 0) and retrypolicy (default: no retries)."""
+        Thread.__init__(self, daemon=True)
+        self.pending = pending
+        self.testscompleted = testscompleted
+        self.dry = dry
+        self.verbosity = verbosity
+        self.retrypolicy = retrypolicy
+
+    def run(self):
+        """Executes tests until None is taken from the queue. Finally, None is put to testscompleted to signal the end of this worker."""
+        session = WMSServer.createSession()
+        profile = PROFILER.startThread() if PROFILER else None
+        try:
+            while True:
+                test = self.pending.get()
+                if test is None:
+                    break
+                try:
+                    test.execute(self.dry, self.verbosity, session, self.retrypolicy)
+                except Exception as e:
+                    print(e.__str__())
+                self.testscompleted.put(test)
+        finally:
+            if PROFILER: PROFILER.stopThread(profile)
+            session.close()
+            self.testscompleted.put(None)
+
+
+class WMSWorkerPool:
+    """Executes WMSTests on a fixed number of WMSWorker threads fed from a bounded queue. Completed tests are handed over as soon as they are available."""
+
+    size = 1
+    dry = False
+    verbosity = 0
+    retrypolicy = None
+
+    def __init__(self, size=1, dry = False, verbosity=0, retrypolicy=None):
+        """Initializes the pool with the number of workers size (default = 1). The tests are executed with the additional parameters dry (default = False), verbosity (default = 0) and the RetryPolicy retrypolicy (default: no retries)."""
+        self.size = size if size > 0 else 1
+        self.dry = dry
+        self.verbosity = verbosity
+        self.retrypolicy = retrypolicy
+
+    def feed(self, tests, pending, schedule, failures):
+        """Puts every test of the iterable tests into the queue pending according to the ArrivalSchedule schedule, followed by one None per worker. An exception raised while generating the tests is appended to the list failures."""
+        profile = PROFILER.startThread() if PROFILER else None
+        try:
+            for test in schedule.pace(tests):
+                pending.put(test)
+        except Exception as e:
+            failures.append(e)
+        finally:
+            if PROFILER: PROFILER.stopThread(profile)
+            for w in range(self.size):
+                pending.put(None)
+
+    def run(self, tests, consumer, schedule=None):
+        """Executes every WMSTest of the iterable tests and passes each completed test to the callable consumer in the calling thread. The tests are dispatched according to the optional ArrivalSchedule schedule. In an open-loop run, the queue is unbounded and tests wait there if all workers are busy. This method blocks until all tests are completed. If the tests cannot be generated, the exception is raised after the tests sent so far are completed."""
+        schedule = schedule or ArrivalSchedule()
+        pending = Queue(0 if schedule.isOpenLoop() else 2 * self.size)
+        testscompleted = SimpleQueue()
+        failures = []
+        for w in range(self.size):
+            WMSWorker(pending, testscompleted, self.dry, self.verbosity, self.retrypolicy).start()
+        Thread(target=self.feed, args=(tests, pending, schedule, failures), daemon=True).start()
+        running = self.size
+        while running:
+            test = testscompleted.get()
+            if test is None:
+                running -= 1
+            else:
+                consumer(test)
+        if failures:
+            raise failures[0]
+
+
+class AsyncWMSEngine:
+    """Executes WMSTests concurrently on a single asyncio event loop. All requests share one pooled aiohttp.ClientSession whose number of connections is bounded by the concurrency."""
+
+    concurrency = 1
+    dry = False
+    verbosity = 0
+    retrypolicy = None
+
+    def __init__(self, concurrency=1, dry = False, verbosity=0, retrypolicy=None):
+        """Initializes the engine with the maximum number of simultaneous tests concurrency (default = 1). The tests are executed with the additional parameters dry (default = False), verbosity (default = 0) and the RetryPolicy retrypolicy (default: no retries)."""
+        if aiohttp is None:
+            raise Exception("The async engine requires the package aiohttp.")
+        self.concurrency = concurrency if concurrency > 0 else 1
+        self.dry = dry
+        self.verbosity = verbosity
+        self.retrypolicy = retrypolicy
+
+    @staticmethod
+    async def send(session, request, delay=0.0):
+        """Sends the prepared request using the aiohttp.ClientSession session and returns the WMSTestResult with the given delay. The response is converted to a requests.Response object whose elapsed time is measured until the response headers are received, just like requests does. The body is downloaded chunk by chunk and discarded. The time waiting for a free connection of a session created with the TraceConfig of createTraceConfig is added to the delay, so that the elapsed time, the time to the first byte and the total time start when the connection is acquired as with the other engines."""
+        timestamp = time()
+        start = perf_counter()
+        timing = {}
+        async with session.get(URL(request.url, encoded=True), trace_request_ctx=timing) as r:
+            queued = timing.get("queued", 0.0)
+            timestamp += queued
+            start += queued
+            delay += queued
+            elapsed = perf_counter() - start
+            ttfb = None
+            size = 0
+            async for chunk in r.content.iter_chunked(WMSTestResult.CHUNK_SIZE):
+                if ttfb is None:
+                    ttfb = perf_counter() - start
+                size += len(chunk)
+            totaltime = perf_counter() - start
+            response = WMSTestResult.createResponse(request, r.status, r.reason, r.headers, timedelta(seconds=elapsed))
+            result = WMSTestResult(request, response, delay).setTransfer(totaltime if ttfb is None else ttfb, totaltime, size)
+            result.timestamp = timestamp
+            return result
+
+    @staticmethod
+    def createTraceConfig():
+        """Returns an aiohttp.TraceConfig measuring the time a request waits for a free connection of the connector. The time is stored under the key "queued" in the dictionary given to the request as trace_request_ctx."""
+        async def onQueuedStart(session, context, params):
+            context.trace_request_ctx["queuedstart"] = perf_counter()
+        async def onQueuedEnd(session, context, params):
+            context.trace_request_ctx["queued"] = context.trace_request_ctx.get("queued", 0.0) + perf_counter() - context.trace_request_ctx["queuedstart"]
+        traceconfig = aiohttp.TraceConfig()
+        traceconfig.on_connection_queued_start.append(onQueuedStart)
+        traceconfig.on_connection_queued_end.append(onQueuedEnd)
+        return traceconfig
+
+    def run(self, tests, consumer, schedule=None):
+        """Executes every WMSTest of the iterable tests and passes each completed test to the callable consumer. The tests are dispatched according to the optional ArrivalSchedule schedule. This method blocks until all tests are completed."""
+        asyncio.run(self.runAsync(tests, consumer, schedule or ArrivalSchedule()))
+
+    async def runAsync(self, tests, consumer, schedule):
+        """Coroutine executing every WMSTest of the iterable tests. In a closed-loop run, at most concurrency tests are in flight. In an open-loop run, every test is started at its scheduled time and waits for one of the concurrency connections."""
+        slots = asyncio.Semaphore(self.concurrency)
+        pending = set()
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ssl=False)
+        async with aiohttp.ClientSession(connector=connector, trace_configs=[self.createTraceConfig()]) as session:
+            if schedule.isOpenLoop():
+                slots = None
+            async for test in schedule.paceAsync(tests):
+                if slots:
+                    await slots.acquire()
+                task = asyncio.ensure_future(self.executeTest(test, session, slots, consumer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+
+    async def executeTest(self, test, session, slots, consumer):
+        """Coroutine executing the single WMSTest test and releasing its slot in the Semaphore slots afterwards, if given."""
+        try:
+            await test.executeAsync(self.dry, self.verbosity, session, self.retrypolicy)
+        except Exception as e:
+            print(e.__str__())
+        finally:
+            if slots:
+                slots.release()
+        consumer(test)
+
+
+class WMSProcessPool:
+    """Distributes a WMSTestPlan across several processes, each generating only the tests of its own partition of the plan and running its own engine with its own connections. The completed tests are sent back to the calling process, where they are passed to the consumer, so that output and statistics are merged."""
+
+    processes = 1
+    engine = None
+
+    def __init__(self, processes, engine):
+        """Initializes the pool with the number of processes and the engine, e.g., a WMSWorkerPool, that every process runs with its partition of the plan."""
+        self.processes = processes if processes > 0 else 1
+        self.engine = engine
+
+    @staticmethod
+    def work(engine, plan, index, count, schedule, testscompleted):
+        """Runs the engine with the index-th of count partitions of the WMSTestPlan plan and the ArrivalSchedule schedule in a worker process. Every completed test is put into the multiprocessing.Queue testscompleted, followed by None. An exception raising from the engine is put into the queue as Exception before None."""
+        try:
+            engine.run(plan.partition(index, count), testscompleted.put, schedule)
+        except Exception as e:
+            testscompleted.put(Exception("Process " + str(index + 1) + " of " + str(count) + " failed: " + e.__str__()))
+        finally:
+            testscompleted.put(None)
+
+    def run(self, plan, consumer, schedule=None):
+        """Executes every WMSTest of the WMSTestPlan plan and passes each completed test to the callable consumer in the calling process. The processes share the optional ArrivalSchedule schedule. This method blocks until all tests are completed. If a process fails, its exception is raised after all processes have finished."""
+        schedule = schedule or ArrivalSchedule()
+        testscompleted = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=WMSProcessPool.work, args=(self.engine, plan, i, self.processes, schedule.partition(i, self.processes), testscompleted), daemon=True) for i in range(self.processes)]
+        failures = []
+        for w in workers:
+            w.start()
+        running = self.processes
+        while running:
+            test = testscompleted.get()
+            if test is None:
+                running -= 1
+            elif isinstance(test, Exception):
+                failures.append(test)
+            else:
+                consumer(test)
+        for w in workers:
+            w.join()
+        if failures:
+            raise failures[0]
+
+
+class LatencyHistogram:
+    """Streaming histogram of latencies in the style of HdrHistogram. Latencies are given in seconds and counted in logarithmic buckets of microseconds, each covering a relative range of at most 2^-precisionbits. Thus, the memory is bounded by the value range and not by the number of values."""
+    __slots__ = ["precisionbits", "buckets", "count", "sum", "min", "max"]
+
+    def __init__(self, precisionbits=7):
+        """Initializes an empty histogram whose buckets have a relative precision of 2^-precisionbits (default = 7, i.e., below 1%)."""
+        self.precisionbits = precisionbits
+        self.buckets = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def bucket(self, microseconds):
+        """Returns the bucket index of the given non-negative integer number of microseconds."""
+        shift = microseconds.bit_length() - self.precisionbits
+        if shift <= 0:
+            return microseconds
+        return (shift << (self.precisionbits - 1)) + (microseconds >> shift)
+
+    def bucketValue(self, index):
+        """Returns the latency in seconds represented by the bucket with the given index, i.e., the middle of its range."""
+        subbuckets = 1 << self.precisionbits
+        if index < subbuckets:
+            return index * 1e-6
+        shift = (index >> (self.precisionbits - 1)) - 1
+        mantissa = index - (shift << (self.precisionbits - 1))
+        return ((mantissa << shift) + ((1 << shift) - 1) / 2.0) * 1e-6
+
+    def record(self, latency, count=1):
+        """Records the latency in seconds count (default = 1) times."""
+        index = self.bucket(max(0, int(latency * 1e6)))
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.sum += latency * count
+        self.min = latency if self.min is None else min(self.min, latency)
+        self.max = latency if self.max is None else max(self.max, latency)
+
+    def merge(self, histogram):
+        """Adds all values of the given LatencyHistogram with the same precision to this histogram."""
+        for index, count in histogram.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += histogram.count
+        self.sum += histogram.sum
+        for value in [histogram.min, histogram.max]:
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        return self
+
+    def getMean(self):
+        """Returns the mean latency in seconds or None if the histogram is empty."""
+        return self.sum / self.count if self.count else None
+
+    def getPercentile(self, percentile):
+        """Returns the given percentile (between 0 and 100) of the latencies in seconds or None if the histogram is empty. The result is exact up to the precision of the buckets and always between min and max."""
+        if not self.count:
+            return None
+        rank = max(1, int(-(-percentile * self.count // 100)))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(max(self.bucketValue(index), self.min), self.max)
+        return self.max
+
+
+class PhaseProfiler:
+    """Measures the wall-clock time, the CPU time of the executing thread and the net number of allocated memory blocks of the phases of a run, e.g., the generation of the tests, createRequest, send and output. A phase is measured by calling begin before and end after it. Optionally, every thread running tests is profiled by cProfile or the allocations are traced by tracemalloc. With several threads, the allocated blocks of a phase include the allocations of other threads at the same time."""
+    PHASES = ["generate", "createRequest", "send", "output", "write"]
+    phases = {}
+    lock = None
+    mode = None
+    """the profiling mode None, "cprofile" or "tracemalloc" """
+    profiles = []
+
+    def __init__(self, mode=None):
+        """Initializes the profiler with the optional mode "cprofile" or "tracemalloc"."""
+        self.phases = {}
+        self.lock = Lock()
+        self.mode = mode
+        self.profiles = []
+        if mode == "tracemalloc":
+            tracemalloc.start()
+
+    @staticmethod
+    def begin():
+        """Returns the start values of a phase to be passed to end."""
+        return perf_counter(), thread_time(), sys.getallocatedblocks()
+
+    def end(self, phase, start, cpu=True):
+        """Adds the time since the values start returned by begin to the phase. If cpu is False, the CPU time is not measured, e.g., since the thread executes other coroutines in the meantime."""
+        wall, cputime, blocks = perf_counter() - start[0], thread_time() - start[1], sys.getallocatedblocks() - start[2]
+        with self.lock:
+            totals = self.phases.setdefault(phase, [0, 0.0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += wall
+            totals[2] += cputime if cpu else 0.0
+            totals[3] += blocks
+
+    def timeIterable(self, iterable, phase):
+        """Generates the items of the iterable while adding the time to get each item to the phase."""
+        iterator = iter(iterable)
+        while True:
+            start = self.begin()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.end(phase, start)
+            yield item
+
+    def startThread(self):
+        """Starts the cProfile profiling of the calling thread in the mode "cprofile" and returns the cProfile.Profile or None, which is passed to stopThread."""
+        if self.mode != "cprofile":
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def stopThread(self, profile):
+        """Stops the profiling of the calling thread started by startThread."""
+        if profile is not None:
+            profile.disable()
+            with self.lock:
+                self.profiles.append(profile)
+
+    def getRows(self):
+        """Returns one dictionary per measured phase with the number of measurements count, the total wall-clock and CPU times in seconds, the times per call and the mean number of net allocated blocks."""
+        rows = []
+        for phase in sorted(self.phases, key=lambda p: self.PHASES.index(p) if p in self.PHASES else self.PHASES.__len__()):
+            count, wall, cputime, blocks = self.phases[phase]
+            rows.append({"phase": phase, "count": count, "wall": wall, "cpu": cputime, "wallpercall": wall / count, "cpupercall": cputime / count, "blockspercall": blocks / count})
+        return rows
+
+    def outputReport(self, profilefile=None):
+        """Prints the phases and, in the mode "cprofile", the 25 functions with the highest cumulative time or, in the mode "tracemalloc", the 10 source lines with the most allocated memory to the console. The cProfile statistics of all threads are stored in the file at the path profilefile if given."""
+        IOTools.outputTable("Phases (wall and cpu in sec, blocks = net allocated memory blocks per call):", ["phase", "count", "wall", "cpu", "wallpercall", "cpupercall", "blockspercall"], self.getRows(), 1)
+        if self.mode == "cprofile" and self.profiles:
+            statistics = pstats.Stats(*self.profiles)
+            if profilefile:
+                statistics.dump_stats(profilefile)
+            statistics.sort_stats("cumulative").print_stats(25)
+        elif self.mode == "tracemalloc" and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            print("Top allocations:")
+            for statistic in snapshot.statistics("lineno")[:10]:
+                print("  " + str(statistic))
+
+
+class StatisticsCollector:
+    """Aggregates the results of tests in one LatencyHistogram per test class, layer and HTTP status code. Results without response are counted with the status "error" and without latency. The summary reports count, throughput, error rate and latency percentiles. The throughput of a test class and layer refers to the span from its first request sent to its last request completed, since the test classes and layers of a run are usually tested one after the other."""
+
+    PERCENTILES = [50, 90, 95, 99]
+    counts = {}
+    histograms = {}
+    transfers = {}
+    cachehits = {}
+    retries = {}
+    spans = {}
+    starttime = None
+    endtime = None
+
+    def __init__(self):
+        """Initializes an empty collector."""
+        self.counts = {}
+        self.histograms = {}
+        self.transfers = {}
+        self.cachehits = {}
+        self.retries = {}
+        self.spans = {}
+        self.starttime = None
+        self.endtime = None
+
+    def start(self):
+        """Marks the start of the run for the throughput computation."""
+        self.starttime = time()
+
+    def stop(self):
+        """Marks the end of the run for the throughput computation."""
+        self.endtime = time()
+
+    def add(self, testid, layer, status, latency=None, ttfb=None, totaltime=None, size=0, cache=None, retries=0, sent=None, completed=None):
+        """Adds one result of the test class testid and the layer with the HTTP status code status and the latency in seconds (None if unknown). If the body was downloaded, the time to the first byte ttfb, the total time totaltime in seconds and the size in bytes are given as well. The cache status cache is "hit", "miss" or None if unknown. The request was repeated retries times before this result. It was sent (or scheduled) at the time.time() value sent and completed at completed, both by default now."""
+        key = (testid, layer, status)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        now = time()
+        span = self.spans.setdefault(key[:2], [sent if sent is not None else now, completed if completed is not None else now])
+        span[0] = min(span[0], sent if sent is not None else now)
+        span[1] = max(span[1], completed if completed is not None else now)
+        if latency is not None:
+            if key not in self.histograms:
+                self.histograms[key] = LatencyHistogram()
+            self.histograms[key].record(latency)
+        if totaltime is not None:
+            transfer = self.transfers.setdefault(key, [0, 0.0, 0.0, 0])
+            transfer[0] += 1
+            transfer[1] += ttfb
+            transfer[2] += totaltime
+            transfer[3] += size
+        if cache:
+            hits = self.cachehits.setdefault(key, [0, 0])
+            hits[0 if cache == "hit" else 1] += 1
+        if retries:
+            self.retries[key] = self.retries.get(key, 0) + retries
+
+    def addTest(self, test):
+        """Adds the result of the given completed WMSTest."""
+        if test.result:
+            result = test.result
+            latency = result.getLatency()
+            sent = result.timestamp - result.delay
+            self.add(test.id, test.layers, result.getStatus(), latency, result.ttfb, result.totaltime, result.size, result.getCacheStatus(), result.retries, sent, None if latency is None else sent + latency)
+        else:
+            self.add(test.id, test.layers, "error")
+
+    @staticmethod
+    def isError(status):
+        """Returns True if and only if the given status represents a failed request."""
+        return status == "error" or status >= 400
+
+    def getDuration(self):
+        """Returns the duration of the run in seconds."""
+        return max((self.endtime or time()) - (self.starttime or time()), 1e-9)
+
+    def getSpan(self, testid, layer):
+        """Returns the time in seconds from the first request sent to the last request completed of the test class testid and the layer."""
+        first, last = self.spans.get((testid, layer), (0.0, 0.0))
+        return max(last - first, 1e-9)
+
+    def getRows(self):
+        """Returns the summary as list of dictionaries. For every test class and layer, a row with the status "all" is followed by one row per status code."""
+        groups = {}
+        for key in self.counts:
+            groups.setdefault(key[:2], []).append(key)
+        rows = []
+        for group in groups:
+            keys = sorted(groups[group], key=lambda k: str(k[2]))
+            total = LatencyHistogram()
+            totaltransfer = [0, 0.0, 0.0, 0]
+            totalhits = [0, 0]
+            for key in keys:
+                if key in self.histograms:
+                    total.merge(self.histograms[key])
+                for i, value in enumerate(self.transfers.get(key, [])):
+                    totaltransfer[i] += value
+                for i, value in enumerate(self.cachehits.get(key, [])):
+                    totalhits[i] += value
+            span = self.getSpan(group[0], group[1])
+            rows.append(self.getRow(group[0], group[1], "all", sum(self.counts[k] for k in keys), sum(self.counts[k] for k in keys if self.isError(k[2])), total, totaltransfer, totalhits, sum(self.retries.get(k, 0) for k in keys), span))
+            for key in keys:
+                rows.append(self.getRow(key[0], key[1], key[2], self.counts[key], self.counts[key] if self.isError(key[2]) else 0, self.histograms.get(key, LatencyHistogram()), self.transfers.get(key, [0, 0.0, 0.0, 0]), self.cachehits.get(key, [0, 0]), self.retries.get(key, 0), span))
+        return rows
+
+    def getRow(self, testid, layer, status, count, errors, histogram, transfer, hits, retries=0, span=None):
+        """Returns one summary row as dictionary. The list transfer contains the number of downloaded bodies, the sums of their times to the first byte and of their total times as well as their total size. The list hits contains the numbers of cache hits and misses. The requests were repeated retries times in total. The throughput refers to the span in seconds (default: the duration of the run)."""
+        row = {"test": testid, "layer": layer, "status": status, "count": count, "throughput": count / (span or self.getDuration()), "errorrate": errors / count, "min": histogram.min, "mean": histogram.getMean()}
+        for p in self.PERCENTILES:
+            row["p" + str(p)] = histogram.getPercentile(p)
+        row["max"] = histogram.max
+        row["ttfb"] = transfer[1] / transfer[0] if transfer[0] else None
+        row["bytes"] = transfer[3] // transfer[0] if transfer[0] else None
+        row["MB/s"] = transfer[3] / transfer[2] / 1e6 if transfer[2] else None
+        row["hitratio"] = hits[0] / (hits[0] + hits[1]) if hits[0] + hits[1] else None
+        row["retries"] = retries
+        return row
+
+    def outputSummary(self):
+        """Prints the summary as table to the console."""
+        columns = ["test", "layer", "status", "count", "throughput", "errorrate", "min", "mean"] + ["p" + str(p) for p in self.PERCENTILES] + ["max", "ttfb", "bytes", "MB/s", "hitratio", "retries"]
+        IOTools.outputTable("Summary (latencies in sec, throughput in requests/sec while the test class and layer were tested, run of " + "%.1f" % self.getDuration() + " sec):", columns, self.getRows())
+
+    def writeSummary(self, summaryfile, CSVseparator=';'):
+        """Writes the summary to the file at the given path. If the path ends with ".json", the rows are stored as JSON list, otherwise as CSV with the given separator (default: ";")."""
+        IOTools.writeRows(summaryfile, self.getRows(), CSVseparator, {"duration": self.getDuration()})
+
+
+class RollingMetrics:
+    """Aggregates the completed tests of a running test in buckets of one second per layer, which are kept for the longest window. For the windows of the last 1, 10 and 60 completed seconds, the throughput, the latency percentiles and the number of errors per layer are available live: as Prometheus text by an HTTP endpoint and as periodic log line. The methods are thread-safe."""
+    WINDOWS = [1, 10, 60]
+    PERCENTILES = [50, 95, 99]
+    buckets = {}
+    totals = {}
+    retries = {}
+    firstsecond = None
+    lock = None
+    httpserver = None
+    stopped = None
+
+    def __init__(self):
+        """Initializes empty metrics."""
+        self.buckets = {}
+        self.totals = {}
+        self.retries = {}
+        self.lock = Lock()
+        self.stopped = Event()
+
+    def addTest(self, test, now=None):
+        """Adds the given completed WMSTest at the time.time() value now (default: the current time)."""
+        second = int(now if now is not None else time())
+        status = test.result.getStatus() if test.result else "error"
+        latency = test.result.getLatency() if test.result else None
+        with self.lock:
+            ring = self.buckets.setdefault(test.layers, [None] * max(self.WINDOWS))
+            slot = second % ring.__len__()
+            if ring[slot] is None or ring[slot][0] != second:
+                ring[slot] = [second, 0, 0, LatencyHistogram()]
+            bucket = ring[slot]
+            bucket[1] += 1
+            if StatisticsCollector.isError(status):
+                bucket[2] += 1
+            if latency is not None:
+                bucket[3].record(latency)
+            key = (test.layers, status)
+            self.totals[key] = self.totals.get(key, 0) + 1
+            if test.result and test.result.retries:
+                self.retries[test.layers] = self.retries.get(test.layers, 0) + test.result.retries
+            if self.firstsecond is None:
+                self.firstsecond = second
+
+    def getSpan(self, seconds, now=None):
+        """Returns the number of full seconds of the window of the last seconds before now (default: the current time) that passed since the first test was added, at least 1."""
+        current = int(now if now is not None else time())
+        return max(1, min(seconds, current - (self.firstsecond if self.firstsecond is not None else current)))
+
+    def getWindow(self, layer, seconds, now=None):
+        """Returns the number of tests, the number of errors and the merged LatencyHistogram of the layer completed in the last seconds full seconds before now (default: the current time). Divide the number of tests by getSpan for the throughput."""
+        current = int(now if now is not None else time())
+        count, errors, histogram = 0, 0, LatencyHistogram()
+        with self.lock:
+            for bucket in self.buckets.get(layer, []):
+                if bucket is not None and current - seconds <= bucket[0] < current:
+                    count += bucket[1]
+                    errors += bucket[2]
+                    histogram.merge(bucket[3])
+        return count, errors, histogram
+
+    def getPrometheusText(self, now=None):
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = ["# HELP wmstester_requests_total Completed requests by layer and HTTP status.", "# TYPE wmstester_requests_total counter"]
+        with self.lock:
+            totals = dict(self.totals)
+            retries = dict(self.retries)
+            layers = sorted(self.buckets)
+        for (layer, status), count in sorted(totals.items(), key=str):
+            lines.append('wmstester_requests_total{layer="%s",status="%s"} %d' % (self.escape(layer), status, count))
+        lines += ["# HELP wmstester_retries_total Repeated requests by layer after overload signals or stale connections.", "# TYPE wmstester_retries_total counter"]
+        lines += ['wmstester_retries_total{layer="%s"} %d' % (self.escape(layer), retries.get(layer, 0)) for layer in layers]
+        windows = {(layer, seconds): self.getWindow(layer, seconds, now) for layer in layers for seconds in self.WINDOWS}
+        lines += ["# HELP wmstester_throughput Completed requests per second in the window.", "# TYPE wmstester_throughput gauge"]
+        lines += ['wmstester_throughput{layer="%s",window="%ds"} %g' % (self.escape(layer), seconds, window[0] / self.getSpan(seconds, now)) for (layer, seconds), window in windows.items()]
+        lines += ["# HELP wmstester_errors Failed requests in the window.", "# TYPE wmstester_errors gauge"]
+        lines += ['wmstester_errors{layer="%s",window="%ds"} %d' % (self.escape(layer), seconds, window[1]) for (layer, seconds), window in windows.items()]
+        lines += ["# HELP wmstester_latency_seconds Latency quantiles in the window.", "# TYPE wmstester_latency_seconds gauge"]
+        for (layer, seconds), window in windows.items():
+            for p in self.PERCENTILES:
+                value = window[2].getPercentile(p)
+                lines.append('wmstester_latency_seconds{layer="%s",window="%ds",quantile="%g"} %s' % (self.escape(layer), seconds, p / 100.0, "NaN" if value is None else "%g" % value))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def escape(value):
+        """Escapes the given label value for the Prometheus text format."""
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def getLogLine(self, seconds=10, now=None):
+        """Returns one line with the throughput, the p95 latency and the errors of every layer in the last seconds (default = 10) full seconds."""
+        with self.lock:
+            layers = sorted(self.buckets)
+        parts = []
+        for layer in layers:
+            count, errors, histogram = self.getWindow(layer, seconds, now)
+            p95 = histogram.getPercentile(95)
+            parts.append(layer + ": " + "%.1f" % (count / self.getSpan(seconds, now)) + " requests/sec, p95 " + ("-" if p95 is None else "%.4f" % p95) + " sec, " + str(errors) + " errors")
+        return datetime.now().strftime("%H:%M:%S") + " last " + str(seconds) + " sec - " + (" | ".join(parts) if parts else "no requests")
+
+    def startServer(self, port):
+        """Serves the metrics in the Prometheus text format at http://localhost:port/metrics in a background thread."""
+        metrics = self
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            """Answers GET /metrics with the metrics."""
+            def do_GET(self):
+                """Sends the metrics or "not found" (404) for other paths."""
+                body = metrics.getPrometheusText().encode() if urlsplit(self.path).path == "/metrics" else b"Not found"
+                self.send_response(200 if body != b"Not found" else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, format, *args):
+                """Suppresses the logging of every request."""
+        self.httpserver = ThreadingHTTPServer(("", port), MetricsRequestHandler)
+        self.httpserver.daemon_threads = True
+        Thread(target=self.httpserver.serve_forever, daemon=True).start()
+
+    def startLog(self, interval):
+        """Prints the log line of the last interval seconds (rounded up) every interval seconds in a background thread."""
+        def log():
+            """Prints the log line until the metrics are stopped."""
+            while not self.stopped.wait(interval):
+                print(self.getLogLine(max(1, int(-(-interval // 1)))), flush=True)
+        Thread(target=log, daemon=True).start()
+
+    def stop(self):
+        """Stops the HTTP endpoint and the periodic log line."""
+        self.stopped.set()
+        if self.httpserver:
+            self.httpserver.shutdown()
+            self.httpserver.server_close()
+
+
+class LatencyHeatmap:
+    """Aggregates the latencies of the tests in the cells of a regular grid over the spatial extent per layer and scale band. A test is counted in the cell containing the center of its bounding box. The scale band of a test is the binary logarithm of its resolution in map units per pixel, i.e., the maximum of box width / map width and box height / map height, rounded down, so that every band covers a factor 2 of resolutions like the zoom levels of a tile pyramid."""
+    extent = Box(-180.0, -90.0, 180.0, 90.0)
+    columns = 36
+    rows = 18
+    cells = {}
+    COLUMNS = ["layer", "band", "minresolution", "maxresolution", "column", "row", "lowerx", "lowery", "upperx", "uppery", "count", "errors", "mean", "p95", "bytes"]
+
+    def __init__(self, extent=None, columns=36, rows=18):
+        """Initializes the heatmap with the Box extent (default: -180,-90,180,90) divided into columns x rows cells (default: 36 x 18, i.e., 10 degrees)."""
+        if columns <= 0 or rows <= 0:
+            raise Exception("The numbers of columns and rows of the heatmap must be positive.")
+        self.extent = extent or Box(-180.0, -90.0, 180.0, 90.0)
+        self.columns = columns
+        self.rows = rows
+        self.cells = {}
+
+    def getCell(self, box, width, height):
+        """Returns the tuple (scale band, column, row) of the given Box requested as map of width x height pixels. Boxes outside the extent are counted in the nearest cell."""
+        resolution = max(box.getWidth() / width, box.getHeight() / height) if width and height else 0.0
+        band = floor(log2(resolution)) if resolution > 0 else None
+        x, y = box.getCenter()
+        column = floor((x - self.extent.lowerx) / self.extent.getWidth() * self.columns)
+        row = floor((y - self.extent.lowery) / self.extent.getHeight() * self.rows)
+        return band, min(max(column, 0), self.columns - 1), min(max(row, 0), self.rows - 1)
+
+    def addTest(self, test):
+        """Adds the given completed WMSTest. Failed requests are counted as errors without latency."""
+        try:
+            band, column, row = self.getCell(test.boundingbox, float(test.width), float(test.height))
+        except (TypeError, ValueError):
+            return
+        cell = self.cells.setdefault((test.layers, band, column, row), [0, 0, LatencyHistogram(), 0])
+        cell[0] += 1
+        result = test.result
+        if result is None or result.response is None or result.response.status_code >= 400:
+            cell[1] += 1
+        else:
+            cell[2].record(result.getLatency())
+            cell[3] += result.size
+
+    def getRows(self):
+        """Returns one dictionary with the keys of COLUMNS per non-empty cell, sorted by layer, band, row and column. The resolutions of the band are given in map units per pixel, the latencies in seconds and bytes as mean size of the successful responses."""
+        rows = []
+        for (layer, band, column, row) in sorted(self.cells, key=lambda k: (k[0], -1e9 if k[1] is None else k[1], k[3], k[2])):
+            count, errors, histogram, size = self.cells[(layer, band, column, row)]
+            cellwidth, cellheight = self.extent.getWidth() / self.columns, self.extent.getHeight() / self.rows
+            rows.append({"layer": layer, "band": band, "minresolution": None if band is None else 2.0 ** band, "maxresolution": None if band is None else 2.0 ** (band + 1), "column": column, "row": row, "lowerx": self.extent.lowerx + column * cellwidth, "lowery": self.extent.lowery + row * cellheight, "upperx": self.extent.lowerx + (column + 1) * cellwidth, "uppery": self.extent.lowery + (row + 1) * cellheight, "count": count, "errors": errors, "mean": histogram.getMean(), "p95": histogram.getPercentile(95), "bytes": size / histogram.count if histogram.count else None})
+        return rows
+
+    def write(self, outputfile, CSVseparator=';'):
+        """Writes the cells to the file at the given path as GeoJSON FeatureCollection of cell polygons if the path ends with ".geojson" or ".json", otherwise as CSV with the given separator (default: ";")."""
+        rows = self.getRows()
+        if not outputfile.lower().endswith((".geojson", ".json")):
+            IOTools.writeRows(outputfile, rows, CSVseparator)
+            return
+        features = []
+        for row in rows:
+            ring = [[row["lowerx"], row["lowery"]], [row["upperx"], row["lowery"]], [row["upperx"], row["uppery"]], [row["lowerx"], row["uppery"]], [row["lowerx"], row["lowery"]]]
+            features.append({"type": "Feature", "geometry": {"type": "Polygon", "coordinates": [ring]}, "properties": {k: v for k, v in row.items() if k not in ["lowerx", "lowery", "upperx", "uppery"]}})
+        with open(outputfile, "w") as f:
+            json.dump({"type": "FeatureCollection", "features": features}, f)
+
+
+class LayerComparison:
+    """Compares the latencies of several layers (or variants, e.g., the layers of two stored runs) on identical bounding boxes. The k-th request of a test class and box to a variant is paired with the k-th request of the same test class and box to every other variant. Every variant is compared with the first one, the reference, by the paired differences of the latencies and the ratio of the latencies. Only pairs of successful responses are used. Differences and ratios are given with confidence intervals based on Student's t-distribution, the p-values stem from the paired t-test on the logarithmic ratios and from the Wilcoxon signed-rank test (normal approximation)."""
+    CONFIDENCE = 0.95
+    variants = []
+    pending = {}
+    occurrences = {}
+    differences = {}
+    logratios = {}
+    excluded = 0
+    COLUMNS = ["layer", "reference", "pairs", "meandiff", "difflow", "diffhigh", "mediandiff", "ratio", "ratiolow", "ratiohigh", "tpvalue", "wilcoxonpvalue", "verdict"]
+
+    def __init__(self, variants):
+        """Initializes the comparison of the given list of variant names whose first one is the reference."""
+        if variants.__len__() < 2:
+            raise Exception("At least two layers are required for a comparison.")
+        self.variants = list(variants)
+        self.pending = {}
+        self.occurrences = {}
+        self.differences = {v: array("d") for v in self.variants[1:]}
+        self.logratios = {v: array("d") for v in self.variants[1:]}
+        self.excluded = 0
+
+    def add(self, variant, testid, box, latency):
+        """Adds the latency in seconds of a request of the test class testid with the box given as tuple (lowerx, lowery, upperx, uppery) to the variant. The latency is None for a failed request. A pair is evaluated as soon as all variants have been added."""
+        occurrence = self.occurrences.get((testid, box, variant), 0)
+        self.occurrences[(testid, box, variant)] = occurrence + 1
+        key = (testid, box, occurrence)
+        latencies = self.pending.setdefault(key, {})
+        latencies[variant] = latency
+        if latencies.__len__() == self.variants.__len__():
+            del self.pending[key]
+            if all(self.occurrences[(testid, box, v)] == occurrence + 1 for v in self.variants):
+                for v in self.variants:
+                    del self.occurrences[(testid, box, v)]
+            reference = latencies[self.variants[0]]
+            if reference is None or not reference > 0 or any(latencies[v] is None or not latencies[v] > 0 for v in self.differences):
+                self.excluded += 1
+                return
+            for v in self.differences:
+                self.differences[v].append(latencies[v] - reference)
+                self.logratios[v].append(log(latencies[v] / reference))
+
+    def addTest(self, test):
+        """Adds the given completed WMSTest using its layer as variant."""
+        if test.layers in self.variants:
+            box = test.boundingbox
+            latency = test.result.getLatency() if test.result is not None and test.result.response is not None and test.result.response.status_code < 400 else None
+            self.add(test.layers, test.id, (box.lowerx, box.lowery, box.upperx, box.uppery), latency)
+
+    @staticmethod
+    def betainc(a, b, x):
+        """Returns the regularized incomplete beta function I_x(a, b) evaluated by its continued fraction."""
+        if x <= 0.0 or x >= 1.0:
+            return 0.0 if x <= 0.0 else 1.0
+        if x > (a + 1.0) / (a + b + 2.0):
+            return 1.0 - LayerComparison.betainc(b, a, 1.0 - x)
+        front = exp(lgamma(a + b) - lgamma(a) - lgamma(b) + a * log(x) + b * log(1.0 - x)) / a
+        c, d = 1.0, 1.0 - (a + b) * x / (a + 1.0)
+        d = 1.0 / (d if abs(d) > 1e-300 else 1e-300)
+        f = d
+        for m in range(1, 300):
+            for numerator in [m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)), -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))]:
+                d = 1.0 + numerator * d
+                d = 1.0 / (d if abs(d) > 1e-300 else 1e-300)
+                c = 1.0 + numerator / c
+                c = c if abs(c) > 1e-300 else 1e-300
+                f *= c * d
+            if abs(c * d - 1.0) < 1e-12:
+                break
+        return front * f
+
+    @staticmethod
+    def tPValue(t, df):
+        """Returns the two-sided p-value of the value t of Student's t-distribution with df degrees of freedom."""
+        return LayerComparison.betainc(df / 2.0, 0.5, df / (df + t * t))
+
+    @staticmethod
+    def tQuantile(confidence, df):
+        """Returns the value t for which the two-sided confidence interval of Student's t-distribution with df degrees of freedom has the given confidence."""
+        lower, upper = 0.0, 1.0
+        while LayerComparison.tPValue(upper, df) > 1.0 - confidence:
+            upper *= 2.0
+        for i in range(100):
+            middle = (lower + upper) / 2.0
+            if LayerComparison.tPValue(middle, df) > 1.0 - confidence:
+                lower = middle
+            else:
+                upper = middle
+        return (lower + upper) / 2.0
+
+    @staticmethod
+    def meanInterval(values, confidence):
+        """Returns the mean, the lower and the upper bound of its confidence interval and the p-value of the t-test for a mean of 0 of the given values. Bounds and p-value are None for less than two values."""
+        n = values.__len__()
+        mean = sum(values) / n
+        if n < 2:
+            return mean, None, None, None
+        deviation = sqrt(sum((v - mean) ** 2 for v in values) / (n - 1))
+        error = deviation / sqrt(n)
+        if error == 0.0:
+            return mean, mean, mean, 0.0 if mean else 1.0
+        t = LayerComparison.tQuantile(confidence, n - 1)
+        return mean, mean - t * error, mean + t * error, LayerComparison.tPValue(mean / error, n - 1)
+
+    @staticmethod
+    def wilcoxonPValue(values):
+        """Returns the two-sided p-value of the Wilcoxon signed-rank test for a median of 0 of the given values using the normal approximation with correction for ties. Zeros are dropped. None is returned if no value is left."""
+        nonzero = sorted((abs(v), v > 0) for v in values if v != 0.0)
+        n = nonzero.__len__()
+        if not n:
+            return None
+        positive, ties, i = 0.0, 0.0, 0
+        while i < n:
+            j = i
+            while j < n and nonzero[j][0] == nonzero[i][0]:
+                j += 1
+            rank = (i + j + 1) / 2.0
+            positive += rank * sum(1 for k in range(i, j) if nonzero[k][1])
+            ties += (j - i) ** 3 - (j - i)
+            i = j
+        variance = n * (n + 1) * (2 * n + 1) / 24.0 - ties / 48.0
+        if variance <= 0.0:
+            return 1.0
+        return erfc(abs(positive - n * (n + 1) / 4.0) / sqrt(2.0 * variance))
+
+    def getRows(self):
+        """Returns one dictionary with the keys of COLUMNS per compared variant. Differences are given in seconds, the ratio is the geometric mean of the latency ratios of variant and reference."""
+        rows = []
+        alpha = 1.0 - self.CONFIDENCE
+        for v in self.differences:
+            differences, logratios = self.differences[v], self.logratios[v]
+            row = {c: None for c in self.COLUMNS}
+            row.update({"layer": v, "reference": self.variants[0], "pairs": differences.__len__(), "verdict": "not enough pairs"})
+            if differences.__len__():
+                row["meandiff"], row["difflow"], row["diffhigh"], p = self.meanInterval(differences, self.CONFIDENCE)
+                ordered = sorted(differences)
+                middle = ordered.__len__() // 2
+                row["mediandiff"] = ordered[middle] if ordered.__len__() % 2 else (ordered[middle - 1] + ordered[middle]) / 2.0
+                mean, low, high, row["tpvalue"] = self.meanInterval(logratios, self.CONFIDENCE)
+                row["ratio"], row["ratiolow"], row["ratiohigh"] = exp(mean), None if low is None else exp(low), None if high is None else exp(high)
+                row["wilcoxonpvalue"] = self.wilcoxonPValue(differences)
+                if row["tpvalue"] is not None and row["tpvalue"] < alpha:
+                    change = "%.1f%% faster" % (100.0 * (1.0 - row["ratio"])) if row["ratio"] < 1.0 else "%.1f%% slower" % (100.0 * (row["ratio"] - 1.0))
+                    row["verdict"] = v + " is " + change + " than " + self.variants[0] + " (latency ratio %.3f, %g%% confidence interval %.3f to %.3f, p = %.2g)" % (row["ratio"], 100 * self.CONFIDENCE, row["ratiolow"], row["ratiohigh"], row["tpvalue"])
+                elif row["tpvalue"] is not None:
+                    row["verdict"] = "no significant difference between " + v + " and " + self.variants[0] + " (p = %.2g)" % row["tpvalue"]
+            rows.append(row)
+        return rows
+
+    def outputReport(self):
+        """Prints the comparison as table followed by the verdicts to the console."""
+        rows = self.getRows()
+        IOTools.outputTable("Paired comparison (" + "%g" % (100 * self.CONFIDENCE) + "% confidence, differences in sec, ratio = geometric mean of latency / reference latency" + (", " + str(self.excluded) + " pairs with failed requests excluded" if self.excluded else "") + "):", self.COLUMNS[:-1], rows, 2)
+        for row in rows:
+            print("  " + row["verdict"])
+
+    @staticmethod
+    def readRun(outputfile, CSVseparator=';'):
+        """Generates the tuples (test id, layer, box, latency) of a run stored by --output-file as CSV, SQLite (.sqlite, .db) or npz file. The box is a tuple (lowerx, lowery, upperx, uppery). The latency is None if the request failed."""
+        extension = path.splitext(outputfile)[1].lower()
+        if extension in [".sqlite", ".db"]:
+            connection = sqlite3.connect(outputfile)
+            try:
+                for testid, layer, lowerx, lowery, upperx, uppery, status, latency in connection.execute("SELECT test, layer, lowerx, lowery, upperx, uppery, status, latency FROM results ORDER BY rowid"):
+                    yield testid, layer, (lowerx, lowery, upperx, uppery), latency if str(status).startswith("2") else None
+            finally:
+                connection.close()
+        elif extension == ".npz":
+            if np is None:
+                raise Exception("Reading npz files requires the package numpy.")
+            with np.load(outputfile) as run:
+                cols = {k: run[k].tolist() for k in run.files}
+            tests, layers, statuses = cols["tests"], cols["layers"], cols["statuses"]
+            for test, layer, lowerx, lowery, upperx, uppery, status, latency in zip(cols["test"], cols["layer"], cols["lowerx"], cols["lowery"], cols["upperx"], cols["uppery"], cols["status"], cols["latency"]):
+                yield tests[test], layers[layer], (lowerx, lowery, upperx, uppery), latency if statuses[status].startswith("2") and latency == latency else None
+        else:
+            with open(outputfile) as f:
+                for line in f:
+                    fields = line.rstrip("\n").split(CSVseparator)
+                    if fields.__len__() < 7:
+                        continue
+                    bbox = {k.lower(): v for k, v in parse_qsl(urlsplit(fields[2]).query)}.get("bbox")
+                    if bbox:
+                        yield fields[0], fields[1], tuple(float(c) for c in bbox.split(",")), float(fields[6]) if fields[3].startswith("2") and fields[6] else None
+
+    @staticmethod
+    def compareRuns(outputfiles, CSVseparator=';'):
+        """Returns the LayerComparison of the runs stored in the given list of files. The variants are the layers of the runs in alphabetical order per run. If a layer occurs in more than one run, the variants are named run number:layer. The first layer of the first run is the reference."""
+        layers = [sorted(set(r[1] for r in LayerComparison.readRun(f, CSVseparator))) for f in outputfiles]
+        for outputfile, runlayers in zip(outputfiles, layers):
+            if not runlayers:
+                raise Exception("The run " + outputfile + " contains no results with bounding boxes. Runs must be stored with --output-format csv, sqlite or npz.")
+        qualified = sum(l.__len__() for l in layers) != set(x for l in layers for x in l).__len__()
+        name = lambda i, layer: str(i + 1) + ":" + layer if qualified else layer
+        comparison = LayerComparison([name(i, layer) for i in range(outputfiles.__len__()) for layer in layers[i]])
+        for i, outputfile in enumerate(outputfiles):
+            for testid, layer, box, latency in LayerComparison.readRun(outputfile, CSVseparator):
+                comparison.add(name(i, layer), testid, box, latency)
+        return comparison
+
+
+class TiledViewEngine:
+    """Splits the box of every WMSTest, i.e., the view of a map client, into rows x columns sub-tiles of the map size width/columns x height/rows and sends all tiles of a view at the same time, like web clients such as OpenLayers do. The tiles of a view are sent by the connections WMSWorker threads of its own view slot, each with its own Session, so that a per-connection limit of a client can be modeled by fewer connections than tiles. Besides every tile, which is passed to the consumer, the completion time of every view, i.e., the time until its slowest tile is received, and the spread between its fastest and its slowest tile are recorded per test class and layer."""
+    COLUMNS = ["test", "layer", "views", "errorrate", "min", "mean"] + ["p" + str(p) for p in StatisticsCollector.PERCENTILES] + ["max", "spread", "spreadp95", "spreadmax"]
+    rows = 1
+    columns = 1
+    connections = 1
+    concurrency = 1
+    dry = False
+    verbosity = 0
+    retrypolicy = None
+    warmup = 0.0
+    counts = {}
+    errors = {}
+    completions = {}
+    spreads = {}
+
+    def __init__(self, rows=2, columns=2, connections=None, concurrency=1, dry = False, verbosity=0, retrypolicy=None, warmup=0.0):
+        """Initializes the engine splitting every view into rows x columns (default = 2 x 2) tiles sent over connections (default: one per tile) connections per view. At most concurrency (default = 1) views are in flight unless the schedule is open-loop, in which case every view is sent at once over connections connections of its own. The tiles are executed with the additional parameters dry (default = False), verbosity (default = 0) and the RetryPolicy retrypolicy (default: no retries). Views due within the first warmup seconds are not recorded."""
+        if rows <= 0 or columns <= 0:
+            raise Exception("The numbers of rows and columns of a view must be positive.")
+        self.rows = rows
+        self.columns = columns
+        self.connections = connections if connections and connections > 0 else rows * columns
+        self.concurrency = concurrency if concurrency > 0 else 1
+        self.dry = dry
+        self.verbosity = verbosity
+        self.retrypolicy = retrypolicy
+        self.warmup = warmup
+        self.counts = {}
+        self.errors = {}
+        self.completions = {}
+        self.spreads = {}
+
+    def splitView(self, view, index):
+        """Returns the list of the tiles of the WMSTest view as tests of the same class, row by row from the upper left tile. Every tile carries the index of its view and its position (row, column) as properties view and tile."""
+        box = view.boundingbox
+        xs = [round(box.lowerx + (box.upperx - box.lowerx) * c / self.columns, 9) for c in range(self.columns)] + [box.upperx]
+        ys = [round(box.uppery - (box.uppery - box.lowery) * r / self.rows, 9) for r in range(self.rows)] + [box.lowery]
+        tiles = []
+        for r in range(self.rows):
+            for c in range(self.columns):
+                tile = view.__class__(view.server, view.layers, max(1, view.width // self.columns), max(1, view.height // self.rows), Box(xs[c], ys[r + 1], xs[c + 1], ys[r]))
+                tile.scheduledtime = view.scheduledtime
+                tile.view = index
+                tile.tile = (r, c)
+                tiles.append(tile)
+        return tiles
+
+    def addSlot(self, queues, testscompleted):
+        """Adds a view slot, i.e., a Queue of pending tiles served by connections WMSWorker threads of its own, to the list queues and returns its index. The workers put the completed tiles into the SimpleQueue testscompleted."""
+        pending = Queue()
+        for w in range(self.connections):
+            WMSWorker(pending, testscompleted, self.dry, self.verbosity, self.retrypolicy).start()
+        queues.append(pending)
+        return queues.__len__() - 1
+
+    def feed(self, tests, schedule, queues, free, testscompleted, starts, failures):
+        """Puts the tiles of every view of the iterable tests according to the ArrivalSchedule schedule into the queue of a free view slot, whose index is taken from the Queue free. If no slot is free, a new slot is added to the list queues by addSlot, unless the schedule is closed-loop and concurrency slots exist, in which case the view waits for a free slot. The time.time() value at which a view is due and its slot are stored in the dictionary starts by the index of the view. Finally, every worker gets None and None is put into testscompleted. An exception raised while generating the views is appended to the list failures."""
+        profile = PROFILER.startThread() if PROFILER else None
+        limit = None if schedule.isOpenLoop() else self.concurrency
+        try:
+            for index, view in enumerate(schedule.pace(tests)):
+                try:
+                    slot = free.get(limit is not None and queues.__len__() >= limit)
+                except Empty:
+                    slot = self.addSlot(queues, testscompleted)
+                starts[index] = (time() - view.getDelay(), slot)
+                for tile in self.splitView(view, index):
+                    queues[slot].put(tile)
+        except Exception as e:
+            failures.append(e)
+        finally:
+            if PROFILER: PROFILER.stopThread(profile)
+            for pending in queues:
+                for w in range(self.connections):
+                    pending.put(None)
+            testscompleted.put(None)
+
+    def run(self, tests, consumer, schedule=None):
+        """Executes the tiles of every view of the iterable tests and passes each completed tile to the callable consumer in the calling thread. The views are dispatched according to the optional ArrivalSchedule schedule. Every view in flight has a slot of connections workers of its own, which is handed over to the next view when all tiles of the view are completed. This method blocks until all tiles are completed. If the views cannot be generated, the exception is raised after the tiles sent so far are completed."""
+        schedule = schedule or ArrivalSchedule()
+        queues = []
+        free = Queue()
+        testscompleted = SimpleQueue()
+        starts = {}
+        views = {}
+        failures = []
+        begin = time() + self.warmup
+        Thread(target=self.feed, args=(tests, schedule, queues, free, testscompleted, starts, failures), daemon=True).start()
+        stopped = 0
+        while stopped <= queues.__len__() * self.connections:
+            tile = testscompleted.get()
+            if tile is None:
+                stopped += 1
+                continue
+            view = views.setdefault(tile.view, [0, None, None, False])
+            view[0] += 1
+            if tile.result is not None and tile.result.response is not None:
+                end = tile.result.timestamp + (tile.result.totaltime or 0.0)
+                view[1] = end if view[1] is None else min(view[1], end)
+                view[2] = end if view[2] is None else max(view[2], end)
+                view[3] = view[3] or tile.result.response.status_code >= 400
+            elif not self.dry:
+                view[3] = True
+            if view[0] == self.rows * self.columns:
+                del views[tile.view]
+                start, slot = starts.pop(tile.view)
+                if start >= begin:
+                    self.addView(tile.id, tile.layers, None if view[2] is None else view[2] - start, None if view[2] is None else view[2] - view[1], view[3])
+                free.put(slot)
+            consumer(tile)
+        if failures:
+            raise failures[0]
+
+    def addView(self, testid, layer, completion, spread, failed):
+        """Records a view of the test class testid and the layer with its completion time and the spread between its tiles in seconds (None if no tile was received) and whether one of its tiles failed."""
+        key = (testid, layer)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.errors[key] = self.errors.get(key, 0) + (1 if failed else 0)
+        if completion is not None:
+            self.completions.setdefault(key, LatencyHistogram()).record(completion)
+            self.spreads.setdefault(key, LatencyHistogram()).record(spread)
+
+    def getRows(self):
+        """Returns the statistics of the views as list of dictionaries with the keys of COLUMNS. The completion times are given by min, mean, the percentiles and max, the spreads by their mean (spread), p95 and max."""
+        rows = []
+        for key in self.counts:
+            completion = self.completions.get(key, LatencyHistogram())
+            spread = self.spreads.get(key, LatencyHistogram())
+            row = {"test": key[0], "layer": key[1], "views": self.counts[key], "errorrate": self.errors[key] / self.counts[key], "min": completion.min, "mean": completion.getMean()}
+            for p in StatisticsCollector.PERCENTILES:
+                row["p" + str(p)] = completion.getPercentile(p)
+            row["max"] = completion.max
+            row["spread"] = spread.getMean()
+            row["spreadp95"] = spread.getPercentile(95)
+            row["spreadmax"] = spread.max
+            rows.append(row)
+        return rows
+
+    def outputReport(self):
+        """Prints the statistics of the views as table to the console."""
+        IOTools.outputTable("Map views (" + str(self.rows) + " x " + str(self.columns) + " tiles over " + str(self.connections) + " connections per view, completion time of the slowest tile and spread between the fastest and the slowest tile in sec):", self.COLUMNS, self.getRows(), 2)
+
+
+class CapacitySearch:
+    """Searches the maximum sustainable throughput of every layer by raising the load level, i.e., the number of simultaneous tests or, in an open-loop search, the rate in tests per second. Every level is held for hold seconds after warmup seconds whose tests are excluded. A level is sustainable if its p95 latency does not exceed the latency SLO (if given) and its error rate does not exceed maxerrorrate. The levels are raised by step until a level fails ("step") or doubled until a level fails and then bisected down to step ("binary")."""
+    MODES = ["step", "binary"]
+    plan = None
+    engine = "pool"
+    mode = "step"
+    openloop = False
+    start = 1
+    step = 1
+    maximum = 64
+    hold = 30.0
+    warmup = 5.0
+    slo = None
+    maxerrorrate = 0.01
+    concurrency = 1
+    verbosity = 0
+    consumer = None
+    retrypolicy = None
+    rows = []
+    COLUMNS = ["layer", "level", "count", "throughput", "errorrate", "p50", "p95", "p99", "sustainable"]
+
+    def __init__(self, plan, engine="pool", mode="step", openloop=False, start=1, step=1, maximum=64, hold=30.0, warmup=5.0, slo=None, maxerrorrate=0.01, concurrency=1, verbosity=0, consumer=None, retrypolicy=None):
+        """Initializes the search for the layers of the WMSTestPlan plan, whose count should be large enough to keep the load up for warmup + hold seconds, using the engine name engine and the search mode being one of MODES. The levels start at start, are raised by step and do not exceed maximum. If openloop is True, the levels are rates and the engine runs with the given concurrency, otherwise the levels are numbers of simultaneous tests. The latency SLO is given in seconds. Every measured test is additionally passed to the optional callable consumer. The requests are repeated according to the optional RetryPolicy retrypolicy."""
+        if mode not in self.MODES:
+            raise Exception("The search mode must be one of " + ", ".join(self.MODES) + ": " + mode)
+        if start <= 0 or step <= 0 or maximum < start:
+            raise Exception("The levels must be positive and the start must not exceed the maximum.")
+        self.plan = plan
+        self.engine = engine
+        self.mode = mode
+        self.openloop = openloop
+        self.start = start
+        self.step = step
+        self.maximum = maximum
+        self.hold = hold
+        self.warmup = warmup
+        self.slo = slo
+        self.maxerrorrate = maxerrorrate
+        self.concurrency = concurrency
+        self.verbosity = verbosity
+        self.consumer = consumer
+        self.retrypolicy = retrypolicy
+        self.rows = []
+
+    def measure(self, layer, level):
+        """Runs the tests of the layer at the given level for warmup + hold seconds and returns the row of the level as dictionary with the keys of COLUMNS."""
+        plan = deepcopy(self.plan)
+        plan.layers = [layer]
+        statistics = StatisticsCollector()
+        begin = time() + self.warmup
+        def consume(test):
+            """Adds a test sent after the warm-up."""
+            if test.result is not None and test.result.timestamp >= begin:
+                statistics.addTest(test)
+                if self.consumer: self.consumer(test)
+        if self.openloop:
+            engine, schedule = ENGINE_TYPES[self.engine](self.concurrency, False, 0, self.retrypolicy), ArrivalSchedule(level, self.warmup + self.hold)
+        else:
+            engine, schedule = ENGINE_TYPES[self.engine](int(level), False, 0, self.retrypolicy), ArrivalSchedule(None, self.warmup + self.hold)
+        engine.run(plan, consume, schedule)
+        statistics.starttime = begin
+        statistics.endtime = begin + self.hold
+        count = sum(statistics.counts.values())
+        errors = sum(c for key, c in statistics.counts.items() if StatisticsCollector.isError(key[2]))
+        histogram = LatencyHistogram()
+        for key in statistics.histograms:
+            histogram.merge(statistics.histograms[key])
+        row = {"layer": layer, "level": level, "count": count, "throughput": count / self.hold, "errorrate": errors / count if count else None, "p50": histogram.getPercentile(50), "p95": histogram.getPercentile(95), "p99": histogram.getPercentile(99)}
+        row["sustainable"] = count > 0 and row["errorrate"] <= self.maxerrorrate and (self.slo is None or (row["p95"] is not None and row["p95"] <= self.slo))
+        if self.verbosity:
+            print(layer + " at " + ("rate " if self.openloop else "threads ") + str(level) + ": " + "%.1f" % row["throughput"] + " requests/sec, p95 " + ("-" if row["p95"] is None else "%.4f" % row["p95"]) + " sec, error rate " + ("-" if row["errorrate"] is None else "%.4f" % row["errorrate"]) + (" - sustainable" if row["sustainable"] else " - not sustainable"))
+        return row
+
+    def getNextLevel(self, passed, failed):
+        """Returns the next level to be measured given the highest sustainable level passed and the lowest failed level failed (None if not yet known), or None if the search is finished."""
+        if self.mode == "step":
+            level = None if failed is not None or passed is None else passed + self.step
+        elif failed is None:
+            level = None if passed is None else min(2 * passed, self.maximum)
+        else:
+            lower = passed if passed is not None else 0
+            level = None if failed - lower <= self.step else (lower + failed) / 2
+        if level is None or level > self.maximum or level == passed:
+            return None
+        return level if self.openloop else int(round(level))
+
+    def searchLayer(self, layer):
+        """Measures the levels of the layer until the search is finished and returns the best sustainable row or None."""
+        passed = None
+        failed = None
+        best = None
+        level = self.start if self.openloop else int(self.start)
+        while level is not None:
+            row = self.measure(layer, level)
+            self.rows.append(row)
+            if row["sustainable"]:
+                passed = level if passed is None else max(passed, level)
+                if best is None or row["throughput"] > best["throughput"]:
+                    best = row
+            else:
+                failed = level if failed is None else min(failed, level)
+            level = self.getNextLevel(passed, failed)
+        return best
+
+    def run(self):
+        """Searches every layer of the plan one after the other and returns the dictionary of the best sustainable row per layer (None if even the start level fails). All measured rows are available by the property rows."""
+        self.rows = []
+        return {layer: self.searchLayer(layer) for layer in self.plan.layers}
+
+    def outputReport(self, best):
+        """Prints all measured levels and the maximum sustainable throughput per layer given by the dictionary best returned by run."""
+        IOTools.outputTable("Capacity search (" + ("rate in tests/sec" if self.openloop else "level = simultaneous tests") + ", throughput in requests/sec, latencies in sec):", self.COLUMNS, self.rows, 1)
+        print("Maximum sustainable throughput" + ("" if self.slo is None else " (p95 <= " + str(self.slo) + " sec") + (", " if self.slo is not None else " (") + "error rate <= " + str(self.maxerrorrate) + "):")
+        for layer, row in best.items():
+            print("  " + layer + ": " + ("none" if row is None else "%.1f requests/sec at level " % row["throughput"] + str(row["level"])))
+
+
+class VirtualUser(Thread):
+    """Simulates one user of a map viewer in a separate Thread with its own Session, i.e., its own keep-alive connection. The user opens the map at the box generated by its test class and then follows a Markov walk of actions: pan the view, zoom in or out around the center or jump to another place at the same scale. Every action requests the view for all layers one after the other and is followed by a random think time."""
+
+    index = 0
+    simulation = None
+    testclass = None
+    rng = None
+    box = None
+    completed = None
+
+    def __init__(self, index, simulation, testclass, completed, rng=None):
+        """Initializes the index-th user of the VirtualUserSimulation simulation whose views are requested as tests of the class testclass. The completed tests and the completed actions as tuples (action, latency, failed, time.time() value of the start) are put into the SimpleQueue completed. The random numbers are drawn from the random.Random object rng if given."""
+        Thread.__init__(self, daemon=True)
+        self.index = index
+        self.simulation = simulation
+        self.testclass = testclass
+        self.completed = completed
+        self.rng = rng or Random()
+        self.box = None
+
+    def getNextAction(self, action):
+        """Returns the action following the given action drawn from the transition probabilities of the simulation."""
+        transitions = self.simulation.transitions[action]
+        return self.rng.choices(list(transitions), list(transitions.values()))[0]
+
+    def clamp(self, box):
+        """Shrinks the given box to the spatial extent keeping its center if it is larger and shifts it into the spatial extent if it crosses the border. The box is returned."""
+        extent = self.simulation.spatialextent
+        for lower, upper in [("lowerx", "upperx"), ("lowery", "uppery")]:
+            size = min(getattr(box, upper) - getattr(box, lower), getattr(extent, upper) - getattr(extent, lower))
+            start = (getattr(box, lower) + getattr(box, upper) - size) / 2.0
+            start = min(max(start, getattr(extent, lower)), getattr(extent, upper) - size)
+            setattr(box, lower, round(start, self.simulation.maxfractionaldigits))
+            setattr(box, upper, round(start + size, self.simulation.maxfractionaldigits))
+        return box
+
+    def moveView(self, action):
+        """Returns the box of the view after the given action starting from the current view."""
+        box = self.box.copy()
+        width, height = box.getWidth(), box.getHeight()
+        x, y = box.getCenter()
+        if action == "pan":
+            distance = self.rng.uniform(*self.simulation.panrange)
+            angle = self.rng.uniform(0, 2 * pi)
+            box.shiftX(distance * width * cos(angle))
+            box.shiftY(distance * height * sin(angle))
+        elif action in ["zoomin", "zoomout"]:
+            factor = self.simulation.zoomfactor if action == "zoomout" else 1.0 / self.simulation.zoomfactor
+            factor = max(factor, self.simulation.minwidth / width, self.simulation.minheight / height)
+            box = Box(x - width * factor / 2.0, y - height * factor / 2.0, x + width * factor / 2.0, y + height * factor / 2.0)
+        elif action == "jump":
+            extent = self.simulation.spatialextent
+            box.shiftX(self.rng.uniform(extent.lowerx, max(extent.lowerx, extent.upperx - width)) - box.lowerx)
+            box.shiftY(self.rng.uniform(extent.lowery, max(extent.lowery, extent.uppery - height)) - box.lowery)
+        return self.clamp(box)
+
+    def perform(self, action, session):
+        """Requests the view after the given action for all layers over the Session session and puts the tests and the action into the queue completed."""
+        simulation = self.simulation
+        if action != "open":
+            self.box = self.moveView(action)
+        timestamp = time()
+        starttime = perf_counter()
+        failed = False
+        for layer in simulation.layers:
+            test = self.testclass(simulation.server, layer, simulation.width, simulation.height, self.box.copy()).configure(simulation.settings)
+            test.action = action
+            test.user = self.index
+            try:
+                test.execute(simulation.dry, simulation.verbosity, session, simulation.retrypolicy)
+            except Exception as e:
+                print(e.__str__())
+            failed = failed or test.result is None or (test.result.response is not None and test.result.response.status_code >= 400)
+            self.completed.put(test)
+        self.completed.put((action, perf_counter() - starttime, failed, timestamp))
+
+    def run(self):
+        """Opens the map and performs actions with think times in between until the simulation has ended or the number of actions of the simulation is reached. Finally, None is put to completed to signal the end of this user."""
+        simulation = self.simulation
+        session = WMSServer.createSession()
+        profile = PROFILER.startThread() if PROFILER else None
+        try:
+            self.box = self.clamp(self.testclass(simulation.server, simulation.layers[0], simulation.width, simulation.height, Box(), self.rng).configure(simulation.settings).generateRandomBoundingBox().boundingbox.copy())
+            action = "open"
+            for count in range(simulation.count):
+                if simulation.isOver():
+                    break
+                if count:
+                    action = self.getNextAction(action)
+                self.perform(action, session)
+                simulation.think(self.rng)
+        finally:
+            if PROFILER: PROFILER.stopThread(profile)
+            session.close()
+            self.completed.put(None)
+
+
+class VirtualUserSimulation:
+    """Runs a number of concurrent VirtualUser threads representing users of a map viewer. Every user performs at most count actions or stops after duration seconds, whatever comes first. Actions starting within the first warmup seconds are not recorded. The think times between the actions follow one of the DISTRIBUTIONS with the given mean in seconds. Besides every request, which is passed to a consumer, the latency of every action, i.e., the time until the view is requested for all layers, is recorded per action."""
+    ACTIONS = ["open", "pan", "zoomin", "zoomout", "jump"]
+    DISTRIBUTIONS = ["exponential", "uniform", "lognormal", "constant"]
+    TRANSITIONS = {
+        "open": {"pan": 0.5, "zoomin": 0.3, "zoomout": 0.1, "jump": 0.1},
+        "pan": {"pan": 0.6, "zoomin": 0.15, "zoomout": 0.15, "jump": 0.1},
+        "zoomin": {"pan": 0.4, "zoomin": 0.35, "zoomout": 0.15, "jump": 0.1},
+        "zoomout": {"pan": 0.4, "zoomin": 0.15, "zoomout": 0.35, "jump": 0.1},
+        "jump": {"pan": 0.4, "zoomin": 0.3, "zoomout": 0.2, "jump": 0.1}}
+    """the default probabilities of the next action given the previous one"""
+    COLUMNS = ["action", "count", "throughput", "errorrate", "min", "mean"] + ["p" + str(p) for p in StatisticsCollector.PERCENTILES] + ["max"]
+    server = None
+    testclasses = []
+    layers = []
+    width = 0
+    height = 0
+    users = 1
+    count = 1
+    duration = None
+    thinktime = 5.0
+    distribution = "exponential"
+    transitions = {}
+    seed = None
+    dry = False
+    verbosity = 0
+    retrypolicy = None
+    warmup = 0.0
+    settings = {}
+    """the setters called for every new test, see WMSTest.configure"""
+    spatialextent = Box(-180.0, -90.0, 180.0, 90.0)
+    minwidth = 1.0
+    minheight = 1.0
+    maxfractionaldigits = 3
+    panrange = (0.1, 0.5)
+    """the minimum and maximum distance of a pan as fraction of the view size"""
+    zoomfactor = 2.0
+    endtime = None
+    counts = {}
+    errors = {}
+    histograms = {}
+    starttime = None
+    stoptime = None
+
+    def __init__(self, server, testclasses, layers, width, height, users=1, count=1, duration=None, thinktime=5.0, distribution="exponential", transitions=None, seed=None, dry=False, verbosity=0, retrypolicy=None, warmup=0.0, settings=None):
+        """Initializes the simulation of users concurrent users requesting maps of the size width x height of the given layers from the WMSServer server. The users are assigned to the test classes testclasses in turn, which generate their first view and identify their requests. Every user performs at most count actions and stops after duration seconds if given. The mean think time thinktime in seconds is distributed according to distribution being one of DISTRIBUTIONS. The dictionary transitions may replace rows of TRANSITIONS. If the integer seed is given, the walks and think times are reproducible. The tests are executed with the additional parameters dry, verbosity and the RetryPolicy retrypolicy. The first warmup seconds, which are part of the duration, are not recorded. Every test is configured by the dictionary settings of setters (see WMSTest.configure)."""
+        if FileWMSTest in testclasses:
+            raise Exception("The test class " + FileWMSTest.id + " cannot be used by virtual users.")
+        if distribution not in self.DISTRIBUTIONS:
+            raise Exception("The think time distribution must be one of " + ", ".join(self.DISTRIBUTIONS) + ": " + distribution)
+        if not isinstance(server, WMSServer):
+            raise Exception("The server must be an instance of WMSServer.")
+        self.server = server
+        self.testclasses = list(testclasses)
+        self.layers = list(layers)
+        self.width = width
+        self.height = height
+        self.users = users if users > 0 else 1
+        self.count = count if count and count > 0 else 1
+        self.duration = duration
+        self.thinktime = max(thinktime, 0.0)
+        self.distribution = distribution
+        self.transitions = dict(self.TRANSITIONS)
+        for action, row in (transitions or {}).items():
+            if action not in self.ACTIONS or any(a not in self.ACTIONS[1:] for a in row) or sum(row.values()) <= 0:
+                raise Exception("The transitions must map an action of " + ", ".join(self.ACTIONS) + " to positive probabilities of the actions " + ", ".join(self.ACTIONS[1:]) + ": " + str(action))
+            self.transitions[action] = row
+        self.seed = seed
+        self.dry = dry
+        self.verbosity = verbosity
+        self.retrypolicy = retrypolicy
+        self.warmup = warmup
+        self.settings = dict(settings or {})
+        self.spatialextent = self.testclasses[0].spatialextent
+        self.minwidth = self.testclasses[0].minwidth
+        self.minheight = self.testclasses[0].minheight
+        self.counts = {}
+        self.errors = {}
+        self.histograms = {}
+
+    def getThinkTime(self, rng):
+        """Returns a random think time in seconds drawn from the random.Random object rng."""
+        if self.thinktime <= 0 or self.distribution == "constant":
+            return self.thinktime
+        if self.distribution == "exponential":
+            return rng.expovariate(1.0 / self.thinktime)
+        if self.distribution == "uniform":
+            return rng.uniform(0.0, 2.0 * self.thinktime)
+        # lognormal with sigma 1 and the given mean
+        return rng.lognormvariate(log(self.thinktime) - 0.5, 1.0)
+
+    def think(self, rng):
+        """Sleeps for a random think time drawn from the random.Random object rng, but not beyond the end of the simulation."""
+        wait = self.getThinkTime(rng)
+        if self.endtime is not None:
+            wait = min(wait, self.endtime - perf_counter())
+        if wait > 0:
+            sleep(wait)
+
+    def isOver(self):
+        """Returns True if and only if the duration of the simulation has elapsed."""
+        return self.endtime is not None and perf_counter() >= self.endtime
+
+    def addAction(self, action, latency, failed):
+        """Records an action with its latency in seconds and whether one of its requests failed."""
+        self.counts[action] = self.counts.get(action, 0) + 1
+        self.errors[action] = self.errors.get(action, 0) + (1 if failed else 0)
+        self.histograms.setdefault(action, LatencyHistogram()).record(latency)
+
+    def run(self, consumer):
+        """Starts all users and passes every completed test to the callable consumer in the calling thread until all users have finished. Every test carries the properties action and user."""
+        self.counts, self.errors, self.histograms = {}, {}, {}
+        rng = Random(self.seed)
+        completed = SimpleQueue()
+        self.starttime = time() + self.warmup
+        self.endtime = perf_counter() + self.duration if self.duration is not None else None
+        for u in range(self.users):
+            VirtualUser(u, self, self.testclasses[u % self.testclasses.__len__()], completed, Random(rng.getrandbits(64))).start()
+        running = self.users
+        while running:
+            item = completed.get()
+            if item is None:
+                running -= 1
+            elif isinstance(item, WMSTest):
+                consumer(item)
+            elif item[3] >= self.starttime:
+                self.addAction(*item[:3])
+        self.stoptime = time()
+
+    def getRows(self):
+        """Returns the statistics of the actions as list of dictionaries with the keys of COLUMNS. The row of all actions is followed by one row per action."""
+        duration = max((self.stoptime or time()) - (self.starttime or time()), 1e-9)
+        rows = []
+        total = LatencyHistogram()
+        for histogram in self.histograms.values():
+            total.merge(histogram)
+        for action, histogram, count, errors in [("all", total, sum(self.counts.values()), sum(self.errors.values()))] + [(a, self.histograms[a], self.counts[a], self.errors[a]) for a in self.ACTIONS if a in self.counts]:
+            row = {"action": action, "count": count, "throughput": count / duration, "errorrate": errors / count if count else None, "min": histogram.min, "mean": histogram.getMean()}
+            for p in StatisticsCollector.PERCENTILES:
+                row["p" + str(p)] = histogram.getPercentile(p)
+            row["max"] = histogram.max
+            rows.append(row)
+        return rows
+
+    def outputReport(self):
+        """Prints the statistics of the actions as table to the console."""
+        IOTools.outputTable("Virtual users (" + str(self.users) + " users, " + self.distribution + " think time of " + str(self.thinktime) + " sec, latencies of the views of all layers in sec, throughput in actions/sec):", self.COLUMNS, self.getRows(), 1)
+
+
+class MockWMSRequestHandler(BaseHTTPRequestHandler):
+    """Handles the HTTP requests of a MockWMSServer."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        """Answers a GET request as configured by the MockWMSServer of the HTTP server."""
+        self.server.mock.respond(self)
+
+    def log_message(self, format, *args):
+        """Suppresses the logging of every request."""
+
+
+class MockWMSServer:
+    """A local stand-in for a WMS server answering GetMap requests with an image of a fixed size after an artificial latency. A share of the requests can be answered with an error or rejected as busy, as servers do under overload. The server runs in its own process, so that it does not consume the CPU time of the tester."""
+    port = 0
+    latency = 0.0
+    jitter = 0.0
+    imagesize = 10000
+    errorrate = 0.0
+    busyrate = 0.0
+    seed = None
+    image = b""
+    rng = None
+    process = None
+    SERVICE_EXCEPTION = '<?xml version="1.0" encoding="UTF-8"?><ServiceExceptionReport version="1.1.1"><ServiceException>{0}</ServiceException></ServiceExceptionReport>'
+
+    def __init__(self, port=0, latency=0.0, jitter=0.0, imagesize=10000, errorrate=0.0, busyrate=0.0, seed=None):
+        """Initializes the server listening at the given port of localhost (default: 0, i.e., any free port). Every response is delayed by latency seconds plus a uniformly distributed time of up to jitter seconds and has a body of imagesize bytes. The shares errorrate of the requests are answered with an internal server error (500) and busyrate with "service unavailable" (503). The integer seed makes the errors reproducible."""
+        if errorrate + busyrate > 1.0:
+            raise Exception("The sum of the error rate and the busy rate must not exceed 1.")
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.imagesize = imagesize
+        self.errorrate = errorrate
+        self.busyrate = busyrate
+        self.seed = seed
+
+    def respond(self, handler):
+        """Answers the request of the BaseHTTPRequestHandler handler. Requests other than GetMap requests with the parameters layers, width, height and bbox are answered with a bad request (400)."""
+        params = {k.lower(): v for k, v in parse_qsl(urlsplit(handler.path).query)}
+        chance = self.rng.random()
+        if params.get("request", "").lower() != "getmap" or not all(p in params for p in ["layers", "width", "height", "bbox"]):
+            self.send(handler, 400, self.SERVICE_EXCEPTION.format("Invalid GetMap request").encode(), "application/vnd.ogc.se_xml")
+        elif chance < self.busyrate:
+            self.send(handler, 503, b"Server busy", "text/plain", {"Retry-After": "1"})
+        else:
+            sleep(self.latency + (self.rng.uniform(0.0, self.jitter) if self.jitter else 0.0))
+            if chance < self.busyrate + self.errorrate:
+                self.send(handler, 500, self.SERVICE_EXCEPTION.format("Rendering failed").encode(), "application/vnd.ogc.se_xml")
+            else:
+                self.send(handler, 200, self.image, "image/png")
+
+    @staticmethod
+    def send(handler, status, body, contenttype, headers={}):
+        """Sends the response with the given status, body and content type and the additional headers using the BaseHTTPRequestHandler handler."""
+        handler.send_response(status)
+        handler.send_header("Content-Type", contenttype)
+        handler.send_header("Content-Length", str(len(body)))
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def serveForever(self, ready=None):
+        """Serves requests until the process is terminated. The port actually listened at is put into the optional multiprocessing.Queue ready."""
+        self.rng = Random(self.seed)
+        self.image = b"\x89PNG\r\n\x1a\n" + bytes(max(self.imagesize - 8, 0))
+        httpserver = ThreadingHTTPServer(("127.0.0.1", self.port), MockWMSRequestHandler, bind_and_activate=False)
+        httpserver.daemon_threads = True
+        httpserver.request_queue_size = 1024
+        httpserver.server_bind()
+        httpserver.server_activate()
+        httpserver.mock = self
+        if ready is not None:
+            ready.put(httpserver.server_address[1])
+        httpserver.serve_forever()
+
+    def start(self):
+        """Starts serving in a background process and returns the WMSServer representing this server."""
+        ready = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=self.serveForever, args=(ready,), daemon=True)
+        self.process.start()
+        self.port = ready.get(timeout=10)
+        return self.getServer()
+
+    def stop(self):
+        """Stops the background process."""
+        if self.process:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def getServer(self):
+        """Returns the WMSServer representing this server."""
+        return WMSServer("localhost", self.port, "/wms")
+
+
+class SelfBenchmark:
+    """Measures the overhead of the tester itself against a MockWMSServer without latency for every combination of test class, engine and output format: the maximum request rate, the CPU time per request and the memory per request in flight. The memory is measured by tracemalloc in two further, shorter runs against a server with latency, so that all requests are in flight at the same time, with threads and with twice as many simultaneous tests. The memory per request in flight is the slope between both peaks, which excludes fixed allocations such as file buffers and the set-up of the sink."""
+    testclasses = []
+    engines = []
+    outputformats = ["csv", "sqlite", "npz"]
+    threads = 1
+    count = 1000
+    width = 256
+    height = 256
+    seed = None
+    MEMORY_LATENCY = 0.05
+    LAYERS = ["mock:layer"]
+
+    def __init__(self, testclasses, engines, threads=1, count=1000, width=256, height=256, seed=None):
+        """Initializes the benchmark of the given lists of test classes and engine names with the number of simultaneous tests threads (default = 1) and count (default = 1000) tests per combination of maps of the size width x height. Engines and output formats whose optional packages are missing are skipped."""
+        self.testclasses = list(testclasses)
+        self.engines = [e for e in engines if e != "async" or aiohttp is not None]
+        self.outputformats = [f for f in self.outputformats if f != "npz" or np is not None]
+        self.threads = threads if threads > 0 else 1
+        self.count = count if count and count > 0 else 1000
+        self.width = width
+        self.height = height
+        self.seed = seed
+
+    def createSink(self, outputformat, directory):
+        """Returns a new ResultSink of the given output format writing to a file in the given directory."""
+        outputfile = path.join(directory, "results." + outputformat)
+        if outputformat == "sqlite":
+            return SQLiteResultSink(outputfile)
+        if outputformat == "npz":
+            return NpzResultSink(outputfile)
+        iot = IOTools()
+        return TextResultSink(outputfile, lambda test: iot.formatTest(test, outputformat))
+
+    def runCase(self, server, testclass, engine, outputformat, count, directory, inputfile=None, threads=None):
+        """Runs count tests of the given test class against the WMSServer server with the given engine name and threads (default: the threads of the benchmark) simultaneous tests writing the results in the given output format to the directory. Returns the number of completed tests and errors, the wall-clock time and the CPU time of this process in seconds."""
+        plan = WMSTestPlan(server, [testclass], self.LAYERS, self.width, self.height, count, self.seed, 0, inputfile)
+        sink = self.createSink(outputformat, directory)
+        statistics = StatisticsCollector()
+        completed = [0, 0]
+        def consume(test):
+            """Counts and outputs a completed test."""
+            completed[0] += 1
+            if test.result is None or test.result.getStatus() != 200:
+                completed[1] += 1
+            statistics.addTest(test)
+            sink.write(test)
+        cpu = process_time()
+        start = perf_counter()
+        ENGINE_TYPES[engine](threads or self.threads, False, 0).run(plan, consume, ArrivalSchedule())
+        sink.close()
+        return completed[0], completed[1], perf_counter() - start, process_time() - cpu
+
+    def measurePeak(self, server, testclass, engine, outputformat, directory, inputfile, threads):
+        """Returns the peak memory in bytes allocated while running 4 x threads tests of the given test class with the given engine name, output format and threads simultaneous tests against the WMSServer server."""
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            self.runCase(server, testclass, engine, outputformat, 4 * threads, directory, inputfile, threads)
+            return tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+
+    def measureMemory(self, server, testclass, engine, outputformat, directory, inputfile=None):
+        """Returns the memory in bytes allocated per request in flight while running tests of the given test class with the given engine name and output format against the WMSServer server, which should answer with latency. It is the increase of the peak memory from threads to twice as many simultaneous tests divided by threads."""
+        low = self.measurePeak(server, testclass, engine, outputformat, directory, inputfile, self.threads)
+        high = self.measurePeak(server, testclass, engine, outputformat, directory, inputfile, 2 * self.threads)
+        return (high - low) / self.threads
+
+    def run(self):
+        """Runs all combinations and returns one dictionary per combination with the keys test, engine, output, requests, errors, duration, rate (requests/sec), cpu (ms/request) and memory (kB/request in flight)."""
+        rows = []
+        fast = MockWMSServer(seed=self.seed)
+        slow = MockWMSServer(latency=self.MEMORY_LATENCY, seed=self.seed)
+        with tempfile.TemporaryDirectory() as directory:
+            inputfile = path.join(directory, "boxes.txt")
+            with open(inputfile, "w") as f:
+                for box in RandomBoundingBoxWMSTest(WMSServer(), self.LAYERS[0], self.width, self.height, rng=Random(self.seed)).generateBoundingBoxes(self.count):
+                    f.write(box.__str__() + "\n")
+            try:
+                fastserver = fast.start()
+                slowserver = slow.start()
+                for testclass in self.testclasses:
+                    for engine in self.engines:
+                        for outputformat in self.outputformats:
+                            self.runCase(fastserver, testclass, engine, outputformat, self.threads, directory, inputfile)
+                            completed, errors, duration, cpu = self.runCase(fastserver, testclass, engine, outputformat, self.count, directory, inputfile)
+                            memory = self.measureMemory(slowserver, testclass, engine, outputformat, directory, inputfile)
+                            rows.append({"test": testclass.id, "engine": engine, "output": outputformat, "requests": completed, "errors": errors, "duration": duration, "rate": completed / duration if duration else None, "cpu": 1000.0 * cpu / completed if completed else None, "memory": memory / 1000.0})
+            finally:
+                fast.stop()
+                slow.stop()
+        return rows
+
+    @staticmethod
+    def outputReport(rows):
+        """Prints the rows returned by run as table to the console."""
+        IOTools.outputTable("Self-benchmark (duration in sec, rate in requests/sec, cpu in ms/request, memory in kB/request in flight):", ["test", "engine", "output", "requests", "errors", "duration", "rate", "cpu", "memory"], rows)
+
+
 #
 # Global definitions
 #
 
-OUTPUT_FORMATS = ["csv", "bboxes"]
-MAX_CONNECTIONS = 256
-TEST_CLASSES = [RandomBoundingBoxWMSTest.id, WalkingBoundingBoxWMSTest.id, ZoomingBoxWMSTest.id]  #["File"]
+OUTPUT_FORMATS = ["csv", "bboxes", "sqlite", "npz"]
+ENGINE_TYPES = {"pool": WMSWorkerPool, "thread": WMSTestThreadEngine, "async": AsyncWMSEngine}
+ENGINES = list(ENGINE_TYPES)
+TEST_CLASS_TYPES = {t.id: t for t in [RandomBoundingBoxWMSTest, WalkingBoundingBoxWMSTest, ZoomingBoxWMSTest, TiledBoundingBoxWMSTest, FileWMSTest]}
+TEST_CLASSES = list(TEST_CLASS_TYPES)
+PROFILER = None
+"""the PhaseProfiler of the run or None if the run is not profiled"""
 
 
 #
@@ -473,102 +3251,239 @@ TEST_CLASSES = [RandomBoundingBoxWMSTest.id, WalkingBoundingBoxWMSTest.id, Zoomi
 #
 def main():
     """Main function providing a command-line tool with a rich set of arguments."""
+    global PROFILER
     # Parse arguments
     parser = argparse.ArgumentParser(description='Automatically generates web-map-service (WMS) requests and collects their response data. In particular, response times are measured (in seconds).', formatter_class=argparse.ArgumentDefaultsHelpFormatter, epilog="Example call:\npython .\wms_tester.py --host oflkpr100.webcc.dwd.de --path /geoserver/dwd/wms --width 768 --height 384 dwd:GeoRaster_Benchmark_GeoTIFF dwd:GeoRaster_Benchmark_NN_1 dwd:GeoRaster_Benchmark_NN_2 dwd:GeoRaster_Benchmark_NN_3 dwd:GeoRaster_Benchmark_NN_4 dwd:GeoRaster_Benchmark_NN_5")
     parser.add_argument("--verbose", "-v", action='count', help="produce more debugging output")
     parser.add_argument("--host", default="localhost", help="host name of the WMS server")
     parser.add_argument("--port", type=int, default=7600, help="port of the WMS server")
     parser.add_argument("--path", default="/wms", help="service path of the WMS")
-    parser.add_argument("--output-format", dest="outputformat", choices=OUTPUT_FORMATS, help="format of the test result")
+    parser.add_argument("--output-format", dest="outputformat", choices=OUTPUT_FORMATS, help="format of the test result (sqlite and npz require --output-file)")
     parser.add_argument("--output-file", dest="outputfile", help="path to a file where the output is stored (if given, the console output is supressed")
-    # parser.add_argument("--input-file", dest="inputfile", help="path to a file containing one box defined by [[lower_x,lower_y],[upper_x,upper_y]] per line")
-    parser.add_argument("--width", type=int, required=True, help="width of the requested maps")
-    parser.add_argument("--height", type=int, required=True, help="height of the requested maps")
+    parser.add_argument("--input-file", dest="inputfile", help="path to a file for the test class File containing one box defined by [[lower_x,lower_y],[upper_x,upper_y]] or lower_x,lower_y,upper_x,upper_y or one GetMap query string per line (.gz files are decompressed)")
+    parser.add_argument("--replay-log", dest="replaylog", help="path to an access log (combined log format) whose GetMap requests are sent at their original times instead of the tests")
+    parser.add_argument("--replay-speed", dest="replayspeed", type=float, default=1.0, help="factor by which the replay is faster than the original")
+    parser.add_argument("--width", type=int, help="width of the requested maps (required unless --replay-log is given)")
+    parser.add_argument("--height", type=int, help="height of the requested maps (required unless --replay-log is given)")
     parser.add_argument("--dry-run", dest="dry", action='store_true', help="do not send, but only output the requests")
-    parser.add_argument("layers", nargs='+', help="list of layer names to be tested against each other")
-    parser.add_argument("--tests", nargs='+', default=TEST_CLASSES[0], choices=TEST_CLASSES)
-    parser.add_argument("--count", type=int, default=1, help="positive number of test repetitions")
+    parser.add_argument("layers", nargs='*', help="list of layer names to be tested against each other (required unless --replay-log is given)")
+    parser.add_argument("--tests", nargs='+', choices=TEST_CLASSES, help="test classes (default: " + TEST_CLASSES[0] + ")")
+    parser.add_argument("--tile-origin", dest="tileorigin", type=float, nargs=2, default=[-180.0, -90.0], metavar=("X", "Y"), help="lower left corner of the tile matrix set of the test class TileBbox")
+    parser.add_argument("--tile-size", dest="tilesize", type=float, nargs=2, default=[180.0, 180.0], metavar=("WIDTH", "HEIGHT"), help="tile size in map units at zoom level 0 of the test class TileBbox")
+    parser.add_argument("--zoom-levels", dest="zoomlevels", type=int, nargs=2, default=[0, 10], metavar=("MIN", "MAX"), help="range of zoom levels of the test class TileBbox")
+    parser.add_argument("--zipf", type=float, default=1.0, help="exponent of the Zipf distribution of the tile popularity of the test class TileBbox (0 = all tiles equally popular)")
+    parser.add_argument("--count", type=int, help="positive number of test repetitions (default: 1, unlimited if --duration is given; for the test class File and --replay-log: all lines)")
+    parser.add_argument("--seed", type=int, help="seed of the random bounding box generation for reproducible runs")
+    parser.add_argument("--batch-size", dest="batchsize", type=int, default=0, help="if positive, the bounding boxes are generated vectorized in batches of this size (requires numpy)")
     parser.add_argument("--threads", type=int, default=1, help="positive number of simultaneous tests")
+    parser.add_argument("--summary-file", dest="summaryfile", help="path to a file where the summary statistics are stored as CSV or, if the path ends with .json, as JSON")
+    parser.add_argument("--no-summary", dest="summary", action='store_false', help="do not print the summary statistics at the end of the run")
+    parser.add_argument("--rate", type=float, help="send the tests open-loop at this fixed rate (tests per second) regardless of the tests in flight; the latency is measured from the scheduled sending time")
+    parser.add_argument("--duration", type=float, help="do not send any further tests after this number of seconds following the warm-up; without --count, tests are sent until then with constant memory (inf: until interrupted; the output format npz keeps all results in memory)")
+    parser.add_argument("--warmup", type=float, default=0.0, help="send tests for this number of seconds before the measurement starts; these tests only count for the rolling metrics and are neither output nor part of the statistics")
+    parser.add_argument("--processes", type=int, default=1, help="number of processes sharing the tests, each generating its share of the boxes with its own seed and running the engine with --threads simultaneous tests")
+    parser.add_argument("--engine", default=ENGINES[0], choices=ENGINES, help="execution engine: a fixed pool of worker threads, one thread per test or one asyncio event loop with a pooled HTTP client (requires aiohttp)")
+    parser.add_argument("--max-retries", dest="maxretries", type=int, default=3, help="number of times a request is repeated after an overload signal (refused connection, 429, 503) with adaptive backoff or after a stale keep-alive connection")
+    parser.add_argument("--retry-base-delay", dest="retrybasedelay", type=float, default=0.05, help="initial backoff in seconds after an overload signal without Retry-After; the backoff doubles per attempt and adapts to the overload of the server")
+    parser.add_argument("--retry-max-delay", dest="retrymaxdelay", type=float, default=10.0, help="maximum backoff in seconds, also capping Retry-After")
+    parser.add_argument("--metrics-port", dest="metricsport", type=int, help="serve rolling metrics of the last 1, 10 and 60 seconds per layer in the Prometheus text format at http://localhost:METRICS_PORT/metrics during the run")
+    parser.add_argument("--log-interval", dest="loginterval", type=float, help="print the throughput, p95 latency and errors per layer of the last seconds every this number of seconds during the run")
+    parser.add_argument("--compare", action='store_true', help="send every box to all layers in a random order before the next box and print a paired comparison of every layer with the first one")
+    parser.add_argument("--compare-runs", dest="compareruns", nargs=2, metavar=("RUN1", "RUN2"), help="do not test, but compare the layers of two runs stored by --output-file (CSV, .sqlite or .npz) on identical boxes")
+    parser.add_argument("--comparison-file", dest="comparisonfile", help="path to a file where the comparison of --compare or --compare-runs is stored as CSV or, if the path ends with .json, as JSON")
+    parser.add_argument("--heatmap", help="path to a file where the count, errors, mean and p95 latency and bytes of the tests are stored per layer, scale band and grid cell of their box center as CSV or, if the path ends with .geojson or .json, as GeoJSON")
+    parser.add_argument("--heatmap-grid", dest="heatmapgrid", type=int, nargs=2, default=[36, 18], metavar=("COLUMNS", "ROWS"), help="number of columns and rows of the grid of --heatmap")
+    parser.add_argument("--heatmap-extent", dest="heatmapextent", type=float, nargs=4, default=[-180.0, -90.0, 180.0, 90.0], metavar=("LOWER_X", "LOWER_Y", "UPPER_X", "UPPER_Y"), help="spatial extent of the grid of --heatmap")
+    parser.add_argument("--ramp", choices=CapacitySearch.MODES, help="search the maximum sustainable throughput of every layer by raising the number of simultaneous tests (or, with --ramp-rate, the rate) step by step or by doubling and bisection; --count defaults to unlimited")
+    parser.add_argument("--ramp-rate", dest="ramprate", action='store_true', help="let --ramp raise the open-loop rate in tests per second sent by --threads simultaneous tests")
+    parser.add_argument("--ramp-start", dest="rampstart", type=float, default=1, help="first level of --ramp")
+    parser.add_argument("--ramp-step", dest="rampstep", type=float, default=1, help="increment of --ramp step and resolution of --ramp binary")
+    parser.add_argument("--ramp-max", dest="rampmax", type=float, default=64, help="maximum level of --ramp")
+    parser.add_argument("--ramp-hold", dest="ramphold", type=float, default=30.0, help="seconds every level of --ramp is measured")
+    parser.add_argument("--ramp-warmup", dest="rampwarmup", type=float, default=5.0, help="seconds every level of --ramp runs before it is measured")
+    parser.add_argument("--slo", type=float, help="p95 latency in seconds a sustainable level of --ramp must not exceed")
+    parser.add_argument("--max-error-rate", dest="maxerrorrate", type=float, default=0.01, help="error rate a sustainable level of --ramp must not exceed")
+    parser.add_argument("--virtual-users", dest="virtualusers", type=int, help="simulate this number of concurrent map viewer users, each with its own connection, who open the map at a box of their test class and then pan, zoom in, zoom out or jump at random with think times in between; --count limits the actions per user (default: unlimited if --duration is given)")
+    parser.add_argument("--think-time", dest="thinktime", type=float, default=5.0, help="mean think time in seconds of --virtual-users between two actions")
+    parser.add_argument("--think-distribution", dest="thinkdistribution", choices=VirtualUserSimulation.DISTRIBUTIONS, default=VirtualUserSimulation.DISTRIBUTIONS[0], help="distribution of the think times of --virtual-users")
+    parser.add_argument("--user-transitions", dest="usertransitions", type=json.loads, help="JSON object replacing rows of the probabilities of the next action of --virtual-users given the previous one, e.g. '{\"pan\": {\"pan\": 0.8, \"jump\": 0.2}}' (actions: " + ", ".join(VirtualUserSimulation.ACTIONS) + ")")
+    parser.add_argument("--view-tiles", dest="viewtiles", type=int, nargs=2, metavar=("ROWS", "COLUMNS"), help="split the box of every test into ROWS x COLUMNS tiles of the size WIDTH/COLUMNS x HEIGHT/ROWS sent at the same time like a web map client and report the completion time of the slowest tile and the spread between the tiles per view; --threads is the number of views in flight")
+    parser.add_argument("--view-connections", dest="viewconnections", type=int, help="number of connections sending the tiles of one view of --view-tiles (default: one per tile)")
+    parser.add_argument("--profile-phases", dest="profilephases", action='store_true', help="measure the wall-clock time, CPU time and allocated memory blocks of the phases of the run (generate, createRequest, send, output, write) and print them at the end")
+    parser.add_argument("--profile", choices=["cprofile", "tracemalloc"], help="additionally profile all threads by cProfile or trace the allocations by tracemalloc (implies --profile-phases)")
+    parser.add_argument("--profile-file", dest="profilefile", help="path to a file where the cProfile statistics are stored for pstats")
+    parser.add_argument("--mock-server", dest="mockserver", action='store_true', help="do not test, but run a local mock WMS server at --port until interrupted")
+    parser.add_argument("--mock-latency", dest="mocklatency", type=float, default=0.0, help="latency in seconds of the mock WMS server")
+    parser.add_argument("--mock-jitter", dest="mockjitter", type=float, default=0.0, help="maximum additional random latency in seconds of the mock WMS server")
+    parser.add_argument("--mock-image-size", dest="mockimagesize", type=int, default=10000, help="size in bytes of the images returned by the mock WMS server")
+    parser.add_argument("--mock-error-rate", dest="mockerrorrate", type=float, default=0.0, help="share of the requests answered by the mock WMS server with an error (500)")
+    parser.add_argument("--mock-busy-rate", dest="mockbusyrate", type=float, default=0.0, help="share of the requests rejected by the mock WMS server as busy (503)")
+    parser.add_argument("--self-benchmark", dest="selfbenchmark", action='store_true', help="do not test, but measure the maximum request rate, CPU time and memory of the tester itself against a local mock WMS server for every test class in --tests (default: all), engine and output format with --threads and --count (default: 1000)")
 
     iot = IOTools()
     
     args = parser.parse_args()
+    if args.mockserver:
+        print("Mock WMS server listening at localhost:" + str(args.port) + ".")
+        try:
+            MockWMSServer(args.port, args.mocklatency, args.mockjitter, args.mockimagesize, args.mockerrorrate, args.mockbusyrate, args.seed).serveForever()
+        except KeyboardInterrupt:
+            pass
+        return
+    if args.selfbenchmark:
+        benchmark = SelfBenchmark([TEST_CLASS_TYPES[t] for t in (args.tests or TEST_CLASSES)], ENGINES, args.threads, args.count, args.width or 256, args.height or 256, args.seed)
+        benchmark.outputReport(benchmark.run())
+        return
+    if args.compareruns:
+        comparison = LayerComparison.compareRuns(args.compareruns)
+        comparison.outputReport()
+        if args.comparisonfile: IOTools.writeRows(args.comparisonfile, comparison.getRows())
+        return
+    args.tests = args.tests or TEST_CLASSES[:1]
+    if not args.replaylog and (not args.layers or args.width is None or args.height is None):
+        parser.error("the following arguments are required: --width, --height, layers")
+    if FileWMSTest.id in args.tests and not args.inputfile:
+        parser.error("the test class " + FileWMSTest.id + " requires --input-file")
+    if args.compare and (args.replaylog or args.ramp or len(args.layers) < 2):
+        parser.error("--compare requires at least two layers and cannot be combined with --replay-log or --ramp")
+    if (args.profilephases or args.profile) and args.processes > 1:
+        parser.error("--profile-phases and --profile cannot be combined with --processes")
+    if args.ramp and (args.replaylog or args.dry or args.processes > 1 or args.outputformat == "bboxes" or args.warmup):
+        parser.error("--ramp cannot be combined with --replay-log, --dry-run, --processes, --warmup (see --ramp-warmup) or the output format bboxes")
+    if args.warmup < 0:
+        parser.error("--warmup must not be negative")
+    if args.virtualusers and (args.replaylog or args.ramp or args.compare or args.rate or args.processes > 1 or args.outputformat == "bboxes" or FileWMSTest.id in args.tests):
+        parser.error("--virtual-users cannot be combined with --replay-log, --ramp, --compare, --rate, --processes, the output format bboxes or the test class " + FileWMSTest.id)
+    if args.viewtiles and (args.replaylog or args.ramp or args.virtualusers or args.processes > 1 or TiledBoundingBoxWMSTest.id in args.tests or FileWMSTest.id in args.tests):
+        parser.error("--view-tiles cannot be combined with --replay-log, --ramp, --virtual-users, --processes or the test classes " + TiledBoundingBoxWMSTest.id + " and " + FileWMSTest.id)
     # print(args)
-    iot.setOutputFile(args.outputfile)
+    if args.outputformat in ["sqlite", "npz"] and not args.outputfile:
+        parser.error("the output format " + args.outputformat + " requires --output-file")
+    if args.outputformat == "sqlite":
+        iot.setResultSink(SQLiteResultSink(args.outputfile))
+    elif args.outputformat == "npz":
+        iot.setResultSink(NpzResultSink(args.outputfile))
+    elif args.outputfile and args.outputformat != "bboxes":
+        iot.setResultSink(TextResultSink(args.outputfile, lambda test: iot.formatTest(test, args.outputformat)))
+    else:
+        iot.setOutputFile(args.outputfile)
     width = args.width
     height = args.height
     verbosity = args.verbose
     layers = args.layers
     testclasses = args.tests
-    count = args.count if args.count > 0 else 1
-    threadpool = Semaphore(args.threads) if args.threads > 0 else Semaphore()
+    unlimited = args.duration is not None and not args.count and not args.replaylog
+    count = args.count or (sys.maxsize if args.ramp or unlimited else None)
+    duration = args.duration + args.warmup if args.duration is not None else None
 
+    settings = {"setTileMatrixSet": (args.tileorigin[0], args.tileorigin[1], args.tilesize[0], args.tilesize[1], args.zoomlevels[0], args.zoomlevels[1]), "setZipfExponent": (args.zipf,)}
     if verbosity: print("Initizing tests... ", end = '')
     wmsserver = WMSServer(args.host, args.port, args.path)
-    tests = [[[] for l in layers] for t in testclasses]
-    for i in range(testclasses.__len__()):
-        t = testclasses[i]
-        print(t + " ", end = '')
-        if t == RandomBoundingBoxWMSTest.id:
-            # first layer determines the box
-            tests[i][0] = [RandomBoundingBoxWMSTest(wmsserver, layers[0], width, height) for c in range(count)]
-            for j in range(1, layers.__len__()):
-                tests[i][j] = [tests[i][0][c].clone().setLayers(layers[j]) for c in range(count)]
-        if t == WalkingBoundingBoxWMSTest.id:
-            # first layer determines the box
-            # first box starts the walk
-            tests[i][0] = [WalkingBoundingBoxWMSTest(wmsserver, layers[0], width, height)]
-            for c in range(0, count-1):
-                tests[i][0] += [tests[i][0][c].clone().moveBoundingBox()]
-            for j in range(1, layers.__len__()):
-                tests[i][j] = [tests[i][0][c].clone().setLayers(layers[j]) for c in range(count)]
-        if t == ZoomingBoxWMSTest.id:
-            # first layer determines the box
-            # first box starts the zooming
-            tests[i][0] = [ZoomingBoxWMSTest(wmsserver, layers[0], width, height)]
-            for c in range(0, count-1):
-                tests[i][0] += [tests[i][0][c].clone().zoomBoundingBox()]
-            for j in range(1, layers.__len__()):
-                tests[i][j] = [tests[i][0][c].clone().setLayers(layers[j]) for c in range(count)]
+    if args.replaylog:
+        plan = AccessLogReplay(wmsserver, args.replaylog, count)
+    else:
+        plan = WMSTestPlan(wmsserver, [TEST_CLASS_TYPES[t] for t in testclasses], layers, width, height, count, args.seed, args.batchsize, args.inputfile, args.compare or unlimited, settings)
     if verbosity: print("done.")
-    if(verbosity == 2): print(tests)
+    if(verbosity == 2): print(plan)
 
+    retrypolicy = RetryPolicy(args.maxretries, args.retrybasedelay, args.retrymaxdelay, args.seed)
+    metrics = None
+    if args.metricsport or args.loginterval:
+        metrics = RollingMetrics()
+        if args.metricsport: metrics.startServer(args.metricsport)
+        if args.loginterval: metrics.startLog(args.loginterval)
+    comparison = LayerComparison(layers) if args.compare else None
+    heatmap = LatencyHeatmap(Box(*args.heatmapextent), args.heatmapgrid[0], args.heatmapgrid[1]) if args.heatmap else None
+    def observe(test):
+        """Outputs a completed test and adds it to the rolling metrics, the comparison and the heatmap."""
+        if metrics: metrics.addTest(test)
+        if comparison: comparison.addTest(test)
+        if heatmap: heatmap.addTest(test)
+        iot.outputTest(test, args.outputformat)
+
+    if args.ramp:
+        search = CapacitySearch(plan, args.engine, args.ramp, args.ramprate, args.rampstart, args.rampstep, args.rampmax, args.ramphold, args.rampwarmup, args.slo, args.maxerrorrate, args.threads, verbosity, observe, retrypolicy)
+        best = search.run()
+        if metrics: metrics.stop()
+        iot.close()
+        search.outputReport(best)
+        if heatmap: heatmap.write(args.heatmap, iot.CSVseparator)
+        if args.summaryfile: IOTools.writeRows(args.summaryfile, search.rows, iot.CSVseparator)
+        return
+
+    simulation = None
+    if args.virtualusers:
+        simulation = VirtualUserSimulation(wmsserver, [TEST_CLASS_TYPES[t] for t in testclasses], layers, width, height, args.virtualusers, count, duration, args.thinktime, args.thinkdistribution, args.usertransitions, args.seed, args.dry, verbosity, retrypolicy, args.warmup, settings)
+    views = TiledViewEngine(args.viewtiles[0], args.viewtiles[1], args.viewconnections, args.threads, args.dry, verbosity, retrypolicy, args.warmup) if args.viewtiles else None
+    recycle = plan.recycle if isinstance(plan, WMSTestPlan) and not (simulation or views or args.processes > 1) else None
+    if recycle and iot.sink: iot.sink.recycler = recycle
     if verbosity:
         print("Testing... ")
-        if not args.dry:
-            iot.initProgress(count*testclasses.__len__()*layers.__len__())
+        if not args.dry and not unlimited:
+            iot.initProgress(simulation.users * simulation.count * layers.__len__() if simulation else plan.__len__() * (views.rows * views.columns if views else 1))
             iot.progress()
-    connectioncount = 0
-    session = Session()
-    testscompleted = SimpleQueue()
-    # startingtime = int(time())
-    for i in range(tests.__len__()):
-        for j in range(tests[i].__len__()):
-            if args.outputformat == "bboxes":
-                iot.outputLine(tests[i][j][0].boundingbox.__str__())
-            else:
-                for t in tests[i][j]:
-                    # start test in a thread
-                    if threadpool.acquire():
-                        connectioncount += 1
-                        WMSTestThread(t, threadpool, testscompleted, args.dry, verbosity, session, connectioncount == MAX_CONNECTIONS).start()
-                        if connectioncount == MAX_CONNECTIONS:
-                            if verbosity:
-                                print()
-                                print("Reached " + str(connectioncount) + " connections. Renewing TCP connection.")
-                            session = Session()
-                            connectioncount = 0
-                    # evaluate intermediate results
-                    while not testscompleted.empty():
-                        iot.outputTest(testscompleted.get(), args.outputformat)
-                        if verbosity and not args.dry: iot.progress()
-    # evaluate remaining results
-    while active_count() > 1 or not testscompleted.empty():
-        iot.outputTest(testscompleted.get(), args.outputformat)
-        if verbosity and not args.dry: iot.progress()
-        sleep(1)
+    schedule = ReplaySchedule(args.replayspeed, duration) if args.replaylog else ArrivalSchedule(args.rate, duration)
+    statistics = StatisticsCollector()
+    def consume(test):
+        """Outputs a completed test and hands it back to the plan for re-use. A test sent during the warm-up is only added to the rolling metrics."""
+        if PROFILER: start = PROFILER.begin()
+        warm = args.warmup and (test.result.timestamp if test.result else time()) < statistics.starttime
+        if warm:
+            if metrics: metrics.addTest(test)
+            if test.result: test.result.close()
+        else:
+            statistics.addTest(test)
+            observe(test)
+        if recycle and (warm or not iot.sink): recycle(test)
+        if verbosity and not args.dry and iot.progresstotal: iot.progress()
+        if PROFILER: PROFILER.end("output", start)
+
+    if args.profilephases or args.profile:
+        PROFILER = PhaseProfiler(args.profile)
+        tests = PROFILER.timeIterable(plan, "generate")
+        profile = PROFILER.startThread()
+    else:
+        tests = plan
+    statistics.start()
+    statistics.starttime += args.warmup
+    try:
+        if args.outputformat == "bboxes" and args.replaylog:
+            for t in plan:
+                iot.outputLine(t.boundingbox.__str__())
+        elif args.outputformat == "bboxes":
+            for t in plan.testclasses:
+                for l in plan.layers:
+                    iot.outputLine(next(plan.boxes(t)).__str__())
+        elif simulation:
+            simulation.run(consume)
+        elif views:
+            views.run(tests, consume, schedule)
+        elif args.processes > 1:
+            WMSProcessPool(args.processes, ENGINE_TYPES[args.engine](args.threads, args.dry, verbosity, retrypolicy)).run(plan, consume, schedule)
+        else:
+            ENGINE_TYPES[args.engine](args.threads, args.dry, verbosity, retrypolicy).run(tests, consume, schedule)
+    except KeyboardInterrupt:
+        print("\nInterrupted, the tests completed so far are reported.")
+    except Exception:
+        if metrics: metrics.stop()
+        iot.close()
+        raise
+    statistics.stop()
+    if metrics: metrics.stop()
     if verbosity and not args.dry: print()
     iot.close()
+    if not args.dry and args.outputformat != "bboxes":
+        if args.summary: statistics.outputSummary()
+        if args.summaryfile: statistics.writeSummary(args.summaryfile, iot.CSVseparator)
+        if simulation: simulation.outputReport()
+        if views: views.outputReport()
+        if comparison:
+            comparison.outputReport()
+            if args.comparisonfile: IOTools.writeRows(args.comparisonfile, comparison.getRows(), iot.CSVseparator)
+    if heatmap and not args.dry and args.outputformat != "bboxes": heatmap.write(args.heatmap, iot.CSVseparator)
+    if PROFILER:
+        PROFILER.stopThread(profile)
+        PROFILER.outputReport(args.profilefile)
     if verbosity: print("done.")
     
 if __name__ == '__main__':